@@ -0,0 +1,219 @@
+""" moduł: lokalny indeks QID autorów biogramów PSB (na podstawie autorzy_qid.json)
+    dopasowanie dokładne (nazwa, lata życia) oraz przybliżone: bloki trigramów nazwy
+    bez znaków diakrytycznych i porównanie przedziałów lat życia, z oceną pewności
+"""
+import re
+import json
+import threading
+import unicodedata
+from pathlib import Path
+
+# minimalna ocena pewności dopasowania przybliżonego
+MIN_SCORE = 0.85
+# waga zgodności nazwy w ocenie (reszta: zgodność lat życia)
+NAME_WEIGHT = 0.7
+# minimalna przewaga najlepszego kandydata nad kolejnym
+AMBIGUITY_MARGIN = 0.05
+# dopuszczalna różnica lat (np. 1882 i 1883 w różnych źródłach)
+YEAR_TOLERANCE = 1
+
+# litery bez rozkładu w normalizacji NFKD
+FOLD_LETTERS = str.maketrans({'ł': 'l', 'Ł': 'l', 'ß': 'ss', 'æ': 'ae', 'ø': 'o', 'đ': 'd'})
+
+
+def normalize_name(value:str) -> str:
+    """ normalizacja imienia i nazwiska: małe litery, pojedyncze spacje """
+    return ' '.join(value.casefold().split())
+
+
+def normalize_years(value:str) -> str:
+    """ normalizacja lat życia: bez nawiasów i spacji, jednolity myślnik """
+    value = value.replace('(', '').replace(')', '')
+    value = re.sub(r'[‐-―]', '-', value)
+    return ''.join(value.split())
+
+
+def fold_name(value:str) -> str:
+    """ nazwa do porównań przybliżonych: małe litery bez znaków diakrytycznych,
+        bez apostrofów i kropek, myślniki jako spacje
+    """
+    value = value.translate(FOLD_LETTERS)
+    value = unicodedata.normalize('NFKD', value.casefold())
+    value = ''.join(x for x in value if not unicodedata.combining(x))
+    value = re.sub(r"[’'`.]", '', value)
+    value = re.sub(r'[\W_]+', ' ', value)
+    return ' '.join(value.split())
+
+
+def trigrams(value:str) -> set:
+    """ trigramy nazwy (po fold_name), z uwzględnieniem granic słów """
+    value = f' {value} '
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def parse_years(value:str) -> tuple:
+    """ lata życia jako (rok urodzenia, rok śmierci), nieznane jako None,
+        np. '(1882-1951)' -> (1882, 1951), '(1950- )' -> (1950, None), 'zm. 1944' -> (None, 1944)
+    """
+    value = re.sub(r'[‐-―]', '-', value.replace('(', '').replace(')', ''))
+
+    def year(text:str):
+        match = re.search(r'\d{3,4}', text)
+        return int(match.group()) if match else None
+
+    if '-' in value:
+        start, end = value.split('-', 1)
+        return year(start), year(end)
+    if 'zm' in value or 'um.' in value:
+        return None, year(value)
+
+    return year(value), None
+
+
+def description_years(description:str) -> str:
+    """ lata życia z początku opisu autora w wikibase, np. '(1882-1951) historyk' """
+    match = re.match(r'\s*\(([^)]*)\)', description or '')
+    return match.group(1) if match else ''
+
+
+def description_has_years(description:str, years:str) -> bool:
+    """ lata życia autora w dowolnym miejscu opisu elementu (cały zapis lub rok urodzenia
+        i rok śmierci osobno), np. '1882-1951' w 'historyk, ur. 1882, zm. 1951'
+    """
+    years = years.replace('(', '').replace(')', '').strip()
+    tmp = years.split('-')
+    y_start = tmp[0].strip()
+    y_end = tmp[1].strip() if len(tmp) == 2 else ''
+
+    return (years in description or
+            ((not y_start or y_start in description) and (not y_end or y_end in description)))
+
+
+def years_score(years_a:tuple, years_b:tuple) -> float:
+    """ zgodność lat życia: 1.0 - zgodne, 0.0 - sprzeczne, 0.5 - nie do ustalenia """
+    compared = matched = 0
+    for value_a, value_b in zip(years_a, years_b):
+        if value_a is None or value_b is None:
+            continue
+        compared += 1
+        if abs(value_a - value_b) > YEAR_TOLERANCE:
+            return 0.0
+        matched += 1 if value_a == value_b else 0.8
+
+    if not compared:
+        return 0.5
+
+    return matched / compared
+
+
+def match_score(name_grams:set, years:tuple, entry_grams:set, entry_years:tuple) -> float:
+    """ ocena pewności dopasowania: podobieństwo trigramów nazwy (Jaccard) i zgodność lat """
+    if not name_grams or not entry_grams:
+        return 0.0
+    year_part = years_score(years, entry_years)
+    if year_part == 0.0:
+        return 0.0
+    name_part = len(name_grams & entry_grams) / len(name_grams | entry_grams)
+
+    return NAME_WEIGHT * name_part + (1 - NAME_WEIGHT) * year_part
+
+
+class AutorIndex:
+    """ indeks QID autorów wg znormalizowanego imienia i nazwiska oraz lat życia """
+
+    def __init__(self) -> None:
+        self.index = {}     # (nazwa, lata) -> QID
+        self.by_name = {}   # nazwa -> zbiór QID
+        self.entries = []   # (QID, trigramy nazwy, lata) dla dopasowania przybliżonego
+        self.blocks = {}    # trigram -> numery pozycji w entries
+        # indeks jest uzupełniany przez wątki importu w trakcie dopasowania
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, name:str, years:str, qid:str):
+        """ dodaje autora do indeksu (pomija QID testowe, np. 'TEST') """
+        if not name or not qid or not qid.startswith('Q'):
+            return
+        key_name = normalize_name(name)
+        key = (key_name, normalize_years(years))
+        grams = trigrams(fold_name(name))
+        with self.lock:
+            if self.index.get(key) == qid:
+                return
+            self.index[key] = qid
+            self.by_name.setdefault(key_name, set()).add(qid)
+
+            pos = len(self.entries)
+            self.entries.append((qid, grams, parse_years(years)))
+            for gram in grams:
+                self.blocks.setdefault(gram, []).append(pos)
+
+    def add_record(self, record:dict):
+        """ dodaje do indeksu rekord z pliku autorzy_qid.json (nazwa i warianty nazwiska) """
+        qid = record.get('QID', '')
+        years = record.get('years', '')
+        self.add(record.get('name', ''), years, qid)
+        for alias in record.get('aliasy', []):
+            self.add(alias[0], years, qid)
+
+    def find(self, name:str, years:str) -> str:
+        """ zwraca QID autora lub pusty tekst, jeżeli autora nie ma w indeksie,
+            bez lat życia tylko jeżeli nazwa jest jednoznaczna
+        """
+        key_name = normalize_name(name)
+        with self.lock:
+            qid = self.index.get((key_name, normalize_years(years)), '')
+            if not qid and not normalize_years(years):
+                qids = self.by_name.get(key_name, set())
+                if len(qids) == 1:
+                    qid = next(iter(qids))
+
+        return qid
+
+    def match(self, name:str, years:str, min_score:float = MIN_SCORE) -> tuple:
+        """ dopasowanie przybliżone, zwraca (QID, ocena pewności) najlepszego kandydata
+            lub ('', najlepsza ocena), jeżeli ocena jest za niska lub dopasowanie niejednoznaczne
+        """
+        qid = self.find(name, years)
+        if qid:
+            return qid, 1.0
+
+        name_grams = trigrams(fold_name(name))
+        name_years = parse_years(years)
+
+        # kandydaci: pozycje mające co najmniej połowę trigramów nazwy
+        shared = {}
+        with self.lock:
+            for gram in name_grams:
+                for pos in self.blocks.get(gram, []):
+                    shared[pos] = shared.get(pos, 0) + 1
+            candidates = [self.entries[pos] for pos, count in shared.items()
+                          if count >= len(name_grams) / 2]
+
+        # najlepsza ocena dla każdego QID (autor może mieć kilka wariantów nazwiska)
+        scores = {}
+        for entry_qid, entry_grams, entry_years in candidates:
+            score = match_score(name_grams, name_years, entry_grams, entry_years)
+            scores[entry_qid] = max(score, scores.get(entry_qid, 0.0))
+
+        ranking = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        if not ranking or ranking[0][1] < min_score:
+            return '', ranking[0][1] if ranking else 0.0
+        # dwóch kandydatów o zbliżonej ocenie (np. imiennicy bez lat życia) - brak dopasowania
+        if len(ranking) > 1 and ranking[0][1] - ranking[1][1] < AMBIGUITY_MARGIN:
+            return '', ranking[0][1]
+
+        return ranking[0]
+
+    @classmethod
+    def from_file(cls, path:Path) -> 'AutorIndex':
+        """ tworzy indeks na podstawie pliku json z autorami i ich QID """
+        autor_index = cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+        for record in json_data['authors']:
+            autor_index.add_record(record)
+
+        return autor_index
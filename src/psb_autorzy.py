@@ -1,44 +1,14 @@
 """ skrypt do importu autorów biogramów PSB
     uwaga: wymaga biblioteki WikibaseIntegrator w wersji 0.12 lub nowszej
 """
-import os
-import sys
-import time
-import json
-import logging
 from logging import Logger
-import warnings
 from pathlib import Path
-from dotenv import load_dotenv
 from wikibaseintegrator import WikibaseIntegrator
-from wikibaseintegrator.wbi_config import config as wbi_config
 from wikibaseintegrator import wbi_login
-from wikibaseintegrator.datatypes import ExternalID, Time, MonolingualText, Item, URL, String
-from wikibaseintegrator import wbi_helpers
-from wikibaseintegrator.wbi_enums import WikibaseDatePrecision
-from wikibaseintegrator.wbi_exceptions import MWApiError
+from wikibaseintegrator.datatypes import ExternalID, MonolingualText, Item, URL, String
 from wikibaseintegrator.wbi_enums import ActionIfExists
-
-# czy zapis do wikibase czy tylko test
-WIKIBASE_WRITE = True
-
-warnings.filterwarnings("ignore")
-
-# adresy wikibase
-wbi_config['SPARQL_ENDPOINT_URL'] = 'https://prunus-208.man.poznan.pl/bigdata/sparql'
-wbi_config['MEDIAWIKI_API_URL'] = 'https://prunus-208.man.poznan.pl/api.php'
-wbi_config['WIKIBASE_URL'] = 'https://prunus-208.man.poznan.pl'
-wbi_config['USER_AGENT'] = 'MyWikibaseBot/1.0'
-
-# login i hasło ze zmiennych środowiskowych
-env_path = Path(".") / ".env"
-load_dotenv(dotenv_path=env_path)
-
-# OAuth
-WIKIDARIAH_CONSUMER_TOKEN = os.environ.get('WIKIDARIAH_CONSUMER_TOKEN')
-WIKIDARIAH_CONSUMER_SECRET = os.environ.get('WIKIDARIAH_CONSUMER_SECRET')
-WIKIDARIAH_ACCESS_TOKEN = os.environ.get('WIKIDARIAH_ACCESS_TOKEN')
-WIKIDARIAH_ACCESS_SECRET = os.environ.get('WIKIDARIAH_ACCESS_SECRET')
+from psbtools import join_description, viaf_id
+from psb_engine import RecordBuilder, time_from_string, merge_claim, main
 
 # właściwości w testowej instancji wikibase
 P_VIAF = 'P517'
@@ -57,39 +27,30 @@ Q_HUMAN = 'Q229050'
 Q_PSB = 'Q315332'
 
 
-class Autor:
+class Autor(RecordBuilder):
     """ dane autora PSB """
 
+    records_key = 'authors'
+    # realne dane
+    default_input = Path("..") / "data" / "autorzy.json"
+    # dane z modyfikacjami
+    default_output = Path("..") / "data" / "autorzy_qid.json"
+    default_journal = Path("..") / "data" / "tmp_autorzy_qid_list.csv"
+    log_name = 'psb_autorzy'
+    # pola rekordu, których zmiana wymaga ponownego importu (--incremental)
+    hash_fields = ('name', 'years', 'bn_opis', 'description_en', 'aliasy', 'date_of_birth',
+                   'date_of_death', 'viaf', 'plwabn_id', 'volume', 'pages')
+
     def __init__(self, author_dict:dict, logger_object:Logger,
                  login_object:wbi_login.OAuth1, wbi_object: WikibaseIntegrator) -> None:
+        super().__init__(author_dict, logger_object, login_object, wbi_object)
 
-        self.identyfikator = author_dict['ID']
-        self.name = author_dict['name']
-
-        self.description_pl = author_dict.get('years', '')
-        self.description_en = author_dict.get('years', '')
-
-        # opis polski złożony z lat życia i informacji o autorze z BN,
-        # bez kropki na końcu opisu
-        tmp_description_pl = author_dict.get('bn_opis', '')
-        if tmp_description_pl:
-            first_char = tmp_description_pl[0].lower()
-            tmp_description_pl = first_char + tmp_description_pl[1:]
-            if tmp_description_pl.endswith('.'):
-                tmp_description_pl = tmp_description_pl[:-1]
-            self.description_pl += ' ' + tmp_description_pl
-            self.description_pl = self.description_pl.strip()
-
-        # opis angielski złożony z lat życia i informacji o autorze z BN przetłumaczonych
-        # automatycznie, bez kropki na końcu opisu
-        tmp_description_en = author_dict.get('description_en', '')
-        if tmp_description_en:
-            first_char = tmp_description_en[0].lower()
-            tmp_description_en = first_char + tmp_description_en[1:]
-            if tmp_description_en.endswith('.'):
-                tmp_description_en = tmp_description_en[:-1]
-            self.description_en += ' ' + tmp_description_en
-            self.description_en = self.description_en.strip()
+        # opisy złożone z lat życia i informacji o autorze z BN (angielski - przetłumaczonych
+        # automatycznie), bez kropki na końcu opisu
+        self.description_pl = join_description(author_dict.get('years', ''),
+                                               author_dict.get('bn_opis', ''))
+        self.description_en = join_description(author_dict.get('years', ''),
+                                               author_dict.get('description_en', ''))
 
         self.aliasy = author_dict.get('aliasy', [])
 
@@ -97,20 +58,12 @@ class Autor:
         self.date_of_death = author_dict.get('date_of_death', '')
 
         self.http_viaf = str(author_dict.get('viaf', '')).strip()
-        if 'https' in self.http_viaf:
-            self.viaf = self.http_viaf.replace('https://viaf.org/viaf/','').replace(r'/','')
-        else:
-            self.viaf = self.http_viaf.replace('http://viaf.org/viaf/','').replace(r'/','')
+        self.viaf = viaf_id(self.http_viaf)
 
         self.plwabn_id = author_dict.get('plwabn_id', '')
         self.psb_volume = author_dict.get('volume', '')
         self.psb_pages = author_dict.get('pages', '')
 
-        self.wb_item = None                # element
-        self.qid = ''                      # znaleziony lub utworzony QID
-        self.logger = logger_object        # logi
-        self.login_instance = login_object # login instance
-        self.wbi = wbi_object              # WikibaseIntegratorObject
         self.references = None             # referencje
         self.references_psb = None         # referencja do PSB dla wariantów nazwiska autora
         # referencja do VIAF dla daty urodzenia, daty śmierci
@@ -132,28 +85,6 @@ class Autor:
             self.references_bn = [[ URL(value=adres, prop_nr=P_REFERENCE_URL) ]]
 
 
-    def time_from_string(self, value:str, prop: str) -> Time:
-        """ przekształca datę z json na time oczekiwany przez wikibase """
-        year = value[:4]
-        month = value[5:7]
-        day = value[8:]
-
-        precision = WikibaseDatePrecision.YEAR
-        if day != '00':
-            precision = WikibaseDatePrecision.DAY
-        elif day == '00' and month != '00':
-            precision = WikibaseDatePrecision.MONTH
-            day = '01'
-        else:
-            day = month = '01'
-
-        format_time =  f'+{year}-{month}-{day}T00:00:00Z'
-
-        # referencja do VIAF
-        return Time(prop_nr=prop, time=format_time, precision=precision,
-                    references=self.references)
-
-
     def create_new_item(self):
         """ przygotowuje nowy element do dodania """
         self.wb_item = self.wbi.item.new()
@@ -169,11 +100,11 @@ class Autor:
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
         if self.date_of_birth:
-            statement = self.time_from_string(self.date_of_birth, P_DATE_OF_BIRTH)
+            statement = time_from_string(self.date_of_birth, P_DATE_OF_BIRTH, ref=self.references)
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
         if self.date_of_death:
-            statement = self.time_from_string(self.date_of_death, P_DATE_OF_DEATH)
+            statement = time_from_string(self.date_of_death, P_DATE_OF_DEATH, ref=self.references)
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
         if self.plwabn_id:
@@ -195,7 +126,7 @@ class Autor:
             statement = MonolingualText(text=self.name, language='pl',
                                         prop_nr=P_STATED_AS,
                                         references=statement_references)
-            self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.FORCE_APPEND)
+            merge_claim(self.wb_item, statement)
 
         # aliasy
         if self.aliasy:
@@ -226,7 +157,7 @@ class Autor:
                     statement = MonolingualText(text=alias_name, language='pl',
                                                 prop_nr=P_STATED_AS,
                                                 references=alias_references)
-                    self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
+                    merge_claim(self.wb_item, statement)
 
             self.wb_item.aliases.set(language='pl', values=alias_names_list)
 
@@ -237,7 +168,7 @@ class Autor:
     def update_item(self, update_qid:str):
         """ aktualizacja istniejącego elementu """
 
-        self.wb_item = self.wbi.item.get(entity_id=update_qid)
+        self.wb_item = self.get_item(update_qid)
         description = self.wb_item.descriptions.get(language='pl')
         if not description or description == '-':
             self.wb_item.descriptions.set(language='pl', value=self.description_pl)
@@ -248,11 +179,11 @@ class Autor:
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
         if self.date_of_birth:
-            statement = self.time_from_string(self.date_of_birth, P_DATE_OF_BIRTH)
+            statement = time_from_string(self.date_of_birth, P_DATE_OF_BIRTH, ref=self.references)
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
         if self.date_of_death:
-            statement = self.time_from_string(self.date_of_death, P_DATE_OF_DEATH)
+            statement = time_from_string(self.date_of_death, P_DATE_OF_DEATH, ref=self.references)
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
         if self.plwabn_id:
@@ -262,11 +193,6 @@ class Autor:
             statement = ExternalID(value=self.plwabn_id, prop_nr=P_PLWABN_ID, references=plwabn_reference)
             self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
 
-        claims_value = []
-        claims = self.wb_item.claims.get_json()
-        if P_STATED_AS in claims:
-            claims_value = [x.mainsnak.datavalue['value']['text'] for x in self.wb_item.claims.get(P_STATED_AS)]
-
         # stated as dla podstawowego imienia i nazwiska (label)
         # dodawany tylko jeżeli mamy jakieś referencje, do PSB, lub do VIAF
         statement_references = None
@@ -275,12 +201,12 @@ class Autor:
         elif self.references:
             statement_references = self.references
 
+        # istniejąca deklaracja jest tylko uzupełniana o brakujące referencje
         if statement_references:
-            if self.name not in claims_value:
-                statement = MonolingualText(text=self.name, language='pl',
-                                            prop_nr=P_STATED_AS,
-                                            references=statement_references)
-                self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.FORCE_APPEND)
+            statement = MonolingualText(text=self.name, language='pl',
+                                        prop_nr=P_STATED_AS,
+                                        references=statement_references)
+            merge_claim(self.wb_item, statement)
 
 
         if self.aliasy:
@@ -311,7 +237,7 @@ class Autor:
                     statement = MonolingualText(text=alias_name, language='pl',
                                                 prop_nr=P_STATED_AS,
                                                 references=alias_references)
-                    self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
+                    merge_claim(self.wb_item, statement)
 
             self.wb_item.aliases.set(language='pl', values=alias_names_list)
 
@@ -320,9 +246,15 @@ class Autor:
         """ proste wyszukiwanie elementu w wikibase, tylko dokładna zgodność imienia i nazwiska """
         f_result = False
 
-        items = wbi_helpers.search_entities(search_string=self.name,
-                                             language='pl',
-                                             search_type='item')
+        # kandydaci z wyszukiwania grupowego (bez pobierania elementów)
+        if self.lookup is not None and self.name in self.lookup:
+            for item, item_label, _ in self.lookup.candidates(self.name):
+                if item_label == self.name:
+                    self.qid = item
+                    return True
+            return False
+
+        items = self.search_cache.search(search_string=self.name, language='pl', search_type='item')
         for item in items:
             wbi_item = self.wbi.item.get(entity_id=item)
             item_label = wbi_item.labels.get(language='pl')
@@ -335,116 +267,19 @@ class Autor:
         return f_result
 
 
-    def write_or_exit(self):
-        """ zapis danych do wikibase lub zakończenie programu """
-        loop_num = 1
-        while True:
-            try:
-                new_id = self.wb_item.write()
-                break
-            except MWApiError as wb_error:
-                err_code = wb_error.code
-                err_message = wb_error.messages
-                self.logger.error(f'ERROR: {err_code}, {err_message}')
-
-                # jeżeli jest to problem z tokenem to próba odświeżenia tokena i powtórzenie
-                # zapisu, ale tylko raz, w razie powtórnego błędu bad token, skrypt kończy pracę
-                if err_code in ['assertuserfailed', 'badtoken']:
-                    if loop_num == 1:
-                        self.logger.error('błąd "badtoken", odświeżenie poświadczenia...')
-                        self.login_instance.generate_edit_credentials()
-                        loop_num += 1
-                        continue
-                # jeżeli błąd zapisu to druga próba po 5 sekundach
-                elif err_code in ['failed-save']:
-                    if loop_num == 1:
-                        self.logger.error('błąd zapisu, czekam 5 sekund...')
-                        time.sleep(5.0)
-                        loop_num += 1
-                        continue
-
-                sys.exit(1)
-
-        self.qid = new_id.id
-
-
-def set_logger(path:str) -> Logger:
-    """ utworzenie loggera """
-    logger_object = logging.getLogger(__name__)
-    logger_object.setLevel(logging.INFO)
-    log_format = logging.Formatter('%(asctime)s - %(message)s')
-    c_handler = logging.StreamHandler()
-    c_handler.setFormatter(log_format)
-    c_handler.setLevel(logging.DEBUG)
-    logger_object.addHandler(c_handler)
-    # zapis logów do pliku tylko jeżeli skrypt uruchomiono z zapisem do wiki
-    if WIKIBASE_WRITE:
-        f_handler = logging.FileHandler(path)
-        f_handler.setFormatter(log_format)
-        f_handler.setLevel(logging.INFO)
-        logger_object.addHandler(f_handler)
-
-    return logger_object
-
-
-# ------------------------------------------------------------------------------
-if __name__ == '__main__':
-
-    # pomiar czasu wykonania
-    start_time = time.time()
-
-    # tworzenie obiektu loggera
-    file_log = Path('..') / 'log' / 'psb_autorzy.log'
-    logger = set_logger(file_log)
+    def build(self, update_qid:str = None):
+        """ przygotowuje nowy element lub aktualizację istniejącego """
+        if update_qid:
+            self.update_item(update_qid)
+        else:
+            self.create_new_item()
 
-    logger.info('POCZĄTEK IMPORTU')
 
-    # zalogowanie do instancji wikibase
-    login_instance = wbi_login.OAuth1(consumer_token=WIKIDARIAH_CONSUMER_TOKEN,
-                                      consumer_secret=WIKIDARIAH_CONSUMER_SECRET,
-                                      access_token=WIKIDARIAH_ACCESS_TOKEN,
-                                      access_secret=WIKIDARIAH_ACCESS_SECRET)
+    def search_labels(self) -> list:
+        """ etykieta i warianty nazwiska autora """
+        return [self.name] + [x[0] for x in self.aliasy]
 
-    wbi = WikibaseIntegrator(login=login_instance)
 
-    # realne dane
-    input_path = Path("..") / "data" / "autorzy.json"
-    # dane z modyfikacjami
-    output_path = Path("..") / "data" / "autorzy_qid.json"
-    # lub testowe dane
-    # input_path = '/home/piotr/ihpan/psb_import/data/probka.json'
-    # output_path = '/home/piotr/ihpan/psb_import/data/probka_qid.json'
-
-    with open(input_path, "r", encoding='utf-8') as f:
-        json_data = json.load(f)
-        for i, autor_record in enumerate(json_data['authors']):
-            # utworzenie instancji obiektu autora
-            autor = Autor(autor_record, logger_object=logger, login_object=login_instance,
-                          wbi_object=wbi)
-
-            if not autor.appears_in_wikibase():
-                autor.create_new_item()
-                if WIKIBASE_WRITE:
-                    autor.write_or_exit()
-                else:
-                    autor.qid = 'TEST'
-
-                # uzupełnienie danych autora o nadane QID
-                autor_record['QID'] = autor.qid
-
-                message = f'Dodano element: # [https://prunus-208.man.poznan.pl/wiki/Item:{autor.qid} {autor.name}]'
-            else:
-                message = f'Element istnieje: # [https://prunus-208.man.poznan.pl/wiki/Item:{autor.qid} {autor.name}]'
-                autor.update_item(autor.qid)
-                if WIKIBASE_WRITE:
-                    autor.write_or_exit()
-
-            logger.info(message)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, indent=4, ensure_ascii=False)
-
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    message = f'Czas wykonania programu: {time.strftime("%H:%M:%S", time.gmtime(elapsed_time))} s.'
-    logger.info(message)
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    main(Autor, 'Import autorów biogramów PSB do wikibase', __file__)
@@ -0,0 +1,90 @@
+""" moduł: liczniki gałęzi analizy dat (DateBDF, Postac.date_from_bn) - które zapisy dat
+    występują w danych, które flagi ustawiają i ile czasu zajmuje ich analiza
+
+    liczniki są domyślnie wyłączone (jedno sprawdzenie zmiennej enabled w analizie daty),
+    włączane parametrem --branch-stats importu lub polecenia parse-dates
+"""
+import json
+from pathlib import Path
+from collections import Counter, defaultdict
+
+# czy liczniki są włączone
+enabled = False
+
+# (funkcja, gałąź) -> liczba wywołań, łączny czas (s)
+hits = Counter()
+times = defaultdict(float)
+# (funkcja, flaga) -> liczba wywołań, w których flaga została ustawiona
+flags = Counter()
+# (funkcja, gałąź) -> przykładowe teksty
+examples = defaultdict(list)
+
+# liczba zapamiętywanych przykładów dla gałęzi
+MAX_EXAMPLES = 3
+
+
+def enable():
+    """ włączenie liczników (z wyzerowaniem) """
+    global enabled
+    hits.clear()
+    times.clear()
+    flags.clear()
+    examples.clear()
+    enabled = True
+
+
+def record(function:str, branch:str, elapsed:float, text:str = '', flag_names:list = None):
+    """ rejestracja wywołania: gałąź, czas analizy, ustawione flagi, przykładowy tekst """
+    key = (function, branch)
+    hits[key] += 1
+    times[key] += elapsed
+    for name in flag_names or []:
+        flags[(function, name)] += 1
+    if text and len(examples[key]) < MAX_EXAMPLES and text not in examples[key]:
+        examples[key].append(text)
+
+
+def summary() -> dict:
+    """ podsumowanie: dla każdej funkcji gałęzie wg liczby wywołań oraz liczby flag """
+    result = {}
+    for (function, branch), count in hits.most_common():
+        total = times[(function, branch)]
+        entry = result.setdefault(function, {'calls': 0, 'seconds': 0.0, 'branches': {}, 'flags': {}})
+        entry['calls'] += count
+        entry['seconds'] += total
+        entry['branches'][branch] = {'calls': count,
+                                     'seconds': round(total, 6),
+                                     'us_per_call': round(total / count * 1e6, 2),
+                                     'examples': examples[(function, branch)]}
+    for (function, name), count in flags.most_common():
+        entry = result.setdefault(function, {'calls': 0, 'seconds': 0.0, 'branches': {}, 'flags': {}})
+        entry['flags'][name] = count
+    for entry in result.values():
+        entry['seconds'] = round(entry['seconds'], 6)
+
+    return result
+
+
+def format_summary(data:dict = None) -> str:
+    """ podsumowanie w postaci tekstu (tabela gałęzi dla każdej funkcji) """
+    data = summary() if data is None else data
+    lines = []
+    for function, entry in data.items():
+        lines.append(f'{function}: wywołania: {entry["calls"]}, czas: {entry["seconds"]:.3f} s')
+        for branch, info in entry['branches'].items():
+            share = info['calls'] / entry['calls'] * 100 if entry['calls'] else 0.0
+            lines.append(f'    {branch:<30} {info["calls"]:>9} {share:6.1f}% '
+                         f'{info["us_per_call"]:>9.2f} µs  {" | ".join(info["examples"])}')
+        if entry['flags']:
+            lines.append('    flagi: ' + ', '.join(f'{name}: {count}' for name, count in entry['flags'].items()))
+
+    return '\n'.join(lines)
+
+
+def dump(path:Path) -> dict:
+    """ zapis podsumowania do pliku json, zwraca podsumowanie """
+    data = summary()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+    return data
@@ -0,0 +1,111 @@
+""" moduł: pamięć podręczna wyników wyszukiwania elementów (wbsearchentities) """
+import json
+import time
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from wikibaseintegrator import wbi_helpers
+
+
+def normalize_search(value:str) -> str:
+    """ normalizacja tekstu wyszukiwania (wyszukiwarka nie rozróżnia wielkości liter) """
+    return ' '.join(value.casefold().split())
+
+
+class SearchCache:
+    """ pamięć podręczna wyników wyszukiwania, także wyników pustych (negatywnych),
+        o ograniczonym rozmiarze (LRU) z opcjonalnym zapisem na dysku, bezpieczna
+        dla wątków (odczyty z wyprzedzeniem, --lookahead)
+    """
+
+    def __init__(self, max_size:int = 50000, path:Path = None, max_age:float = 86400.0) -> None:
+        """ max_size - maksymalna liczba wyników, path - plik json z zapisanymi wynikami,
+            max_age - maksymalny wiek (w sekundach) wyników wczytywanych z pliku
+        """
+        self.cache = OrderedDict()   # (tekst, język, typ) -> (czas, lista QID)
+        self.max_size = max_size
+        self.path = Path(path) if path else None
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        # licznik unieważnień: wynik wyszukiwania trwającego podczas unieważnienia nie jest zapisywany
+        self.generation = 0
+        if self.path and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    @staticmethod
+    def key(search_string:str, language:str, search_type:str) -> tuple:
+        """ klucz pamięci podręcznej """
+        return (normalize_search(search_string), language, search_type)
+
+    def search(self, search_string:str, language:str = 'pl', search_type:str = 'item') -> list:
+        """ wyszukiwanie elementów, z pamięci podręcznej lub przez wbsearchentities """
+        key = self.key(search_string, language, search_type)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return list(self.cache[key][1])
+            self.misses += 1
+            generation = self.generation
+
+        # wyszukiwanie poza blokadą, równoczesne wyszukiwania tego samego tekstu są dopuszczalne
+        items = wbi_helpers.search_entities(search_string=search_string,
+                                            language=language,
+                                            search_type=search_type)
+        with self.lock:
+            if generation == self.generation:
+                self.put(key, items)
+
+        return list(items)
+
+    def put(self, key:tuple, items:list, timestamp:float = None):
+        """ zapis wyniku wyszukiwania, usunięcie najdawniej używanych przy przepełnieniu """
+        with self.lock:
+            self.cache[key] = (timestamp if timestamp else time.time(), list(items))
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+
+    def invalidate(self, labels:list, language:str = 'pl'):
+        """ usuwa wyniki, na które może wpłynąć zapis elementu z podanymi etykietami
+            lub aliasami (wyszukiwarka dopasowuje także początek etykiety)
+        """
+        labels = [normalize_search(x) for x in labels if x]
+        if not labels:
+            return
+        with self.lock:
+            self.generation += 1
+            to_remove = [key for key in self.cache
+                         if key[1] == language and any(x.startswith(key[0]) for x in labels)]
+            for key in to_remove:
+                del self.cache[key]
+
+    def load(self):
+        """ wczytanie zapisanych wyników, pomija wyniki starsze niż max_age """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+        min_time = time.time() - self.max_age
+        for search_string, language, search_type, timestamp, items in json_data:
+            if timestamp >= min_time:
+                self.put((search_string, language, search_type), items, timestamp)
+
+    def save(self):
+        """ zapis wyników na dysku (jeżeli podano ścieżkę) """
+        if not self.path:
+            return
+        with self.lock:
+            json_data = [[key[0], key[1], key[2], timestamp, items]
+                         for key, (timestamp, items) in self.cache.items()]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(json_data, f, ensure_ascii=False)
+
+    def stats(self) -> str:
+        """ statystyka trafień """
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return f'wyszukiwania: {total}, z pamięci podręcznej: {self.hits} ({ratio:.1f}%)'
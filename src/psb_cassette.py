@@ -0,0 +1,155 @@
+""" moduł: nagrywanie i odtwarzanie ruchu HTTP importu (kasety) do powtarzalnych testów
+    wydajności bez połączenia z wikibase
+    record - zapytania i odpowiedzi prawdziwego importu zapisywane w kasecie (json lines, gzip),
+             ponowne nagranie zastępuje poprzednią zawartość kasety
+    replay - odpowiedzi z kasety zamiast zapytań do wikibase, opcjonalnie z opóźnieniem
+             (latency w sekundach, wartość ujemna - czas odpowiedzi zapisany w kasecie)
+
+    uwaga: przechwytywane są wszystkie zapytania wykonywane przez requests.Session.request
+    (WikibaseIntegrator, SPARQL, OAuth), klucz zapytania nie obejmuje tokenów i podpisów OAuth
+"""
+import gzip
+import json
+import time
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# parametry pomijane w kluczu zapytania (zmienne pomiędzy uruchomieniami)
+VOLATILE_PARAMS = {'token', 'maxlag'}
+
+
+def _params(value) -> list:
+    """ parametry zapytania (słownik, lista par, tekst) jako posortowana lista par """
+    if not value:
+        return []
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('utf-8', 'replace')
+    if isinstance(value, str):
+        pairs = parse_qsl(value, keep_blank_values=True)
+    elif isinstance(value, dict):
+        pairs = list(value.items())
+    else:
+        pairs = list(value)
+
+    return sorted((str(k), str(v)) for k, v in pairs
+                  if k not in VOLATILE_PARAMS and not str(k).startswith('oauth_'))
+
+
+def request_key(method:str, url:str, params=None, data=None, json_data=None) -> str:
+    """ klucz zapytania: metoda, adres bez parametrów, parametry i dane bez tokenów """
+    parts = urlsplit(url)
+    query = _params(parts.query) + _params(params)
+    key = {'method': method.upper(),
+           'url': f'{parts.scheme}://{parts.netloc}{parts.path}',
+           'params': sorted(query),
+           'data': _params(data),
+           'json': json_data}
+
+    return json.dumps(key, sort_keys=True, ensure_ascii=False)
+
+
+class Cassette:
+    """ kaseta z zapytaniami HTTP, mode: 'record' lub 'replay' """
+
+    def __init__(self, path:Path, mode:str = 'replay', latency:float = 0.0) -> None:
+        if mode not in ('record', 'replay'):
+            raise ValueError(f'nieznany tryb kasety: {mode}')
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.original_request = None
+        self.file = None
+        self.recorded = 0
+        self.replayed = 0
+        # odtwarzanie: klucz -> lista odpowiedzi (kolejne powtórzenia zapytania), pozycja
+        self.responses = {}
+        self.positions = {}
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+
+    def install(self):
+        """ podmiana requests.Session.request """
+        if self.mode == 'record':
+            self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+        else:
+            self.load()
+
+        self.original_request = requests.Session.request
+        cassette = self
+
+        def request(session, method, url, **kwargs):
+            return cassette.handle(session, method, url, **kwargs)
+
+        requests.Session.request = request
+
+    def uninstall(self):
+        """ przywrócenie requests.Session.request """
+        if self.original_request:
+            requests.Session.request = self.original_request
+            self.original_request = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def load(self):
+        """ wczytanie kasety """
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                self.responses.setdefault(entry['key'], []).append(entry['response'])
+
+    def handle(self, session, method, url, **kwargs):
+        """ obsługa zapytania: nagranie lub odtworzenie odpowiedzi """
+        key = request_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+
+        if self.mode == 'record':
+            response = self.original_request(session, method, url, **kwargs)
+            entry = {'key': key,
+                     'response': {'status': response.status_code,
+                                  'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+                                  'body': response.content.decode('utf-8', 'replace'),
+                                  'elapsed': response.elapsed.total_seconds()}}
+            with self.lock:
+                self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                self.recorded += 1
+            return response
+
+        with self.lock:
+            entries = self.responses.get(key)
+            if not entries:
+                raise requests.exceptions.ConnectionError(f'brak zapytania w kasecie: {method} {url}')
+            # kolejne powtórzenia zapytania otrzymują kolejne odpowiedzi, ostatnia jest powtarzana
+            pos = self.positions.get(key, 0)
+            self.positions[key] = pos + 1
+            data = entries[min(pos, len(entries) - 1)]
+            self.replayed += 1
+
+        if self.latency < 0:
+            time.sleep(data.get('elapsed', 0.0))
+        elif self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.status_code = data['status']
+        response.headers = CaseInsensitiveDict(data['headers'])
+        response._content = data['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = url
+        response.reason = 'OK' if data['status'] < 400 else 'ERROR'
+
+        return response
+
+    def stats(self) -> str:
+        """ liczba nagranych lub odtworzonych zapytań """
+        if self.mode == 'record':
+            return f'kaseta {self.path}: nagrane zapytania: {self.recorded}'
+        return f'kaseta {self.path}: odtworzone zapytania: {self.replayed}'
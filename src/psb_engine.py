@@ -0,0 +1,988 @@
+""" moduł: wspólny mechanizm importu danych PSB do wikibase (autorzy, postacie)
+    etapy: odczyt -> dopasowanie -> budowa elementu -> zapis -> rejestracja wyniku
+    uwaga: wymaga biblioteki WikibaseIntegrator w wersji 0.12 lub nowszej
+"""
+import os
+import sys
+import time
+import json
+import logging
+import argparse
+import subprocess
+import traceback
+import warnings
+from logging import Logger
+from pathlib import Path
+from dotenv import load_dotenv
+from wikibaseintegrator import WikibaseIntegrator
+from wikibaseintegrator.wbi_config import config as wbi_config
+from wikibaseintegrator import wbi_login
+from wikibaseintegrator.datatypes import Time
+from wikibaseintegrator.wbi_enums import WikibaseDatePrecision, WikibaseSnakType, ActionIfExists
+from wikibaseintegrator.wbi_exceptions import MWApiError
+from wikibaseintegrator.wbi_login import LoginError
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+from psb_io import select_shard, assign_shards, journal_path, append_journal, merge_journals
+from psb_io import iter_json_records, iter_shard, write_with_qids, DRY_RUN_QID
+from psb_io import record_hash, append_hash, read_hashes, append_failed, iter_failed
+from psb_reconcile import reconcile
+from psb_cache import SearchCache
+from psb_validate import validate_records, write_report, read_quarantine
+from psb_unique import UniquenessIndex, resolve_collisions
+from psb_memory import MemoryMonitor
+from psb_profile import Profiler
+from psb_progress import Progress, counters
+from psb_cassette import Cassette
+from psb_lookup import NameLookup
+from psb_store import WorkingStore
+from psb_pipeline import Lookahead
+from psb_logging import set_logger
+import psb_branches
+
+# czy zapis do wikibase czy tylko test
+WIKIBASE_WRITE = True
+
+# adres wikibase
+WIKIBASE_URL = 'https://prunus-208.man.poznan.pl'
+
+# nazwy zmiennych środowiskowych z poświadczeniami OAuth
+CREDENTIALS = ['WIKIDARIAH_CONSUMER_TOKEN', 'WIKIDARIAH_CONSUMER_SECRET',
+               'WIKIDARIAH_ACCESS_TOKEN', 'WIKIDARIAH_ACCESS_SECRET']
+
+
+def configure_wbi():
+    """ konfiguracja WikibaseIntegrator dla instancji wikibase """
+    warnings.filterwarnings("ignore")
+
+    # adresy wikibase
+    wbi_config['SPARQL_ENDPOINT_URL'] = f'{WIKIBASE_URL}/bigdata/sparql'
+    wbi_config['MEDIAWIKI_API_URL'] = f'{WIKIBASE_URL}/api.php'
+    wbi_config['WIKIBASE_URL'] = WIKIBASE_URL
+    wbi_config['USER_AGENT'] = 'MyWikibaseBot/1.0'
+
+
+def credentials(shard:int = None) -> tuple:
+    """ poświadczenia OAuth ze zmiennych środowiskowych (lub pliku .env), dla partii (shard)
+        można podać osobne poświadczenia w zmiennych z sufiksem, np. WIKIDARIAH_CONSUMER_TOKEN_2,
+        w razie ich braku używane są poświadczenia domyślne
+    """
+    env_path = Path(".") / ".env"
+    load_dotenv(dotenv_path=env_path)
+
+    result = []
+    for name in CREDENTIALS:
+        value = None
+        if shard is not None:
+            value = os.environ.get(f'{name}_{shard}')
+        result.append(value if value else os.environ.get(name))
+
+    return tuple(result)
+
+
+def login(shard:int = None) -> tuple:
+    """ zalogowanie do instancji wikibase, zwraca (login, WikibaseIntegrator) """
+    consumer_token, consumer_secret, access_token, access_secret = credentials(shard)
+    login_instance = wbi_login.OAuth1(consumer_token=consumer_token,
+                                      consumer_secret=consumer_secret,
+                                      access_token=access_token,
+                                      access_secret=access_secret)
+
+    return login_instance, WikibaseIntegrator(login=login_instance)
+
+
+def time_from_string(value:str, prop: str, ref:list=None, qlf_list:list=None) -> Time:
+    """ przekształca datę (RRRR-MM-DD, także z 00, XX, .. lub uu) na time oczekiwany przez wikibase """
+
+    if value == 'somevalue':
+        return Time(prop_nr=prop, time=None, snaktype=WikibaseSnakType.UNKNOWN_VALUE,
+                    references=ref, qualifiers=qlf_list)
+
+    if len(value) == 10 and value.endswith('XX'):
+        value = value.replace('XX','00')
+
+    year = value[:4]
+    month = value[5:7]
+    day = value[8:]
+
+    if year.endswith('..') or year.endswith('uu') or year.endswith('XX'):
+        year = year.replace('..','01').replace('uu','01').replace('XX','01')
+        month = '01'
+        day = '01'
+        precision = WikibaseDatePrecision.CENTURY
+    else:
+        precision = WikibaseDatePrecision.YEAR
+        if day != '00':
+            precision = WikibaseDatePrecision.DAY
+        elif day == '00' and month != '00':
+            precision = WikibaseDatePrecision.MONTH
+            day = '01'
+        else:
+            day = month = '01'
+
+    format_time =  f'+{year}-{month}-{day}T00:00:00Z'
+
+    return Time(prop_nr=prop, time=format_time, precision=precision,
+                references=ref, qualifiers=qlf_list)
+
+
+def _snak_key(snak) -> tuple:
+    """ porównywalna postać wartości (snak): właściwość, rodzaj, wartość """
+    return (snak.property_number, snak.snaktype.value,
+            json.dumps(snak.datavalue, sort_keys=True, ensure_ascii=False))
+
+
+def claim_key(claim) -> tuple:
+    """ porównywalna postać deklaracji: wartość główna i kwalifikatory (bez referencji) """
+    return (_snak_key(claim.mainsnak), tuple(sorted(_snak_key(x) for x in claim.qualifiers)))
+
+
+def reference_key(reference) -> tuple:
+    """ porównywalna postać referencji (bez skrótu hash nadawanego przez wikibase) """
+    return tuple(sorted(_snak_key(x) for x in reference))
+
+
+def merge_claim(wb_item, statement) -> bool:
+    """ idempotentne dodanie deklaracji: jeżeli element ma już deklarację o tej samej
+        wartości i kwalifikatorach, uzupełniane są tylko brakujące referencje, w przeciwnym
+        razie deklaracja jest dopisywana, zwraca True, jeżeli element został zmieniony
+    """
+    key = claim_key(statement)
+    for claim in wb_item.claims.claims.get(statement.mainsnak.property_number, []):
+        if claim.removed or claim_key(claim) != key:
+            continue
+        known = {reference_key(x) for x in claim.references}
+        changed = False
+        for reference in statement.references:
+            if reference_key(reference) not in known:
+                claim.references.add(reference)
+                known.add(reference_key(reference))
+                changed = True
+        return changed
+
+    wb_item.claims.add([statement], action_if_exists=ActionIfExists.FORCE_APPEND)
+    return True
+
+
+def write_item(wb_item, login_object:wbi_login.OAuth1, logger_object:Logger):
+    """ zapis elementu do wikibase (z ponowieniem), zwraca zapisany element,
+        błąd, którego nie można ponowić, jest zgłaszany dalej (MWApiError)
+    """
+    loop_num = 1
+    while True:
+        try:
+            return wb_item.write()
+        except MWApiError as wb_error:
+            err_code = wb_error.code
+            err_message = wb_error.messages
+            logger_object.error(f'ERROR: {err_code}, {err_message}')
+
+            # jeżeli jest to problem z tokenem to próba odświeżenia tokena i powtórzenie
+            # zapisu, ale tylko raz, w razie powtórnego błędu bad token rekord jest błędny
+            if err_code in ['assertuserfailed', 'badtoken']:
+                if loop_num == 1:
+                    logger_object.error('błąd "badtoken", odświeżenie poświadczenia...')
+                    login_object.generate_edit_credentials()
+                    loop_num += 1
+                    counters['retries'] += 1
+                    continue
+            # jeżeli błąd zapisu to druga próba po 5 sekundach
+            elif err_code in ['failed-save']:
+                if loop_num == 1:
+                    logger_object.error('błąd zapisu, czekam 5 sekund...')
+                    time.sleep(5.0)
+                    loop_num += 1
+                    counters['retries'] += 1
+                    continue
+
+            raise
+
+
+# błędy całego importu (logowanie, połączenie, blokada zapisu) - import jest przerywany,
+# rekord nie trafia do pliku błędnych rekordów
+SYSTEMIC_ERRORS = (LoginError, ConnectionError, RequestsConnectionError, Timeout)
+SYSTEMIC_CODES = ('assertuserfailed', 'badtoken', 'readonly', 'blocked', 'permissiondenied',
+                  'mwoauth-invalid-authorization')
+
+
+def is_systemic(error:Exception) -> bool:
+    """ czy błąd dotyczy całego importu, a nie pojedynczego rekordu """
+    if isinstance(error, SYSTEMIC_ERRORS):
+        return True
+    return isinstance(error, MWApiError) and error.code in SYSTEMIC_CODES
+
+
+def error_code(error:Exception) -> str:
+    """ kod błędu rekordu: kod API wikibase lub nazwa wyjątku """
+    if isinstance(error, MWApiError) and error.code:
+        return error.code
+    return type(error).__name__
+
+
+class RecordBuilder:
+    """ bazowa klasa rekordu importu, klasy pochodne (Autor, Postac) budują element wikibase """
+
+    # lista rekordów w pliku json, domyślne ścieżki plików i nazwa logu
+    records_key = ''
+    default_input = None
+    default_output = None
+    default_journal = None
+    log_name = 'psb_import'
+
+    # pamięć podręczna wyników wyszukiwania elementów
+    search_cache = SearchCache()
+    # indeks unikalności par etykieta-opis (UniquenessIndex)
+    unique_index = None
+    # właściwość i QID klasy elementów wczytywanych do indeksu unikalności
+    unique_instance_of = None
+    # pola rekordu, których zmiana wymaga ponownego importu (--incremental)
+    hash_fields = ()
+    # wyniki wyszukiwania grupowego (NameLookup, --group-lookup)
+    lookup = None
+
+    def __init__(self, record:dict, logger_object:Logger,
+                 login_object:wbi_login.OAuth1, wbi_object: WikibaseIntegrator) -> None:
+        self.identyfikator = record['ID']
+        self.name = record['name']
+        # identyfikator wikibase QID (np. z poprzedniego importu lub uzgodnienia)
+        self.qid = record.get('QID', '')
+
+        # pola techniczne
+        self.wb_item = None                # element
+        self.logger = logger_object        # logi
+        self.login_instance = login_object # login instance
+        self.wbi = wbi_object              # WikibaseIntegratorObject
+        self.matched = None                # wynik dopasowania (match)
+        self.prefetched_item = None        # element do aktualizacji pobrany z wyprzedzeniem
+
+    @classmethod
+    def add_arguments(cls, parser:argparse.ArgumentParser):
+        """ dodatkowe parametry wywołania specyficzne dla rodzaju rekordów """
+
+    @classmethod
+    def configure(cls, params, logger_object:Logger):
+        """ przygotowanie przed importem (np. wczytanie indeksów) """
+
+    @classmethod
+    def unique_keys(cls, record:dict) -> list:
+        """ pary (język, etykieta, opis) elementu, które muszą być unikalne w wikibase """
+        return []
+
+    @classmethod
+    def has_unique_keys(cls) -> bool:
+        """ czy klasa rekordów definiuje pary etykieta-opis wymagające unikalności """
+        return cls.unique_keys.__func__ is not RecordBuilder.unique_keys.__func__
+
+    @classmethod
+    def disambiguate(cls, record:dict, language:str):
+        """ zmiana opisu rekordu kolidującego z innym rekordem partii """
+
+    def appears_in_wikibase(self) -> bool:
+        """ wyszukiwanie elementu w wikibase, ustala self.qid """
+        raise NotImplementedError
+
+    def match(self) -> bool:
+        """ czy element jest już w wikibase (znany QID lub wyszukanie) """
+        if self.matched is None:
+            self.matched = bool(self.qid) or self.appears_in_wikibase()
+        return self.matched
+
+    def prefetch(self):
+        """ odczyty z wikibase wykonywane z wyprzedzeniem w wątku potoku (--lookahead):
+            dopasowanie i pobranie elementu do aktualizacji
+        """
+        if self.match():
+            self.prefetched_item = self.wbi.item.get(entity_id=self.qid)
+
+    def prefetch_keys(self) -> list:
+        """ teksty wyszukiwane podczas odczytów z wyprzedzeniem """
+        return [self.name]
+
+    def get_item(self, qid:str):
+        """ element do aktualizacji (pobrany z wyprzedzeniem lub z wikibase) """
+        item = self.prefetched_item
+        self.prefetched_item = None
+        if item is not None and item.id == qid:
+            return item
+        return self.wbi.item.get(entity_id=qid)
+
+    def build(self, update_qid:str = None):
+        """ przygotowuje nowy element lub aktualizację istniejącego """
+        raise NotImplementedError
+
+    def search_labels(self) -> list:
+        """ etykiety i aliasy zapisywanego elementu (do unieważnienia wyników wyszukiwania) """
+        return [self.name]
+
+    def write_item(self):
+        """ zapis danych do wikibase """
+        new_id = write_item(self.wb_item, self.login_instance, self.logger)
+        self.qid = new_id.id
+
+        # nowa lub zmieniona etykieta może zmienić wyniki wyszukiwania
+        self.search_cache.invalidate(self.search_labels())
+        if self.lookup is not None:
+            self.lookup.invalidate(self.search_labels())
+
+
+class ImportEngine:
+    """ przebieg importu rekordów jednego rodzaju """
+
+    def __init__(self, builder_class, params, logger_object:Logger,
+                 login_object:wbi_login.OAuth1 = None, wbi_object:WikibaseIntegrator = None) -> None:
+        self.builder_class = builder_class
+        self.params = params
+        self.logger = logger_object
+        self.login_instance = login_object
+        self.wbi = wbi_object
+        self.shard_mode = params.shards > 1
+        self.json_data = None
+        self.journal = journal_path(params.journal, params.shard if self.shard_mode else None)
+        self.write = WIKIBASE_WRITE and not params.dry_run
+        # magazyn roboczy SQLite (rekordy, QID, stan, skróty, błędy) zamiast plików pośrednich
+        self.store = WorkingStore(params.store) if params.store else None
+        # tryb oszczędzania pamięci: rekordy czytane strumieniowo, zachowywane są tylko pary ID -> QID
+        self.low_memory = params.low_memory
+        self.qids = {}
+        self.monitor = None
+        if params.memory_report:
+            self.monitor = MemoryMonitor(logger_object, every=params.memory_report, trace=params.tracemalloc)
+        # import przyrostowy: skróty pól rekordów z poprzednich importów
+        self.hash_path = None
+        self.record_hashes = {}
+        if params.incremental:
+            self.hash_path = journal_path(params.journal.with_name(f'{builder_class.log_name}_hashes.csv'),
+                                          params.shard if self.shard_mode else None)
+        # plik błędnych rekordów (json lines), import jest kontynuowany po błędzie rekordu
+        failed_path = params.failed or params.journal.with_name(f'{builder_class.log_name}_failed.jsonl')
+        self.failed_path = journal_path(failed_path, params.shard if self.shard_mode else None)
+        self.failed = 0
+        # kolejne rekordy z tym samym kodem błędu (przerwanie importu po --max-failures)
+        self.failure_code = ''
+        self.failure_streak = 0
+        # lista ponawianych rekordów (--retry-failed), po zakończeniu importu zmiana na .prev
+        self.retry_path = None
+        # liczniki gałęzi analizy dat (DateBDF, date_from_bn)
+        self.branches_path = None
+        if params.branch_stats:
+            psb_branches.enable()
+            self.branches_path = journal_path(params.journal.with_name(f'{builder_class.log_name}_branches.json'),
+                                              params.shard if self.shard_mode else None)
+        # odczyty z wyprzedzeniem dla kolejnych rekordów podczas zapisu bieżącego
+        self.lookahead = None
+        if params.lookahead:
+            self.lookahead = Lookahead(self.prefetch, depth=params.lookahead, workers=params.lookahead_workers)
+        self.progress = None
+        # profilowanie (cProfile, opcjonalnie tracemalloc), osobne pliki dla każdej partii
+        self.profiler = None
+        if params.profile:
+            name = builder_class.log_name
+            if self.shard_mode:
+                name += f'_{params.shard:02d}'
+            self.profiler = Profiler(params.profile, name, every=params.profile_every,
+                                     memory=params.profile_memory)
+
+    def read(self):
+        """ odczyt rekordów (partii rekordów), zwraca listę (indeks, rekord),
+            w trybie oszczędzania pamięci generator
+        """
+        if self.store:
+            return self.read_store()
+
+        if self.low_memory:
+            key = self.builder_class.records_key
+            if self.shard_mode:
+                selected = iter_shard(self.params.input, key, self.params.shard, self.params.shards,
+                                      self.params.shard_by)
+            else:
+                selected = enumerate(iter_json_records(self.params.input, key))
+            return ((i, record) for i, record in selected if i >= self.params.start)
+
+        with open(self.params.input, "r", encoding='utf-8') as f:
+            self.json_data = json.load(f)
+
+        records = self.json_data[self.builder_class.records_key]
+        if self.shard_mode:
+            selected = select_shard(records, self.params.shard, self.params.shards, self.params.shard_by)
+        else:
+            selected = enumerate(records)
+
+        # przetwarzanie partiami
+        return [(i, record) for i, record in selected if i >= self.params.start]
+
+    def read_store(self):
+        """ odczyt rekordów z magazynu roboczego (--store), pusty magazyn jest najpierw
+            wypełniany rekordami z pliku wejściowego
+        """
+        key = self.builder_class.records_key
+        if not self.store.count(key):
+            counter = self.store.import_json(self.params.input, key)
+            self.logger.info(f'Magazyn {self.store.path}: wczytano rekordy z {self.params.input}: {counter}')
+
+        selected = self.store.iter_records(key, self.params.start)
+        if self.shard_mode:
+            assignment = assign_shards([{'ID': x} for x in self.store.ids(key)],
+                                       self.params.shards, self.params.shard_by)
+            selected = ((i, record) for i, record in selected if assignment[i] == self.params.shard)
+
+        if self.low_memory:
+            return selected
+        return list(selected)
+
+    def failed_only(self, records):
+        """ ponowienie tylko rekordów z pliku błędnych rekordów (--retry-failed), lista ponawianych
+            rekordów przenoszona jest do pliku .retry (po zakończeniu importu .prev), ponownie
+            błędne rekordy trafiają do nowego pliku, przerwane ponowienie można uruchomić jeszcze raz
+        """
+        self.retry_path = self.failed_path.with_name(self.failed_path.name + '.retry')
+        if self.failed_path.exists():
+            # po przerwanym ponowieniu plik .retry już istnieje - wpisy są dopisywane
+            with open(self.failed_path, 'r', encoding='utf-8') as f_in, \
+                 open(self.retry_path, 'a', encoding='utf-8') as f_out:
+                for line in f_in:
+                    f_out.write(line)
+            os.remove(self.failed_path)
+        ids = {entry['ID'] for entry in iter_failed(self.retry_path)}
+        self.logger.info(f'Ponowienie rekordów z błędami ({self.retry_path}): {len(ids)}')
+
+        if self.low_memory:
+            return ((i, record) for i, record in records if record.get('ID', '') in ids)
+        return [(i, record) for i, record in records if record.get('ID', '') in ids]
+
+    def changed(self, records):
+        """ import przyrostowy: pomija rekordy, których istotne pola nie zmieniły się od
+            poprzedniego importu (QID z pliku skrótów trafia do pliku wynikowego i do dziennika,
+            z którego korzystają tryby --shards i --workers)
+        """
+        # skróty ze wszystkich partii - podział na partie mógł się zmienić
+        base = self.params.journal.with_name(f'{self.builder_class.log_name}_hashes.csv')
+        paths = [base] + sorted(base.parent.glob(f'{base.stem}_*{base.suffix}'))
+        known = read_hashes(paths)
+        if self.store:
+            known.update(self.store.hashes(self.builder_class.records_key))
+        self.logger.info(f'Skróty rekordów z poprzednich importów: {len(known)}')
+
+        skipped = 0
+
+        def selected():
+            nonlocal skipped
+            for i, record in records:
+                hash_value = record_hash(record, self.builder_class.hash_fields)
+                qid, known_hash = known.get(record.get('ID', ''), ('', ''))
+                if known_hash == hash_value:
+                    record['QID'] = qid
+                    if self.low_memory:
+                        self.qids[record['ID']] = qid
+                    if qid:
+                        append_journal(self.journal, record['ID'], qid, 'bez zmian')
+                    skipped += 1
+                    continue
+                self.record_hashes[record['ID']] = hash_value
+                yield i, record
+            self.logger.info(f'Rekordy bez zmian (pominięte): {skipped}')
+
+        if self.low_memory:
+            return selected()
+        return list(selected())
+
+    def prepare(self, records):
+        """ przygotowanie przed przetwarzaniem rekordów """
+        # wyniki wyszukiwania zapisywane pomiędzy uruchomieniami (osobny plik dla każdej partii)
+        if self.params.search_cache:
+            self.builder_class.search_cache = SearchCache(
+                path=journal_path(self.params.search_cache, self.params.shard if self.shard_mode else None))
+
+        # uzgodnienie z wikibase wg identyfikatorów zewnętrznych, rekordy z QID są tylko uzupełniane
+        if self.params.reconcile and self.low_memory:
+            self.logger.warning('Tryb --low-memory: pominięto --reconcile (psb_import.py prepare --reconcile)')
+        elif self.params.reconcile:
+            reconciled = reconcile([record for _, record in records], self.logger)
+            self.logger.info(f'Uzgodniono wg identyfikatorów: {reconciled}')
+
+        # indeks unikalności etykieta-opis: wczytanie z wikibase i kolizje w partii rekordów
+        if self.params.unique_index and not self.builder_class.has_unique_keys():
+            self.logger.info('Indeks unikalności etykieta-opis: pominięty (brak par do sprawdzenia)')
+        elif self.params.unique_index:
+            unique_index = UniquenessIndex()
+            counter = unique_index.load_from_wikibase(instance_of=self.builder_class.unique_instance_of)
+            self.builder_class.unique_index = unique_index
+            self.logger.info(f'Indeks unikalności etykieta-opis: {counter}')
+            if self.low_memory:
+                self.logger.warning('Tryb --low-memory: pominięto wykrywanie kolizji w partii rekordów')
+            else:
+                changed = resolve_collisions([record for _, record in records], self.builder_class,
+                                             unique_index, self.logger)
+                self.logger.info(f'Rekordy ze zmienionym opisem: {changed}')
+
+        # jedno wyszukiwanie i zbiorcze pobranie kandydatów dla każdej nazwy (rekordy bez QID)
+        if self.params.group_lookup and self.low_memory:
+            self.logger.warning('Tryb --low-memory: pominięto --group-lookup')
+        elif self.params.group_lookup:
+            lookup = NameLookup()
+            lookup.prefetch((record['name'] for _, record in records if not record.get('QID')),
+                            self.builder_class.search_cache, self.logger)
+            self.builder_class.lookup = lookup
+
+        self.builder_class.configure(self.params, self.logger)
+
+    def validate(self, records):
+        """ kontrola rekordów przed zapisem: rekordy z błędami (bieżąca kontrola --validate
+            lub wcześniejsza z pliku kwarantanny) są pomijane
+        """
+        key = self.builder_class.records_key
+        quarantine_path = self.params.quarantine
+        if not quarantine_path:
+            quarantine_path = self.params.journal.with_name(f'{self.builder_class.log_name}_quarantine.json')
+        quarantine_path = journal_path(quarantine_path, self.params.shard if self.shard_mode else None)
+
+        if self.params.validate and self.low_memory:
+            self.logger.warning('Tryb --low-memory: pominięto --validate (psb_import.py validate --quarantine)')
+            rejected = read_quarantine(quarantine_path, key) if self.params.quarantine else set()
+        elif self.params.validate:
+            errors = validate_records([record for _, record in records], key)
+            counts = write_report(errors, [record for _, record in records],
+                                  quarantine_path.with_name(f'{quarantine_path.stem}_report.json'),
+                                  quarantine_path, key)
+            for code, count in counts.items():
+                self.logger.info(f'Kontrola danych: {code}: {count}')
+            rejected = set(errors)
+            if self.store:
+                self.store.clear_errors(key)
+                self.store.add_errors(key, errors)
+                for identyfikator in rejected:
+                    self.store.set_status(key, identyfikator, 'quarantine')
+        else:
+            rejected = read_quarantine(quarantine_path, key) if self.params.quarantine else set()
+
+        if rejected:
+            self.logger.info(f'Rekordy pominięte (kwarantanna {quarantine_path}): {len(rejected)}')
+
+        if self.low_memory:
+            return ((i, record) for i, record in records if record.get('ID', '') not in rejected)
+        return [(i, record) for i, record in records if record.get('ID', '') not in rejected]
+
+    def new_builder(self, record:dict) -> RecordBuilder:
+        """ builder rekordu """
+        return self.builder_class(record, logger_object=self.logger,
+                                  login_object=self.login_instance, wbi_object=self.wbi)
+
+    def prefetch(self, record:dict) -> RecordBuilder:
+        """ builder rekordu po odczytach z wikibase (wykonywane w wątku potoku) """
+        builder = self.new_builder(record)
+        builder.prefetch()
+        return builder
+
+    def process(self, i:int, record:dict, builder:RecordBuilder = None) -> str:
+        """ dopasowanie, budowa i zapis elementu dla jednego rekordu, zwraca wykonaną akcję,
+            builder - z wynikami odczytów z wyprzedzeniem (--lookahead)
+        """
+        start = time.perf_counter()
+        if builder is None:
+            builder = self.new_builder(record)
+
+        # jeżeli nie ma elementu w wikibase
+        if not builder.match():
+            action = 'dodano'
+            builder.build()
+            if self.write:
+                builder.write_item()
+            else:
+                builder.qid = DRY_RUN_QID
+        # jeżeli jest to próba uzupełnienia danych
+        else:
+            action = 'aktualizacja'
+            builder.build(update_qid=builder.qid)
+            if self.write:
+                builder.write_item()
+
+        self.record(i, record, builder, action, time.perf_counter() - start)
+
+        # zapisany element nie jest już potrzebny
+        builder.wb_item = None
+
+        return action
+
+    def process_record(self, i:int, record:dict, task=None) -> str:
+        """ przetworzenie rekordu, błąd rekordu nie przerywa importu,
+            task - zadanie odczytów z wyprzedzeniem (Lookahead.run)
+        """
+        try:
+            builder = self.lookahead.builder(task) if task else None
+            action = self.process(i, record, builder)
+        except Exception as error:
+            if is_systemic(error):
+                self.logger.error(f'({i}) ERROR: import przerwany: {error_code(error)}, {error}')
+                raise
+            action = self.fail(i, record, error)
+            if self.params.max_failures and self.failure_streak >= self.params.max_failures:
+                self.logger.error(f'ERROR: import przerwany, kolejne rekordy z błędem '
+                                  f'{self.failure_code}: {self.failure_streak}')
+                raise
+            return action
+
+        self.failure_code = ''
+        self.failure_streak = 0
+        return action
+
+    def fail(self, i:int, record:dict, error:Exception) -> str:
+        """ rejestracja błędnego rekordu (kod błędu, opis, traceback, rekord) w pliku
+            błędnych rekordów, zwraca akcję 'błąd'
+        """
+        identyfikator = record.get('ID', '')
+        code = error_code(error)
+        self.failed += 1
+        self.failure_streak = self.failure_streak + 1 if code == self.failure_code else 1
+        self.failure_code = code
+        self.logger.error(f'({i}) ERROR: rekord {identyfikator} pominięty: {code}, {error}',
+                          extra={'index': i, 'record_id': identyfikator, 'error_code': code})
+        append_failed(self.failed_path, {'ID': identyfikator,
+                                         'index': i,
+                                         'code': code,
+                                         'message': str(error),
+                                         'traceback': traceback.format_exc(),
+                                         'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                         'record': record})
+        if self.store:
+            key = self.builder_class.records_key
+            self.store.add_errors(key, {identyfikator: [(code, str(error))]})
+            self.store.set_status(key, identyfikator, 'failed')
+
+        return 'błąd'
+
+    def record(self, i:int, record:dict, builder:RecordBuilder, action:str, latency:float = None):
+        """ rejestracja wyniku: QID w rekordzie, dziennik, log,
+            latency - czas przetwarzania rekordu (s)
+        """
+        record['QID'] = builder.qid
+        if self.low_memory:
+            self.qids[builder.identyfikator] = builder.qid
+
+        # utworzony lub zaktualizowany element zajmuje swoje pary etykieta-opis
+        if self.builder_class.unique_index is not None and self.write:
+            for language, label, description in self.builder_class.unique_keys(record):
+                self.builder_class.unique_index.add(language, label, description, builder.qid)
+
+        # zapis do pliku tekstowego w razie przerwania skryptu - do uzupełnienia w pliku
+        # wejściowym przed ponownym uruchomieniem skryptu!
+        append_journal(self.journal, builder.identyfikator, builder.qid, action)
+        # zapis może zmienić wyniki odczytów wykonanych z wyprzedzeniem
+        if self.lookahead and self.write:
+            self.lookahead.written(builder.search_labels(), builder.qid)
+        # w trybie testowym magazyn nie otrzymuje QID (kolejny import traktowałby rekord jako zapisany)
+        if self.store and self.write:
+            self.store.set_qid(self.builder_class.records_key, builder.identyfikator, builder.qid, action)
+        # skrót zapisywany tylko po rzeczywistym zapisie do wikibase
+        if self.hash_path and self.write:
+            hash_value = self.record_hashes.pop(builder.identyfikator, '')
+            if self.store:
+                self.store.set_hash(self.builder_class.records_key, builder.identyfikator, builder.qid,
+                                    hash_value)
+            else:
+                append_hash(self.hash_path, builder.identyfikator, builder.qid, hash_value)
+
+        if action == 'dodano':
+            message = f'({i}) Dodano element: # [{WIKIBASE_URL}/wiki/Item:{builder.qid} {builder.name}]'
+        else:
+            message = f'({i}) Element istnieje: # [{WIKIBASE_URL}/wiki/Item:{builder.qid} {builder.name}]'
+        self.logger.info(message, extra={'index': i,
+                                         'record_id': builder.identyfikator,
+                                         'qid': builder.qid,
+                                         'action': action,
+                                         'latency': round(latency, 3) if latency is not None else None})
+
+    def finish(self):
+        """ zapis wyników po przetworzeniu rekordów """
+        # zapis pliku json z identyfikatorami wikibase (QID), w trybie partii plik wynikowy
+        # powstaje dopiero po scaleniu dzienników (--merge)
+        if not self.shard_mode:
+            if self.store:
+                self.store.export_json(self.params.output, self.builder_class.records_key)
+            elif self.low_memory:
+                write_with_qids(self.params.input, self.params.output, self.qids,
+                                self.builder_class.records_key)
+            else:
+                with open(self.params.output, 'w', encoding='utf-8') as f:
+                    json.dump(self.json_data, f, indent=4, ensure_ascii=False)
+
+        self.builder_class.search_cache.save()
+        self.logger.info(f'Pamięć podręczna: {self.builder_class.search_cache.stats()}')
+        if self.lookahead:
+            self.logger.info(f'Potok: {self.lookahead.stats()}')
+        if self.branches_path:
+            data = psb_branches.dump(self.branches_path)
+            self.logger.info(f'Gałęzie analizy dat ({self.branches_path}):\n{psb_branches.format_summary(data)}')
+        if self.failed:
+            self.logger.warning(f'Rekordy z błędami: {self.failed} ({self.failed_path}, '
+                                f'ponowienie: psb_import.py retry-failed)')
+        # ponowienie zakończone - lista ponawianych rekordów zachowywana jako .prev
+        if self.retry_path and self.retry_path.exists():
+            os.replace(self.retry_path, self.failed_path.with_name(self.failed_path.name + '.prev'))
+        if self.store:
+            self.store.close()
+        if self.monitor:
+            self.monitor.stop()
+        if self.progress:
+            self.progress.close()
+            self.logger.removeHandler(self.progress.errors)
+
+    def start_progress(self, total:int = None):
+        """ postęp importu w terminalu (--progress) i w pliku json (--status-file) """
+        status_path = None
+        if self.params.status_file:
+            status_path = journal_path(self.params.status_file, self.params.shard if self.shard_mode else None)
+        self.progress = Progress(total, self.builder_class.search_cache, terminal=self.params.progress,
+                                 status_path=status_path)
+        self.logger.addHandler(self.progress.errors)
+
+    def load(self):
+        """ odczyt i przygotowanie rekordów: ponowienie błędnych, walidacja, import przyrostowy,
+            zwraca listę (indeks, rekord), w trybie oszczędzania pamięci generator
+        """
+        records = self.read()
+        if self.params.retry_failed:
+            records = self.failed_only(records)
+        records = self.validate(records)
+        if self.params.incremental:
+            records = self.changed(records)
+        self.prepare(records)
+
+        return records
+
+    def process_all(self, records, total:int = None, done=None):
+        """ przetwarzanie rekordów (indeks, rekord): postęp, odczyty z wyprzedzeniem, monitor
+            pamięci i profil, records może być generatorem (np. rekordy zwalniane przez
+            harmonogram), done - funkcja wywoływana z rekordem po jego przetworzeniu
+        """
+        if total is None and isinstance(records, list):
+            total = len(records)
+        if self.params.progress or self.params.status_file:
+            self.start_progress(total)
+        if self.lookahead:
+            items = self.lookahead.run(records)
+        else:
+            items = ((i, record, None) for i, record in records)
+        for i, record, task in items:
+            if self.progress:
+                self.progress.begin()
+            action = self.process_record(i, record, task)
+            if done:
+                done(record)
+            if self.progress:
+                self.progress.update(action)
+            if self.monitor:
+                self.monitor.step()
+            if self.profiler:
+                self.profiler.step()
+
+    def run(self, records=None, total:int = None, done=None):
+        """ import: odczyt, przygotowanie, przetwarzanie rekordów, zapis wyników,
+            records - rekordy już wczytane i przygotowane (load), np. przez harmonogram
+        """
+        if self.profiler:
+            self.profiler.start()
+        if records is None:
+            records = self.load()
+        self.process_all(records, total, done)
+        self.finish()
+        if self.profiler:
+            path = self.profiler.stop()
+            self.logger.info(f'Profil importu: {path} (psb_import.py profile-summary {path})')
+
+
+def parse_args(builder_class, description:str, argv:list = None):
+    """ parametry wywołania skryptu importu (argv - domyślnie parametry wiersza poleceń) """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--input', type=Path, default=builder_class.default_input,
+                        help='plik json z danymi')
+    # plik json z danymi uzupełnionymi o identyfikatory wikibase (QID), stanie się nową wersją
+    # pliku wejściowego i ułatwi późniejsze uzupełnianie danych w wikibase (uwaga: wersje
+    # dla wiki testowej i produkcyjnej będą miały inne identyfikatory)
+    parser.add_argument('--output', type=Path, default=builder_class.default_output,
+                        help='plik json z danymi uzupełnionymi o QID')
+    # plik tymczasowy do zapisu identyfikatorów QID w razie przerwania skryptu (brak prądu,
+    # problemy sieciowe itp.), na jego podstawie można uzupełnić dane w pliku wejściowym
+    parser.add_argument('--journal', type=Path, default=builder_class.default_journal,
+                        help='dziennik ID@QID (dla partii z sufiksem numeru partii)')
+    parser.add_argument('--start', type=int, default=0,
+                        help='indeks pierwszego przetwarzanego rekordu (przetwarzanie partiami)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='bez zapisu do wikibase (test)')
+    parser.add_argument('--search-cache', type=Path, default=None,
+                        help='plik json do zapisu wyników wyszukiwania pomiędzy uruchomieniami')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='wstępne uzgodnienie rekordów z wikibase wg VIAF, PLWABN ID, Wikidata ID')
+    parser.add_argument('--unique-index', action='store_true',
+                        help='lokalny indeks unikalności etykieta-opis (wczytany z wikibase)')
+    parser.add_argument('--group-lookup', action='store_true',
+                        help='wstępne wyszukiwanie: jedno na nazwę, zbiorcze pobranie kandydatów (wbgetentities)')
+    parser.add_argument('--lookahead', type=int, default=0,
+                        help='odczyty z wyprzedzeniem (wyszukiwanie, autorzy, pobranie elementu) '
+                             'dla wskazanej liczby kolejnych rekordów podczas zapisu bieżącego')
+    parser.add_argument('--lookahead-workers', type=int, default=4,
+                        help='liczba wątków odczytów z wyprzedzeniem')
+    parser.add_argument('--validate', action='store_true',
+                        help='kontrola rekordów przed importem, rekordy z błędami trafiają do kwarantanny')
+    parser.add_argument('--quarantine', type=Path, default=None,
+                        help='plik kwarantanny (rekordy pomijane w imporcie)')
+    parser.add_argument('--failed', type=Path, default=None,
+                        help='plik błędnych rekordów (json lines), domyślnie [log]_failed.jsonl obok dziennika')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='ponowienie tylko rekordów z pliku błędnych rekordów')
+    parser.add_argument('--max-failures', type=int, default=10,
+                        help='przerwanie importu po tylu kolejnych rekordach z tym samym kodem błędu (0 - bez limitu)')
+    parser.add_argument('--shards', type=int, default=1, help='liczba partii danych')
+    parser.add_argument('--shard', type=int, default=None, help='numer przetwarzanej partii (od 0)')
+    parser.add_argument('--shard-by', choices=['range', 'hash'], default='range',
+                        help='podział na partie: zakresy identyfikatorów (PSB-01-*) lub suma kontrolna')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='uruchomienie wskazanej liczby procesów, każdy dla własnej partii, '
+                             'a następnie scalenie dzienników')
+    parser.add_argument('--merge', action='store_true',
+                        help='tylko scalenie dzienników partii w plik wynikowy')
+    parser.add_argument('--incremental', action='store_true',
+                        help='import przyrostowy: tylko rekordy nowe lub zmienione od poprzedniego importu')
+    parser.add_argument('--progress', action='store_true',
+                        help='postęp importu w terminalu (tempo, przewidywany czas zakończenia), '
+                             'w konsoli tylko ostrzeżenia i błędy')
+    parser.add_argument('--status-file', type=Path, default=None,
+                        help='plik json ze stanem importu zapisywany co 10 s (dla partii z sufiksem)')
+    parser.add_argument('--cassette', type=Path, default=None,
+                        help='kaseta z ruchem HTTP (json lines, gzip) do powtarzalnych testów wydajności')
+    parser.add_argument('--cassette-mode', choices=['record', 'replay'], default='replay',
+                        help='nagrywanie ruchu prawdziwego importu lub odtwarzanie z kasety')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='symulowane opóźnienie odpowiedzi przy odtwarzaniu (s), '
+                             'wartość ujemna - czas odpowiedzi zapisany w kasecie')
+    parser.add_argument('--store', type=Path, default=None,
+                        help='magazyn roboczy SQLite (rekordy, QID, stan, skróty, błędy), '
+                             'przy pierwszym użyciu wypełniany danymi z --input')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='tryb oszczędzania pamięci: strumieniowy odczyt i zapis rekordów')
+    parser.add_argument('--memory-report', type=int, default=0,
+                        help='raport zużycia pamięci (RSS) w logu co wskazaną liczbę rekordów')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='raport pamięci z największymi alokacjami (tracemalloc, spowalnia import)')
+    parser.add_argument('--branch-stats', action='store_true',
+                        help='liczniki i czas gałęzi analizy dat (DateBDF, date_from_bn), '
+                             'podsumowanie w [log]_branches.json obok dziennika')
+    parser.add_argument('--profile', type=Path, default=None,
+                        help='katalog na wyniki profilowania (cProfile, pliki pstats, '
+                             'tylko wątek główny, bez wątków --lookahead)')
+    parser.add_argument('--profile-every', type=int, default=1000,
+                        help='zapis wyników profilowania co wskazaną liczbę rekordów')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='profilowanie także pamięci (różnice migawek tracemalloc)')
+    builder_class.add_arguments(parser)
+
+    params = parser.parse_args(argv)
+    if params.workers:
+        params.shards = params.workers
+    if params.shards > 1 and params.shard is None and not params.merge:
+        parser.error('w trybie partii wymagany jest numer partii (--shard) lub --workers')
+
+    return params
+
+
+def worker_arguments(argv:list) -> list:
+    """ parametry wywołania skryptu bez parametru --workers (dla procesów partii) """
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == '--workers':
+            skip = True
+        elif not arg.startswith('--workers='):
+            result.append(arg)
+
+    return result
+
+
+def run_workers(params, script:str, argv:list) -> int:
+    """ uruchamia params.workers procesów importu, każdy dla własnej partii danych,
+        czeka na ich zakończenie, zwraca liczbę procesów zakończonych błędem
+    """
+    processes = []
+    for shard in range(params.workers):
+        command = [sys.executable, str(Path(script).resolve())] + worker_arguments(argv)
+        command += ['--shards', str(params.workers), '--shard', str(shard)]
+        processes.append(subprocess.Popen(command))
+
+    return sum(1 for process in processes if process.wait() != 0)
+
+
+def elapsed(start_time:float) -> str:
+    """ komunikat o czasie wykonania programu """
+    elapsed_time = time.time() - start_time
+    return f'Czas wykonania programu: {time.strftime("%H:%M:%S", time.gmtime(elapsed_time))} s.'
+
+
+def main(builder_class, description:str, script:str, argv:list = None):
+    """ uruchomienie importu rekordów (lub procesów partii i scalenia dzienników),
+        script - skrypt importu uruchamiany w procesach partii
+    """
+    # pomiar czasu wykonania
+    start_time = time.time()
+
+    if argv is None:
+        argv = sys.argv[1:]
+    params = parse_args(builder_class, description, argv)
+    shard_mode = params.shards > 1
+
+    # tworzenie obiektu loggera, każdy proces partii ma własny log
+    if shard_mode and params.shard is not None:
+        file_log = Path('..') / 'log' / f'{builder_class.log_name}_{params.shard:02d}.log'
+    else:
+        file_log = Path('..') / 'log' / f'{builder_class.log_name}.log'
+    # wiersz postępu zamiast komunikatów o kolejnych rekordach (pełny log w pliku)
+    logger = set_logger(file_log, name=builder_class.log_name,
+                        console_level=logging.WARNING if params.progress else logging.INFO)
+
+    # tryb wieloprocesowy: uruchomienie procesów dla partii i scalenie wyników
+    if params.workers or params.merge:
+        key = builder_class.records_key
+        store = WorkingStore(params.store) if params.store else None
+        # magazyn wypełniany przed uruchomieniem procesów partii
+        if store and not store.count(key):
+            counter = store.import_json(params.input, key)
+            logger.info(f'Magazyn {store.path}: wczytano rekordy z {params.input}: {counter}')
+        if params.workers:
+            logger.info(f'POCZĄTEK IMPORTU, liczba procesów: {params.workers}')
+            failed = run_workers(params, script, argv)
+            if failed:
+                logger.error(f'ERROR: liczba procesów zakończonych błędem: {failed}')
+        if store:
+            store.export_json(params.output, key)
+            logger.info(f'Zapisano rekordy z magazynu {store.path}, rekordy z QID: {len(store.qids(key))}')
+            store.close()
+        else:
+            journals = [journal_path(params.journal, shard) for shard in range(params.shards)]
+            counter = merge_journals(params.input, params.output, journals, key=key)
+            logger.info(f'Scalono dzienniki partii ({params.shards}), rekordy z QID: {counter}')
+        logger.info(elapsed(start_time))
+        return
+
+    logger.info('POCZĄTEK IMPORTU')
+
+    # nagrywanie lub odtwarzanie ruchu HTTP (osobna kaseta dla każdej partii)
+    cassette = None
+    if params.cassette:
+        cassette = Cassette(journal_path(params.cassette, params.shard if shard_mode else None),
+                            mode=params.cassette_mode, latency=params.latency)
+        cassette.install()
+        if params.cassette_mode == 'replay':
+            # poświadczenia nie są sprawdzane, zapytania OAuth pochodzą z kasety
+            for name in CREDENTIALS:
+                os.environ.setdefault(name, 'replay')
+
+    try:
+        configure_wbi()
+        login_instance, wbi = login(params.shard if shard_mode else None)
+
+        engine = ImportEngine(builder_class, params, logger, login_instance, wbi)
+        engine.run()
+    finally:
+        if cassette:
+            cassette.uninstall()
+            logger.info(cassette.stats())
+
+    logger.info(elapsed(start_time))
@@ -0,0 +1,344 @@
+""" psb_import - wspólny punkt wejścia narzędzi importu PSB do wikibase
+
+    python psb_import.py validate     --input ../data/postacie.json
+    python psb_import.py parse-dates  --input ../data/postacie.json
+    python psb_import.py prepare      --input ../data/postacie.json --journal ../data/tmp_qid_list.csv
+    python psb_import.py upload persons [parametry psb_postacie.py]
+    python psb_import.py upload all --authors "[parametry]" --persons "[parametry]"
+    python psb_import.py retry-failed persons [parametry psb_postacie.py]
+    python psb_import.py report       --input ../data/postacie_qid.json
+    python psb_import.py verify       --input ../data/postacie_qid.json --journal ../data/tmp_qid_list.csv
+    python psb_import.py generate     --persons 100000 --output-dir ../data/synth
+    python psb_import.py profile-summary ../log/profile/psb_postacie_0001000.pstats
+    python psb_import.py store-import --store ../data/import.db --input ../data/postacie.json
+    python psb_import.py store-export --store ../data/import.db --output ../data/postacie_qid.json
+
+    uwaga: moduły sieciowe (WikibaseIntegrator, requests, dotenv) są importowane tylko
+    przez polecenia, które ich wymagają (upload, prepare --reconcile), polecenia lokalne
+    działają bez poświadczeń
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+
+def cmd_validate(args) -> int:
+    """ kontrola rekordów przed importem: raport błędów i plik kwarantanny """
+    from psb_io import iter_json_records
+    from psb_validate import validate_records, write_report
+
+    records = list(iter_json_records(args.input, args.key))
+    errors = validate_records(records, args.key, workers=args.workers)
+
+    # rekordy bez identyfikatora lub z powtórzonym identyfikatorem
+    seen = set()
+    for record in records:
+        identyfikator = record.get('ID', '')
+        if not identyfikator or identyfikator in seen:
+            print(f'ERROR: brak lub powtórzony identyfikator: "{identyfikator}" {record.get("name", "")}')
+            errors.setdefault(identyfikator, []).append(('bad-id', 'brak lub powtórzony identyfikator'))
+        seen.add(identyfikator)
+
+    counts = write_report(errors, records, args.report, args.quarantine, args.key)
+    for code, count in counts.items():
+        print(f'{code}: {count}')
+    print(f'Rekordy: {len(records)}, odrzucone: {len(errors)}')
+
+    return 1 if errors else 0
+
+
+def cmd_parse_dates(args) -> int:
+    """ analiza lat życia przez DateBDF (bez tworzenia deklaracji wikibase) """
+    from psbtools import years_to_dates
+    from psb_io import iter_json_records
+    import psb_branches
+
+    if args.branch_stats:
+        psb_branches.enable()
+
+    if args.text:
+        values = [('', x) for x in args.text]
+    else:
+        values = ((record.get('ID', ''), record.get('years', ''))
+                  for record in iter_json_records(args.input, args.key))
+
+    for identyfikator, years in values:
+        years = years.replace('(', '').replace(')', '').strip()
+        for date in years_to_dates(years):
+            if not date:
+                continue
+            flags = [name for name, value in vars(date).items() if value is True]
+            if not args.branch_stats:
+                print('\t'.join([identyfikator, years, date.type, date.date, date.date_2, ','.join(flags)]))
+
+    if args.branch_stats:
+        print(psb_branches.format_summary())
+
+    return 0
+
+
+def cmd_prepare(args) -> int:
+    """ przygotowanie danych wejściowych: uzupełnienie QID z dzienników i (opcjonalnie)
+        uzgodnienie z wikibase wg identyfikatorów zewnętrznych
+    """
+    from psb_io import read_journal
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        json_data = json.load(f)
+    records = json_data[args.key]
+
+    qids = {}
+    for path in args.journal:
+        qids.update(read_journal(path))
+    counter = 0
+    for record in records:
+        qid = qids.get(record['ID'])
+        if qid:
+            record['QID'] = qid
+            counter += 1
+    print(f'QID z dzienników: {counter}')
+
+    if args.reconcile:
+        import logging
+        from psb_engine import configure_wbi
+        from psb_reconcile import reconcile
+
+        configure_wbi()
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+        reconciled = reconcile(records, logging.getLogger('psb_import'))
+        print(f'Uzgodniono wg identyfikatorów: {reconciled}')
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(json_data, f, indent=4, ensure_ascii=False)
+
+    return 0
+
+
+def cmd_upload(args) -> int:
+    """ import do wikibase (psb_autorzy.py, psb_postacie.py lub oba równocześnie) """
+    if args.kind == 'all':
+        import psb_scheduler
+        return psb_scheduler.main(args.engine_args)
+    if args.kind == 'authors':
+        import psb_autorzy
+        from psb_engine import main
+        main(psb_autorzy.Autor, 'Import autorów biogramów PSB do wikibase',
+             psb_autorzy.__file__, args.engine_args)
+    else:
+        import psb_postacie
+        from psb_engine import main
+        main(psb_postacie.Postac, 'Import postaci PSB do wikibase',
+             psb_postacie.__file__, args.engine_args)
+
+    return 0
+
+
+def cmd_retry_failed(args) -> int:
+    """ ponowienie importu tylko rekordów z pliku błędnych rekordów (*_failed.jsonl) """
+    args.engine_args = args.engine_args + ['--retry-failed']
+
+    return cmd_upload(args)
+
+
+def cmd_report(args) -> int:
+    """ eksport wyników importu do arkusza xlsx """
+    import psb_raport
+
+    rows_count = psb_raport.main(args)
+    print(f'Zapisano {rows_count} wierszy do {args.output}')
+
+    return 0
+
+
+def cmd_verify(args) -> int:
+    """ weryfikacja QID po imporcie: istnienie elementów, etykiety, deklaracje, identyfikatory """
+    from psb_io import iter_json_records, read_journal
+    from psb_engine import configure_wbi
+    from psb_verify import verify_records, write_verify_report, discrepancies
+
+    configure_wbi()
+    journal = {}
+    if args.store:
+        from psb_store import WorkingStore
+
+        store = WorkingStore(args.store)
+        records = [record for _, record in store.iter_records(args.key)]
+        store.close()
+    else:
+        records = list(iter_json_records(args.input, args.key))
+    for path in args.journal:
+        journal.update(read_journal(path))
+
+    checked, errors = verify_records(records, args.key, journal, workers=args.workers)
+    counts = write_verify_report(args.report, len(records), checked, errors)
+    for code, count in counts.items():
+        print(f'{code}: {count}')
+    failed = discrepancies(errors)
+    print(f'Rekordy: {len(records)}, sprawdzone: {checked}, z rozbieżnościami: {len(failed)} ({args.report})')
+
+    return 1 if failed else 0
+
+
+def cmd_store_import(args) -> int:
+    """ wczytanie pliku json (np. postacie.json, autorzy_qid.json) do magazynu roboczego """
+    from psb_io import read_journal
+    from psb_store import WorkingStore
+
+    store = WorkingStore(args.store)
+    counter = store.import_json(args.input, args.key)
+    print(f'Wczytano rekordy: {counter} ({args.store})')
+
+    # QID z dzienników poprzednich importów
+    qids = {}
+    for path in args.journal:
+        qids.update(read_journal(path))
+    store.set_qids(args.key, qids)
+    if qids:
+        print(f'QID z dzienników: {len(qids)}')
+    store.close()
+
+    return 0
+
+
+def cmd_store_export(args) -> int:
+    """ zapis rekordów z QID z magazynu roboczego do pliku json """
+    from psb_store import WorkingStore
+
+    store = WorkingStore(args.store)
+    counter = store.export_json(args.output, args.key)
+    qids_count = len(store.qids(args.key))
+    statuses = store.statuses(args.key)
+    store.close()
+    print(f'Zapisano rekordy: {counter}, z QID: {qids_count} ({args.output})')
+    for status, count in sorted(statuses.items()):
+        print(f'{status}: {count}')
+
+    return 0
+
+
+def cmd_generate(args) -> int:
+    """ syntetyczne dane PSB (postacie.json, autorzy.json) do testów skali i obciążenia """
+    from psb_synth import generate
+
+    persons_count, authors_count = generate(args.output_dir, persons=args.persons, authors=args.authors,
+                                            collisions=args.collisions, seed=args.seed)
+    print(f'Zapisano postacie: {persons_count}, autorzy: {authors_count} ({args.output_dir})')
+
+    return 0
+
+
+def cmd_profile_summary(args) -> int:
+    """ najbardziej kosztowne funkcje z pliku pstats (upload ... --profile) """
+    from psb_profile import summarize
+
+    print(summarize(args.path, top=args.top, sort=args.sort))
+
+    return 0
+
+
+def parse_args(argv:list = None):
+    """ parametry wywołania """
+    parser = argparse.ArgumentParser(prog='psb_import', description='Import danych PSB do wikibase')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_input(subparser, default='postacie.json'):
+        subparser.add_argument('--input', type=Path, default=Path("..") / "data" / default,
+                               help='plik json z danymi')
+        subparser.add_argument('--key', default='persons', choices=['persons', 'authors'],
+                               help='lista rekordów w pliku json')
+
+    sub = subparsers.add_parser('validate', help='kontrola danych wejściowych')
+    add_input(sub)
+    sub.add_argument('--report', type=Path, default=None, help='plik json z raportem błędów')
+    sub.add_argument('--quarantine', type=Path, default=None,
+                     help='plik json z rekordami odrzuconymi (pomijanymi w imporcie: --quarantine)')
+    sub.add_argument('--workers', type=int, default=None, help='liczba procesów kontroli')
+    sub.set_defaults(func=cmd_validate)
+
+    sub = subparsers.add_parser('parse-dates', help='analiza lat życia (DateBDF)')
+    add_input(sub)
+    sub.add_argument('--text', nargs='*', default=None, help='analiza podanych tekstów zamiast pliku')
+    sub.add_argument('--branch-stats', action='store_true',
+                     help='zamiast wyników analizy liczniki i czas gałęzi DateBDF')
+    sub.set_defaults(func=cmd_parse_dates)
+
+    sub = subparsers.add_parser('prepare', help='uzupełnienie danych o QID przed importem')
+    add_input(sub)
+    sub.add_argument('--journal', type=Path, nargs='*', default=[], help='dzienniki ID@QID')
+    sub.add_argument('--reconcile', action='store_true',
+                     help='uzgodnienie z wikibase wg VIAF, PLWABN ID, Wikidata ID (SPARQL)')
+    sub.add_argument('--output', type=Path, required=True, help='plik json wynikowy')
+    sub.set_defaults(func=cmd_prepare)
+
+    sub = subparsers.add_parser('upload', help='import do wikibase')
+    sub.add_argument('kind', choices=['persons', 'authors', 'all'],
+                     help='rodzaj rekordów (all - autorzy i postacie równocześnie, psb_scheduler.py)')
+    sub.add_argument('engine_args', nargs=argparse.REMAINDER,
+                     help='parametry skryptu importu (np. --workers 4 --reconcile)')
+    sub.set_defaults(func=cmd_upload)
+
+    sub = subparsers.add_parser('retry-failed', help='ponowienie importu rekordów z błędami')
+    sub.add_argument('kind', choices=['persons', 'authors'], help='rodzaj rekordów')
+    sub.add_argument('engine_args', nargs=argparse.REMAINDER,
+                     help='parametry skryptu importu (np. --failed ../data/psb_postacie_failed.jsonl)')
+    sub.set_defaults(func=cmd_retry_failed)
+
+    sub = subparsers.add_parser('report', help='raport wyników importu (xlsx)')
+    add_input(sub, 'postacie_qid.json')
+    sub.add_argument('--journal', type=Path, nargs='*', default=[], help='dzienniki ID@QID@akcja')
+    sub.add_argument('--autorzy', type=Path, default=None,
+                     help='plik autorzy_qid.json do wskazania nierozpoznanych autorów')
+    sub.add_argument('--output', type=Path, default=Path("..") / "data" / "raport.xlsx",
+                     help='plik xlsx z raportem')
+    sub.add_argument('--store', type=Path, default=None,
+                     help='magazyn roboczy SQLite (rekordy, QID i akcje zamiast --input i --journal)')
+    sub.set_defaults(func=cmd_report)
+
+    sub = subparsers.add_parser('verify', help='weryfikacja QID po imporcie (wbgetentities)')
+    add_input(sub, 'postacie_qid.json')
+    sub.add_argument('--journal', type=Path, nargs='*', default=[], help='dzienniki ID@QID')
+    sub.add_argument('--report', type=Path, default=Path("..") / "data" / "weryfikacja.json",
+                     help='plik json z raportem rozbieżności')
+    sub.add_argument('--workers', type=int, default=4, help='liczba równoczesnych zapytań')
+    sub.add_argument('--store', type=Path, default=None,
+                     help='magazyn roboczy SQLite (rekordy z QID zamiast --input)')
+    sub.set_defaults(func=cmd_verify)
+
+    sub = subparsers.add_parser('store-import', help='wczytanie pliku json do magazynu roboczego (SQLite)')
+    add_input(sub)
+    sub.add_argument('--store', type=Path, required=True, help='plik bazy SQLite')
+    sub.add_argument('--journal', type=Path, nargs='*', default=[], help='dzienniki ID@QID')
+    sub.set_defaults(func=cmd_store_import)
+
+    sub = subparsers.add_parser('store-export', help='zapis rekordów z QID z magazynu roboczego do pliku json')
+    sub.add_argument('--store', type=Path, required=True, help='plik bazy SQLite')
+    sub.add_argument('--key', default='persons', choices=['persons', 'authors'],
+                     help='lista rekordów w pliku json')
+    sub.add_argument('--output', type=Path, required=True, help='plik json wynikowy')
+    sub.set_defaults(func=cmd_store_export)
+
+    sub = subparsers.add_parser('generate', help='syntetyczne dane PSB do testów skali')
+    sub.add_argument('--persons', type=int, default=10000, help='liczba postaci')
+    sub.add_argument('--authors', type=int, default=None, help='liczba autorów (domyślnie 1/8 liczby postaci)')
+    sub.add_argument('--collisions', type=float, default=0.03,
+                     help='udział postaci z powtórzoną nazwą innej postaci')
+    sub.add_argument('--seed', type=int, default=1, help='ziarno generatora (powtarzalne dane)')
+    sub.add_argument('--output-dir', type=Path, default=Path("..") / "data" / "synth",
+                     help='katalog na pliki postacie.json i autorzy.json')
+    sub.set_defaults(func=cmd_generate)
+
+    sub = subparsers.add_parser('profile-summary', help='podsumowanie profilu importu (pstats)')
+    sub.add_argument('path', type=Path, help='plik pstats')
+    sub.add_argument('--top', type=int, default=25, help='liczba funkcji')
+    sub.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'],
+                     help='kolejność: czas łączny, czas własny, liczba wywołań')
+    sub.set_defaults(func=cmd_profile_summary)
+
+    return parser.parse_args(argv)
+
+
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    params = parse_args()
+    sys.exit(params.func(params))
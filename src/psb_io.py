@@ -0,0 +1,246 @@
+""" moduł: pliki pośrednie importu - dzienniki QID, podział danych na partie (shardy) """
+import re
+import json
+import zlib
+import hashlib
+from pathlib import Path
+
+# QID nadawany rekordom w trybie testowym (--dry-run), nie trafia do plików wynikowych
+DRY_RUN_QID = 'TEST'
+
+
+def iter_json_records(path:Path, key:str = 'persons', chunk_size:int = 1 << 20):
+    """ generator zwracający kolejne rekordy z listy key pliku json (np. postacie.json)
+        bez wczytywania całego pliku do pamięci
+    """
+    decoder = json.JSONDecoder()
+    start_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+    separator = re.compile(r'[\s,]*')
+
+    with open(path, 'r', encoding='utf-8') as f:
+        # wyszukanie początku listy rekordów
+        buffer = ''
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            match = start_pattern.search(buffer)
+            if match:
+                pos = match.end()
+                break
+            if not chunk:
+                raise ValueError(f'brak listy "{key}" w pliku {path}')
+            buffer = buffer[-(len(key) + 64):]
+
+        while True:
+            pos = separator.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield record
+            pos = end
+
+
+def record_prefix(identyfikator:str) -> str:
+    """ prefiks identyfikatora rekordu, np. PSB-01-0001 -> PSB-01 """
+    pos = identyfikator.rfind('-')
+    if pos == -1:
+        return identyfikator
+    return identyfikator[:pos]
+
+
+def assign_shards(records:list, shards:int, mode:str = 'range') -> list:
+    """ przypisuje każdemu rekordowi numer partii (od 0 do shards-1)
+        range - ciągłe zakresy identyfikatorów (np. PSB-01-*, PSB-02-*), zrównoważone
+                liczbą rekordów, hash - suma kontrolna identyfikatora
+    """
+    if shards < 1:
+        raise ValueError(f'nieprawidłowa liczba partii: {shards}')
+
+    if mode == 'hash':
+        return [zlib.crc32(record['ID'].encode('utf-8')) % shards for record in records]
+
+    if mode != 'range':
+        raise ValueError(f'nieznany sposób podziału na partie: {mode}')
+
+    # liczba rekordów dla każdego prefiksu, prefiksy w kolejności sortowania
+    counts = {}
+    for record in records:
+        prefix = record_prefix(record['ID'])
+        counts[prefix] = counts.get(prefix, 0) + 1
+
+    # prefiksy przydzielane kolejno do partii, tak by każda miała ok. total/shards rekordów
+    total = len(records)
+    prefix_shard = {}
+    shard = cumulative = 0
+    for prefix in sorted(counts):
+        if shard < shards - 1 and cumulative >= total * (shard + 1) / shards:
+            shard += 1
+        prefix_shard[prefix] = shard
+        cumulative += counts[prefix]
+
+    return [prefix_shard[record_prefix(record['ID'])] for record in records]
+
+
+def select_shard(records:list, shard:int, shards:int, mode:str = 'range'):
+    """ generator zwracający (indeks, rekord) dla rekordów należących do partii shard """
+    assignment = assign_shards(records, shards, mode)
+    for i, record in enumerate(records):
+        if assignment[i] == shard:
+            yield i, record
+
+
+def iter_shard(path:Path, key:str, shard:int, shards:int, mode:str = 'range'):
+    """ generator zwracający (indeks, rekord) dla rekordów partii shard wprost z pliku json,
+        podział ustalany jest w pierwszym przebiegu na podstawie samych identyfikatorów
+    """
+    ids = [{'ID': record['ID']} for record in iter_json_records(path, key)]
+    assignment = assign_shards(ids, shards, mode)
+    del ids
+    for i, record in enumerate(iter_json_records(path, key)):
+        if assignment[i] == shard:
+            yield i, record
+
+
+def journal_path(base_path:Path, shard:int = None) -> Path:
+    """ ścieżka do dziennika QID, dla partii: tmp_qid_list_02.csv """
+    base_path = Path(base_path)
+    if shard is None:
+        return base_path
+    return base_path.with_name(f'{base_path.stem}_{shard:02d}{base_path.suffix}')
+
+
+def append_journal(path:Path, identyfikator:str, qid:str, action:str = ''):
+    """ dopisuje do dziennika linię w formacie ID@QID lub ID@QID@akcja """
+    line = f'{identyfikator}@{qid}@{action}' if action else f'{identyfikator}@{qid}'
+    with open(path, 'a', encoding='utf-8') as f_tmp:
+        f_tmp.write(line + '\n')
+
+
+def iter_journal(path:Path):
+    """ generator zwracający (ID, QID, akcja) z dziennika, akcja może być pusta """
+    path = Path(path)
+    if not path.exists():
+        return
+
+    with open(path, 'r', encoding='utf-8') as f_tmp:
+        for line in f_tmp:
+            line = line.strip()
+            if not line or '@' not in line:
+                continue
+            fields = line.split('@')
+            action = fields[2] if len(fields) > 2 else ''
+            yield fields[0], fields[1], action
+
+
+def read_journal(path:Path) -> dict:
+    """ wczytuje dziennik ID@QID, zwraca słownik ID -> QID (późniejszy wpis wygrywa),
+        pomija QID z trybu testowego
+    """
+    result = {}
+    for identyfikator, qid, _ in iter_journal(path):
+        if qid and qid != DRY_RUN_QID:
+            result[identyfikator] = qid
+
+    return result
+
+
+def append_failed(path:Path, entry:dict):
+    """ dopisuje do pliku błędnych rekordów (json lines) wpis: ID, kod błędu, opis,
+        traceback i rekord
+    """
+    with open(path, 'a', encoding='utf-8') as f_tmp:
+        f_tmp.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def iter_failed(path:Path):
+    """ generator zwracający wpisy z pliku błędnych rekordów """
+    path = Path(path)
+    if not path.exists():
+        return
+
+    with open(path, 'r', encoding='utf-8') as f_tmp:
+        for line in f_tmp:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def record_hash(record:dict, fields:tuple) -> str:
+    """ stabilny skrót pól rekordu istotnych dla importu (niezależny od kolejności kluczy) """
+    data = {field: record.get(field) for field in fields}
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def append_hash(path:Path, identyfikator:str, qid:str, hash_value:str):
+    """ dopisuje do pliku skrótów linię w formacie ID@QID@skrót """
+    with open(path, 'a', encoding='utf-8') as f_hash:
+        f_hash.write(f'{identyfikator}@{qid}@{hash_value}\n')
+
+
+def read_hashes(paths:list) -> dict:
+    """ wczytuje pliki skrótów ID@QID@skrót, zwraca słownik ID -> (QID, skrót),
+        późniejszy wpis wygrywa
+    """
+    result = {}
+    for path in paths:
+        for identyfikator, qid, hash_value in iter_journal(path):
+            if qid and hash_value:
+                result[identyfikator] = (qid, hash_value)
+
+    return result
+
+
+def write_json_records(path:Path, key:str, records) -> int:
+    """ zapis rekordów (także z generatora) jako {key: [rekordy]} w formacie json.dump(indent=4),
+        bez budowania całej struktury w pamięci, zwraca liczbę zapisanych rekordów
+    """
+    counter = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n    ' + json.dumps(key) + ': [')
+        for record in records:
+            text = json.dumps(record, indent=4, ensure_ascii=False).replace('\n', '\n        ')
+            f.write((',\n        ' if counter else '\n        ') + text)
+            counter += 1
+        f.write('\n    ]\n}' if counter else ']\n}')
+
+    return counter
+
+
+def write_with_qids(input_path:Path, output_path:Path, qids:dict, key:str = 'persons') -> int:
+    """ zapisuje rekordy z input_path uzupełnione o QID ze słownika ID -> QID w output_path
+        (strumieniowo), zwraca liczbę rekordów uzupełnionych o QID
+    """
+    counter = 0
+
+    def records_with_qid():
+        nonlocal counter
+        for record in iter_json_records(input_path, key):
+            qid = qids.get(record['ID'])
+            if qid:
+                record['QID'] = qid
+                counter += 1
+            yield record
+
+    write_json_records(output_path, key, records_with_qid())
+
+    return counter
+
+
+def merge_journals(input_path:Path, output_path:Path, journal_paths:list, key:str = 'persons') -> int:
+    """ uzupełnia dane z input_path o QID z dzienników i zapisuje wynik w output_path,
+        zwraca liczbę rekordów uzupełnionych o QID
+    """
+    qids = {}
+    for path in journal_paths:
+        qids.update(read_journal(path))
+
+    return write_with_qids(input_path, output_path, qids, key)
@@ -0,0 +1,108 @@
+""" moduł: logowanie importu w tle - logger przekazuje komunikaty do kolejki (QueueHandler),
+    zapis do konsoli i pliku wykonuje osobny wątek (QueueListener), pętla importu nie czeka
+    na operacje wejścia-wyjścia
+
+    plik logu: wiersze json (czas, poziom, komunikat oraz pola rekordu: ID, QID, akcja,
+    czas przetwarzania, kod błędu), rotacja po przekroczeniu rozmiaru z kompresją gzip
+    starszych plików
+"""
+import os
+import gzip
+import json
+import queue
+import atexit
+import shutil
+import logging
+import logging.handlers
+from logging import Logger
+from pathlib import Path
+
+# pola rekordu przekazywane w komunikatach (extra={...}) i zapisywane w pliku json
+STRUCTURED_FIELDS = ('index', 'record_id', 'qid', 'action', 'latency', 'error_code')
+
+# rotacja pliku logu: maksymalny rozmiar (bajty) i liczba zachowanych plików
+MAX_BYTES = 50 * 1024 * 1024
+BACKUP_COUNT = 10
+
+# aktywne wątki zapisu: nazwa loggera -> QueueListener
+_listeners = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """ komunikat jako wiersz json z polami rekordu """
+
+    def format(self, record):
+        entry = {'time': self.formatTime(record, '%Y-%m-%d %H:%M:%S'),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'message': record.getMessage()}
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _gzip_namer(name:str) -> str:
+    """ nazwa pliku po rotacji, np. psb_postacie.log.1.gz """
+    return name + '.gz'
+
+
+def _gzip_rotator(source:str, dest:str):
+    """ kompresja pliku po rotacji """
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def stop_logging(name:str):
+    """ zakończenie wątku zapisu loggera (zapis komunikatów pozostałych w kolejce) """
+    listener = _listeners.pop(name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def _stop_all():
+    for name in list(_listeners):
+        stop_logging(name)
+
+
+atexit.register(_stop_all)
+
+
+def set_logger(path:Path, name:str = 'psb_import', console_level:int = logging.INFO,
+               max_bytes:int = MAX_BYTES, backup_count:int = BACKUP_COUNT) -> Logger:
+    """ utworzenie loggera z zapisem w tle: konsola (tekst) i plik (wiersze json),
+        ponowne wywołanie dla tej samej nazwy zastępuje poprzednią konfigurację
+    """
+    logger_object = logging.getLogger(name)
+    stop_logging(name)
+    for handler in [x for x in logger_object.handlers if isinstance(x, logging.handlers.QueueHandler)]:
+        logger_object.removeHandler(handler)
+    logger_object.setLevel(logging.INFO)
+    logger_object.propagate = False
+
+    # log w konsoli
+    c_handler = logging.StreamHandler()
+    c_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    c_handler.setLevel(console_level)
+
+    # zapis logów do pliku (json), starsze pliki kompresowane
+    f_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                     encoding='utf-8')
+    f_handler.namer = _gzip_namer
+    f_handler.rotator = _gzip_rotator
+    f_handler.setFormatter(JsonFormatter())
+    f_handler.setLevel(logging.INFO)
+
+    log_queue = queue.SimpleQueue()
+    logger_object.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, c_handler, f_handler, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+
+    return logger_object
@@ -0,0 +1,88 @@
+""" moduł: wstępne wyszukiwanie elementów dla grup rekordów o tej samej nazwie
+    jedno wyszukiwanie na znormalizowaną nazwę i zbiorcze pobranie etykiet i opisów
+    kandydatów (wbgetentities, do 50 elementów w zapytaniu), decyzja o dopasowaniu
+    rekordu podejmowana jest lokalnie przez builder
+"""
+from logging import Logger
+from wikibaseintegrator import wbi_helpers
+from psb_cache import SearchCache, normalize_search
+
+# maksymalna liczba elementów w jednym zapytaniu wbgetentities
+CHUNK_SIZE = 50
+
+
+def fetch_entities(qids:list, props:str = 'labels|descriptions', languages:str = 'pl|en',
+                   chunk_size:int = CHUNK_SIZE) -> dict:
+    """ zbiorcze pobranie danych elementów, zwraca słownik QID -> dane elementu (json),
+        elementy nieistniejące są pomijane
+    """
+    result = {}
+    qids = sorted(set(qids))
+    for pos in range(0, len(qids), chunk_size):
+        chunk = qids[pos:pos + chunk_size]
+        data = {'action': 'wbgetentities',
+                'ids': '|'.join(chunk),
+                'props': props,
+                'languages': languages,
+                'format': 'json'}
+        response = wbi_helpers.mediawiki_api_call_helper(data=data, allow_anonymous=True)
+        for qid, entity in response.get('entities', {}).items():
+            if 'missing' not in entity:
+                result[qid] = entity
+
+    return result
+
+
+def entity_text(entity:dict, field:str, language:str = 'pl') -> str:
+    """ etykieta lub opis elementu w danym języku (pusty tekst w razie braku) """
+    return entity.get(field, {}).get(language, {}).get('value', '')
+
+
+class NameLookup:
+    """ wyniki wyszukiwania i dane kandydatów dla znormalizowanych nazw rekordów """
+
+    def __init__(self) -> None:
+        self.groups = {}     # znormalizowana nazwa -> lista QID kandydatów
+        self.entities = {}   # QID -> (etykieta pl, opis pl)
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __contains__(self, name:str) -> bool:
+        return normalize_search(name) in self.groups
+
+    def prefetch(self, names, search_cache:SearchCache, logger_object:Logger = None) -> int:
+        """ wyszukiwanie dla każdej nazwy (raz na grupę) i zbiorcze pobranie kandydatów,
+            zwraca liczbę grup
+        """
+        names_count = 0
+        for name in names:
+            names_count += 1
+            key = normalize_search(name)
+            if key and key not in self.groups:
+                self.groups[key] = search_cache.search(search_string=name, language='pl', search_type='item')
+
+        qids = {qid for items in self.groups.values() for qid in items if qid not in self.entities}
+        for qid, entity in fetch_entities(list(qids)).items():
+            self.entities[qid] = (entity_text(entity, 'labels'), entity_text(entity, 'descriptions'))
+
+        if logger_object:
+            logger_object.info(f'Wyszukiwanie grupowe: rekordy: {names_count}, nazwy: {len(self.groups)}, '
+                               f'kandydaci: {len(self.entities)}')
+
+        return len(self.groups)
+
+    def candidates(self, name:str) -> list:
+        """ kandydaci dla nazwy: lista (QID, etykieta pl, opis pl) w kolejności wyszukiwania """
+        return [(qid,) + self.entities[qid]
+                for qid in self.groups.get(normalize_search(name), []) if qid in self.entities]
+
+    def invalidate(self, labels:list):
+        """ usunięcie grup, których wyniki mógł zmienić zapis elementu o podanych etykietach
+            (jak w SearchCache.invalidate - wyszukiwarka dopasowuje także początek etykiety),
+            kolejne rekordy tych grup są wyszukiwane zwykłym trybem
+        """
+        labels = [normalize_search(x) for x in labels if x]
+        to_remove = [key for key in self.groups if any(x.startswith(key) for x in labels)]
+        for key in to_remove:
+            del self.groups[key]
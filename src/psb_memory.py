@@ -0,0 +1,55 @@
+""" moduł: kontrola zużycia pamięci podczas importu (RSS, tracemalloc) """
+import os
+import resource
+import tracemalloc
+from logging import Logger
+
+
+def current_rss_mb() -> float:
+    """ bieżące zużycie pamięci procesu (RSS) w MB, 0.0 gdy niedostępne """
+    try:
+        with open('/proc/self/statm', 'r', encoding='utf-8') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    """ maksymalne zużycie pamięci procesu (RSS) w MB (Linux: ru_maxrss w KB) """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryMonitor:
+    """ okresowy raport zużycia pamięci co every rekordów """
+
+    def __init__(self, logger_object:Logger, every:int = 1000, trace:bool = False, top:int = 10) -> None:
+        self.logger = logger_object
+        self.every = every
+        self.trace = trace
+        self.top = top
+        self.counter = 0
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def step(self):
+        """ wywoływane po każdym rekordzie """
+        self.counter += 1
+        if self.every and self.counter % self.every == 0:
+            self.report()
+
+    def report(self):
+        """ zapis w logu: RSS bieżący i maksymalny, największe alokacje (tracemalloc) """
+        self.logger.info(f'Pamięć ({self.counter} rekordów): RSS {current_rss_mb():.1f} MB, '
+                         f'maks. RSS {max(peak_rss_mb(), current_rss_mb()):.1f} MB')
+        if self.trace:
+            snapshot = tracemalloc.take_snapshot()
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                self.logger.info(f'  {stat.size / 1024:.1f} KB, {stat.count} bloków: {stat.traceback[0]}')
+
+    def stop(self):
+        """ raport końcowy i zakończenie śledzenia alokacji """
+        self.report()
+        if self.trace:
+            tracemalloc.stop()
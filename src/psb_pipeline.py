@@ -0,0 +1,73 @@
+""" moduł: odczyty z wyprzedzeniem (--lookahead) - dla kolejnych K rekordów wyszukiwanie
+    elementu, autorów i pobranie elementu do aktualizacji wykonywane są w tle (pula wątków),
+    gdy bieżący rekord jest zapisywany w wikibase
+
+    kolejka zadań jest ograniczona (K rekordów), wynik odczytu, na który mógł wpłynąć
+    późniejszy zapis (etykieta pasująca do wyszukiwanego tekstu lub ten sam QID), jest
+    odrzucany i rekord przetwarzany jest zwykłym trybem
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from psb_cache import normalize_search
+
+
+class Lookahead:
+    """ potok odczytów z wyprzedzeniem, prefetch - funkcja rekord -> builder po odczytach """
+
+    def __init__(self, prefetch, depth:int = 8, workers:int = 4) -> None:
+        self.prefetch = prefetch
+        self.depth = max(depth, 1)
+        self.workers = max(workers, 1)
+        self.sequence = 0          # numer ostatniego zapisu
+        self.writes = deque()      # (numer zapisu, znormalizowane etykiety, QID)
+        self.stale = 0             # odrzucone wyniki odczytów
+
+    def run(self, records):
+        """ generator zwracający (indeks, rekord, zadanie), odczyty dla co najwyżej depth
+            kolejnych rekordów wykonywane są w tle
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                for i, record in records:
+                    pending.append((i, record, (executor.submit(self.prefetch, record), self.sequence)))
+                    if len(pending) > self.depth:
+                        yield pending.popleft()
+                while pending:
+                    yield pending.popleft()
+            finally:
+                for _, _, (future, _) in pending:
+                    future.cancel()
+
+    def written(self, labels:list, qid:str):
+        """ rejestracja zapisu elementu (etykiety i aliasy, QID) """
+        self.sequence += 1
+        self.writes.append((self.sequence, [normalize_search(x) for x in labels if x], qid))
+
+    def builder(self, task):
+        """ builder z wynikami odczytów lub None, jeżeli wynik mógł zmienić późniejszy zapis,
+            błąd odczytu jest zgłaszany dalej
+        """
+        future, sequence = task
+        builder = future.result()
+        keys = [normalize_search(x) for x in builder.prefetch_keys() if x]
+        stale = False
+        for write_sequence, labels, qid in self.writes:
+            if write_sequence <= sequence:
+                continue
+            if (qid and qid == builder.qid) or any(x.startswith(key) for x in labels for key in keys):
+                stale = True
+                break
+
+        # zapisy wcześniejsze niż odczyty bieżącego rekordu nie dotyczą kolejnych rekordów
+        while self.writes and self.writes[0][0] <= sequence:
+            self.writes.popleft()
+
+        if stale:
+            self.stale += 1
+            return None
+        return builder
+
+    def stats(self) -> str:
+        """ statystyka potoku """
+        return f'odczyty z wyprzedzeniem: {self.depth} rekordów, odrzucone wyniki: {self.stale}'
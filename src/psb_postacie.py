@@ -1,47 +1,20 @@
 """ skrypt do importu postaci z PSB
     uwaga: wymaga biblioteki WikibaseIntegrator w wersji 0.12 lub nowszej
 """
-import os
-import sys
 import time
-import json
-import logging
 from logging import Logger
-import warnings
 from pathlib import Path
-from dotenv import load_dotenv
 from wikibaseintegrator import WikibaseIntegrator
-from wikibaseintegrator.wbi_config import config as wbi_config
 from wikibaseintegrator import wbi_login
 from wikibaseintegrator.datatypes import ExternalID, Time, MonolingualText, Item, URL, String
-from wikibaseintegrator import wbi_helpers
 from wikibaseintegrator.wbi_enums import WikibaseDatePrecision
-from wikibaseintegrator.wbi_exceptions import MWApiError
 from wikibaseintegrator.wbi_enums import ActionIfExists, WikibaseSnakType
-from psbtools import DateBDF
+from psbtools import years_to_dates, viaf_id
+import psb_branches
+from psb_autor_index import AutorIndex, description_years, description_has_years
+from psb_engine import RecordBuilder, time_from_string, merge_claim, main
 import roman as romenum
 
-# czy zapis do wikibase czy tylko test
-WIKIBASE_WRITE = True
-
-warnings.filterwarnings("ignore")
-
-# adresy wikibase
-wbi_config['SPARQL_ENDPOINT_URL'] = 'https://prunus-208.man.poznan.pl/bigdata/sparql'
-wbi_config['MEDIAWIKI_API_URL'] = 'https://prunus-208.man.poznan.pl/api.php'
-wbi_config['WIKIBASE_URL'] = 'https://prunus-208.man.poznan.pl'
-wbi_config['USER_AGENT'] = 'MyWikibaseBot/1.0'
-
-# login i hasło ze zmiennych środowiskowych
-env_path = Path(".") / ".env"
-load_dotenv(dotenv_path=env_path)
-
-# OAuth
-WIKIDARIAH_CONSUMER_TOKEN = os.environ.get('WIKIDARIAH_CONSUMER_TOKEN')
-WIKIDARIAH_CONSUMER_SECRET = os.environ.get('WIKIDARIAH_CONSUMER_SECRET')
-WIKIDARIAH_ACCESS_TOKEN = os.environ.get('WIKIDARIAH_ACCESS_TOKEN')
-WIKIDARIAH_ACCESS_SECRET = os.environ.get('WIKIDARIAH_ACCESS_SECRET')
-
 # właściwości w testowej instancji wikibase
 P_VIAF = 'P517'
 P_DATE_OF_BIRTH = 'P422'
@@ -80,16 +53,30 @@ DATE_BN = '+2023-02-07T00:00:00Z'
 DATE_WIKIDATA = '+2023-06-15T00:00:00Z'
 
 
-class Postac:
+class Postac(RecordBuilder):
     """ dane postaci PSB """
 
+    records_key = 'persons'
+    # realne dane
+    default_input = Path("..") / "data" / "postacie.json"
+    # dane postaci z przypisanymi identyfikatorami wikibase (QID)
+    default_output = Path("..") / "data" / "postacie_qid.json"
+    default_journal = Path("..") / "data" / "tmp_qid_list.csv"
+    log_name = 'psb_postacie'
+
+    # lokalny indeks QID autorów (AutorIndex), sprawdzany przed wyszukiwaniem w wikibase
+    autor_index = None
+    # indeks unikalności etykieta-opis tylko dla postaci (instancja: człowiek)
+    unique_instance_of = (P_INSTANCE_OF, Q_HUMAN)
+    # pola rekordu, których zmiana wymaga ponownego importu (--incremental)
+    hash_fields = ('name', 'years', 'bn_years', 'description_pl', 'description_en', 'bn_400',
+                   'date_of_birth', 'date_of_death', 'id_bn', 'id_bn_a', 'viaf', 'wikidata',
+                   'autor', 'volume', 'publ_year', 'page', 'incipit')
+
     def __init__(self, postac_dict:dict, logger_object:Logger,
                  login_object:wbi_login.OAuth1, wbi_object: WikibaseIntegrator) -> None:
+        super().__init__(postac_dict, logger_object, login_object, wbi_object)
 
-        self.identyfikator = postac_dict['ID']
-        self.name = postac_dict['name']
-        # identyfikator wikibase QID
-        self.qid = postac_dict.get('QID', '')
         # lata życia z listy BB
         self.years = postac_dict.get('years', '')
 
@@ -138,20 +125,14 @@ class Postac:
         # identyfikatory
         self.plwabn_id = str(postac_dict.get("id_bn", '')).strip()
         self.id_bn_a = str(postac_dict.get("id_bn_a", '')).strip()
-        viaf = str(postac_dict.get('viaf', '')).strip()
-        if 'https' in viaf:
-            self.viaf = viaf.replace('https://viaf.org/viaf/','').replace(r'/','')
-        else:
-            self.viaf = viaf.replace('http://viaf.org/viaf/','').replace(r'/','')
+        self.viaf = viaf_id(postac_dict.get('viaf', ''))
         self.wikidata = str(postac_dict.get("wikidata", '')).strip()
 
         # pola techniczne
-        self.wb_item = None                # element
-        self.logger = logger_object        # logi
-        self.login_instance = login_object # login instance
-        self.wbi = wbi_object              # WikibaseIntegratorObject
         self.reference_psb = None          # referencje do PSB
         self.reference_bn = None           # referencje do Biblioteki Narodowej
+        self.autor_qids = {}               # (autor, lata) -> QID, autorzy wyszukiwani raz
+        self.authors = None                # autorzy biogramu (właściwość, wartość), ustalani raz
 
         # referencja do elementu PSB (tomu?), do podpięcia dla daty urodzin i śmierci
         if self.volume and self.publ_year:
@@ -163,21 +144,33 @@ class Postac:
 
 
     def prepare_authors(self) -> list:
-        """ metoda tworzy listę autorów biogramu """
-        lista = []
-        if self.autor:
-            for item in self.autor:
+        """ metoda tworzy listę autorów biogramu (nowe deklaracje przy każdym wywołaniu,
+            autorzy wyszukiwani są tylko przy pierwszym)
+        """
+        if self.authors is None:
+            self.authors = []
+            for item in self.autor or []:
                 autor_name = item.get('autor_name','')
                 autor_years = item.get('autor_years','')
                 as_string = item.get('as_string','')
                 if as_string == '1':
-                    lista.append(String(value=autor_name, prop_nr=P_AUTHOR_STR))
+                    self.authors.append((P_AUTHOR_STR, autor_name))
                 else:
-                    autor_qid = self.find_autor(autor_name, autor_years)
+                    key = (autor_name, autor_years)
+                    if key not in self.autor_qids:
+                        self.autor_qids[key] = self.find_autor(autor_name, autor_years)
+                    autor_qid = self.autor_qids[key]
                     if autor_qid:
-                        lista.append(Item(value=autor_qid, prop_nr=P_AUTHOR))
+                        self.authors.append((P_AUTHOR, autor_qid))
                     else:
-                        print('ERROR:', autor_name, autor_years)
+                        self.logger.error(f'ERROR: nie znaleziono autora: {autor_name} {autor_years}')
+
+        lista = []
+        for prop_nr, value in self.authors:
+            if prop_nr == P_AUTHOR_STR:
+                lista.append(String(value=value, prop_nr=P_AUTHOR_STR))
+            else:
+                lista.append(Item(value=value, prop_nr=P_AUTHOR))
 
         return lista
 
@@ -221,42 +214,28 @@ class Postac:
         return result
 
 
-    def time_from_string(self, value:str, prop: str, ref:list=None, qlf_list:list=None) -> Time:
-        """ przekształca datę na time oczekiwany przez wikibase """
-
-        if value == 'somevalue':
-            return Time(prop_nr=prop, time=None, snaktype=WikibaseSnakType.UNKNOWN_VALUE,
-                        references=ref, qualifiers=qlf_list)
-
-        if len(value) == 10 and value.endswith('XX'):
-            value = value.replace('XX','00')
-
-        year = value[:4]
-        month = value[5:7]
-        day = value[8:]
-
-        if year.endswith('..') or year.endswith('uu') or year.endswith('XX'):
-            year = year.replace('..','01').replace('uu','01').replace('XX','01')
-            month = '01'
-            day = '01'
-            precision = WikibaseDatePrecision.CENTURY
-        else:
-            precision = WikibaseDatePrecision.YEAR
-            if day != '00':
-                precision = WikibaseDatePrecision.DAY
-            elif day == '00' and month != '00':
-                precision = WikibaseDatePrecision.MONTH
-                day = '01'
-            else:
-                day = month = '01'
-
-        format_time =  f'+{year}-{month}-{day}T00:00:00Z'
+    def date_from_bn(self):
+        """ daty urodzenia i śmierci z deskryptora BN (_date_from_bn), z licznikami gałęzi
+            analizy (--branch-stats)
+        """
+        if not psb_branches.enabled:
+            return self._date_from_bn([])
+
+        branches = []
+        start = time.perf_counter()
+        result = self._date_from_bn(branches)
+        # data niepusta, dla której żadna gałąź nie utworzyła deklaracji
+        if not any(x.startswith(('fl. ca', 'czynny ok.')) for x in branches):
+            for prefix in ('b:', 'd:'):
+                if not any(x.startswith(prefix) for x in branches):
+                    branches.append(prefix + 'pominięta')
+        psb_branches.record('date_from_bn', ' + '.join(branches), time.perf_counter() - start,
+                            self.bn_years, branches)
 
-        return Time(prop_nr=prop, time=format_time, precision=precision,
-                    references=ref, qualifiers=qlf_list)
+        return result
 
 
-    def date_from_bn(self):
+    def _date_from_bn(self, branches:list):
         """ metoda przetwarza lata życia z deskryptora BN na daty do pól
             date of birth, date of death
             Daty niepewne lub przybliżone w deskryptorach BN są zapisywane
@@ -276,20 +255,27 @@ class Postac:
         if len(tmp) == 1 and 'fl. ca' in self.bn_years:
             b_date = self.bn_years.replace('fl. ca','').strip()
             if len(b_date) == 5 and b_date.endswith('%'): # fl. ca 1800%
+                branches.append('fl. ca:wiek')
                 b_date[:4] += '-%%-%%'
             elif len(b_date) == 4: # fl. ca 1860
+                branches.append('fl. ca:rok')
                 b_date += '-00-00'
-            b_statement = self.time_from_string(value=b_date, prop=P_FLORUIT, ref=self.reference_bn)
+            else:
+                branches.append('fl. ca:data')
+            b_statement = time_from_string(value=b_date, prop=P_FLORUIT, ref=self.reference_bn)
             return b_statement, d_statement
 
         if 'czynny ok.' in self.bn_years:
             b_date = self.bn_years.replace('czynny ok.','').strip()
             qualifier = None
             if len(b_date) == 5 and b_date.endswith('%'): # czynny ok. 1800%
+                branches.append('czynny ok.:wiek')
                 b_date[:4] += '-%%-%%'
             elif len(b_date) == 4: # czynny ok. 1860
+                branches.append('czynny ok.:rok')
                 b_date += '-00-00'
             elif '-' in b_date: # czynny ok. 1772-1780
+                branches.append('czynny ok.:zakres')
                 tmp = b_date.split('-')
                 earliest = tmp[0].strip()
                 if len(earliest) == 4:
@@ -298,9 +284,11 @@ class Postac:
                 if len(latest) == 4:
                     latest += '-00-00'
                 b_date = 'somevalue'
-                qualifier = [self.time_from_string(value=earliest, prop=P_EARLIEST_DATE),
-                             self.time_from_string(value=latest, prop=P_LATEST_DATE)]
-            b_statement = self.time_from_string(value=b_date, prop=P_FLORUIT, ref=self.reference_bn, qlf_list=qualifier)
+                qualifier = [time_from_string(value=earliest, prop=P_EARLIEST_DATE),
+                             time_from_string(value=latest, prop=P_LATEST_DATE)]
+            else:
+                branches.append('czynny ok.:data')
+            b_statement = time_from_string(value=b_date, prop=P_FLORUIT, ref=self.reference_bn, qlf_list=qualifier)
             return b_statement, d_statement
 
         b_date = tmp[0].strip()
@@ -316,37 +304,48 @@ class Postac:
         if d_date.endswith('.?'):
             d_date = d_date.replace('.?','..')
 
-        if len(b_date) == 4 and b_date.isnumeric():
+        b_year = len(b_date) == 4 and b_date.isnumeric()
+        if b_year:
             b_date += '-00-00'
         if '??' in b_date:
             b_date = b_date.replace('??','..')
 
+        if not b_date:
+            branches.append('b:brak')
         if len(b_date) == 10  and b_date.count('-') == 2:
-            b_statement = self.time_from_string(value=b_date, prop=P_DATE_OF_BIRTH, ref=self.reference_bn)
+            branches.append('b:rok' if b_year else 'b:data')
+            b_statement = time_from_string(value=b_date, prop=P_DATE_OF_BIRTH, ref=self.reference_bn)
         else:
             if '?' in b_date or '~' in b_date or 'ca' in b_date or 'ok.' in b_date:
                 qualifier = [Item(value=Q_CIRCA, prop_nr=P_SOURCING_CIRCUMSTANCES)]
                 b_date = b_date.replace('?', '').replace('~','').replace('ca','').replace('ok.','').strip()
                 if len(b_date) == 4:
+                    branches.append('b:ok. rok')
                     b_date += '-00-00'
                 elif len(b_date) == 3:
+                    branches.append('b:ok. rok 3-cyfrowy')
                     b_date = '0' + b_date + '-00-00'
-                b_statement = self.time_from_string(value=b_date, prop=P_DATE_OF_BIRTH,
+                else:
+                    branches.append('b:ok. data')
+                b_statement = time_from_string(value=b_date, prop=P_DATE_OF_BIRTH,
                                                     ref=self.reference_bn,
                                                     qlf_list=qualifier)
             elif 'non post' not in b_date and 'nie po' not in b_date and ('po' in b_date or 'post' in b_date or 'non ante' in b_date):
+                branches.append('b:po')
                 b_date = b_date.replace('post','').replace('po','').replace('non ante','').strip()
                 if len(b_date) == 4:
                     b_date += '-00-00'
-                qualifier = [self.time_from_string(value=b_date, prop=P_EARLIEST_DATE)]
+                qualifier = [time_from_string(value=b_date, prop=P_EARLIEST_DATE)]
                 b_statement = Time(time=None, prop_nr=P_DATE_OF_BIRTH, snaktype=WikibaseSnakType.UNKNOWN_VALUE, qualifiers=qualifier)
             elif 'przed' in b_date or 'ante' in b_date or 'non post' in b_date or 'nie po' in b_date:
+                branches.append('b:przed')
                 b_date = b_date.replace('ante','').replace('przed','').replace('non post','').replace('nie po','').strip()
                 if len(b_date) == 4:
                     b_date += '-00-00'
-                qualifier = [self.time_from_string(value=b_date, prop=P_LATEST_DATE)]
+                qualifier = [time_from_string(value=b_date, prop=P_LATEST_DATE)]
                 b_statement = Time(time=None, prop_nr=P_DATE_OF_BIRTH, snaktype=WikibaseSnakType.UNKNOWN_VALUE, qualifiers=qualifier)
             elif r'/' in b_date:
+                branches.append('b:przełom')
                 tmp = b_date.split(r'/')
                 earliest = tmp[0].strip()
                 if len(earliest) == 4:
@@ -358,41 +357,52 @@ class Postac:
                     latest = earliest[:2] + latest + '-00-00'
                 elif len(latest) == 1:
                     latest = earliest[:3] + latest + '-00-00'
-                qualifier = [self.time_from_string(value=earliest, prop=P_EARLIEST_DATE),
-                             self.time_from_string(value=latest, prop=P_LATEST_DATE)]
+                qualifier = [time_from_string(value=earliest, prop=P_EARLIEST_DATE),
+                             time_from_string(value=latest, prop=P_LATEST_DATE)]
                 b_statement = Time(time=None, prop_nr=P_DATE_OF_BIRTH, snaktype=WikibaseSnakType.UNKNOWN_VALUE, qualifiers=qualifier)
 
-        if len(d_date) == 4 and d_date.isnumeric():
+        d_year = len(d_date) == 4 and d_date.isnumeric()
+        if d_year:
             d_date += '-00-00'
         if '??' in d_date:
             d_date = d_date.replace('??','..')
 
+        if not d_date:
+            branches.append('d:brak')
         if len(d_date) == 10 and d_date.count('-') == 2:
-            d_statement = self.time_from_string(value=d_date, prop=P_DATE_OF_DEATH, ref=self.reference_bn)
+            branches.append('d:rok' if d_year else 'd:data')
+            d_statement = time_from_string(value=d_date, prop=P_DATE_OF_DEATH, ref=self.reference_bn)
         else:
             if '?' in d_date or '~' in d_date or 'ca' in d_date or 'ok.' in d_date:
                 qualifier = [Item(value=Q_CIRCA, prop_nr=P_SOURCING_CIRCUMSTANCES)]
                 d_date = d_date.replace('?', '').replace('~','').replace('ca','').replace('ok.','').strip()
                 if len(d_date) == 4:
+                    branches.append('d:ok. rok')
                     d_date += '-00-00'
                 elif len(d_date) == 3:
+                    branches.append('d:ok. rok 3-cyfrowy')
                     d_date = '0' + d_date + '-00-00'
-                d_statement = self.time_from_string(value=d_date, prop=P_DATE_OF_DEATH,
+                else:
+                    branches.append('d:ok. data')
+                d_statement = time_from_string(value=d_date, prop=P_DATE_OF_DEATH,
                                                     ref=self.reference_bn,
                                                     qlf_list=qualifier)
             elif 'non post' not in d_date and 'nie po' not in d_date and ('po' in d_date or 'post' in d_date or 'non ante' in d_date):
+                branches.append('d:po')
                 d_date = d_date.replace('post','').replace('po','').replace('non ante','').strip()
                 if len(d_date) == 4:
                     d_date += '-00-00'
-                qualifier = [self.time_from_string(value=d_date, prop=P_EARLIEST_DATE)]
+                qualifier = [time_from_string(value=d_date, prop=P_EARLIEST_DATE)]
                 d_statement = Time(time=None, prop_nr=P_DATE_OF_DEATH, snaktype=WikibaseSnakType.UNKNOWN_VALUE, qualifiers=qualifier)
             elif 'przed' in d_date or 'ante' in d_date or 'non post' in d_date or 'nie po' in d_date:
+                branches.append('d:przed')
                 d_date = d_date.replace('ante','').replace('przed','').replace('non post','').replace('nie po','').strip()
                 if len(d_date) == 4:
                     d_date += '-00-00'
-                qualifier = [self.time_from_string(value=d_date, prop=P_LATEST_DATE)]
+                qualifier = [time_from_string(value=d_date, prop=P_LATEST_DATE)]
                 d_statement = Time(time=None, prop_nr=P_DATE_OF_DEATH, snaktype=WikibaseSnakType.UNKNOWN_VALUE, qualifiers=qualifier)
             elif r'/' in d_date:
+                branches.append('d:przełom')
                 tmp = d_date.split(r'/')
                 earliest = tmp[0].strip()
                 if len(earliest) == 4:
@@ -404,8 +414,8 @@ class Postac:
                     latest = earliest[:2] + latest + '-00-00'
                 elif len(latest) == 1:
                     latest = earliest[:3] + latest + '-00-00'
-                qualifier = [self.time_from_string(value=earliest, prop=P_EARLIEST_DATE),
-                             self.time_from_string(value=latest, prop=P_LATEST_DATE)]
+                qualifier = [time_from_string(value=earliest, prop=P_EARLIEST_DATE),
+                             time_from_string(value=latest, prop=P_LATEST_DATE)]
                 b_statement = Time(time=None, prop_nr=P_DATE_OF_BIRTH, snaktype=WikibaseSnakType.UNKNOWN_VALUE, qualifiers=qualifier)
 
 
@@ -421,7 +431,7 @@ class Postac:
             self.wb_item.descriptions.set(language='pl', value=self.description_pl)
             self.wb_item.descriptions.set(language='en', value=self.description_en)
         else:
-            self.wb_item = self.wbi.item.get(entity_id=update_qid)
+            self.wb_item = self.get_item(update_qid)
             description = self.wb_item.descriptions.get(language='pl')
             if not description or description == '-' or description != self.description_pl:
                 self.wb_item.descriptions.set(language='pl', value=self.description_pl)
@@ -442,17 +452,7 @@ class Postac:
         # prawidłowe roczne połączone z przypadkowymi dziennymi, lub brak istniejących dat
         # rocznych) dlatego na razie je pomijamy, będą w przyszłości wyciągane przez GPT
 
-        separator = ',' if ',' in self.years else '-'
-        date_of_1 = date_of_2 = None
-        # jeżeli zakres dat
-        if separator in self.years:
-            tmp = self.years.split(separator)
-            date_of_1 = DateBDF(tmp[0].strip(), 'B')
-            date_of_2 = DateBDF(tmp[1].strip(), 'D')
-        # jeżeli tylko jedna z dat lub ogólny opis np. XVII wiek
-        else:
-            if self.years:
-                date_of_1 = DateBDF(self.years, '')
+        date_of_1, date_of_2 = years_to_dates(self.years)
 
         if date_of_1:
             statement_1, statement_2 = date_of_1.prepare_st(ref=self.reference_psb)
@@ -472,12 +472,13 @@ class Postac:
         # specjalna metoda do przetwarzania dat z BN, daty z BN są dodawane osobno, nawet jak są takie
         # same jak daty z PSB, dlatego że docelowo nie będą takie same - będziemy mieć daty dzienne z PSB
         # generalnie nie widzę wartości w dodawaniu dat z BN, to nie jest źródło historyczne...
+        # merge_claim: przy ponownym imporcie te same daty nie są dopisywane drugi raz
         if self.bn_years:
             bn_birth_statement, bn_death_statement = self.date_from_bn()
             if bn_birth_statement:
-                self.wb_item.claims.add([bn_birth_statement], action_if_exists=ActionIfExists.FORCE_APPEND)
+                merge_claim(self.wb_item, bn_birth_statement)
             if bn_death_statement:
-                self.wb_item.claims.add([bn_death_statement], action_if_exists=ActionIfExists.FORCE_APPEND)
+                merge_claim(self.wb_item, bn_death_statement)
 
         # PLWABN ID
         if self.plwabn_id:
@@ -493,7 +494,7 @@ class Postac:
                 # dodawać statement z językiem 'und' lub 'mul'
                 statement = MonolingualText(text=alias.strip(), language='und',
                                             prop_nr=P_STATED_AS, references=self.reference_bn)
-                self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.FORCE_APPEND)
+                merge_claim(self.wb_item, statement)
 
         statement = Item(value=Q_HUMAN, prop_nr=P_INSTANCE_OF)
         self.wb_item.claims.add([statement], action_if_exists=ActionIfExists.APPEND_OR_REPLACE)
@@ -518,33 +519,44 @@ class Postac:
 
 
     def find_autor(self, value:str, years:str) -> str:
-        """ wyszukuje autora w wikibase, zwraca QID """
-        result = ''
-
-        items = wbi_helpers.search_entities(search_string=value,
-                                                language='pl',
-                                                search_type='item')
+        """ wyszukuje autora w lokalnym indeksie, a w razie braku wśród wyników wyszukiwania
+            w wikibase (dopasowanie przybliżone nazwy i lat życia z oceną pewności, następnie
+            pierwszy element z latami życia w dowolnym miejscu opisu lub - bez opisu - z tą samą
+            etykietą), zwraca QID
+        """
+        if self.autor_index:
+            result, score = self.autor_index.match(value, years)
+            if result:
+                if score < 1.0:
+                    self.logger.info(f'Autor dopasowany ({score:.2f}): {value} {years} -> {result}')
+                return result
+
+        # kandydaci z wikibase: etykieta i lata życia z początku opisu, np. '(1882-1951) historyk'
+        candidates = AutorIndex()
+        found = []
+        items = self.search_cache.search(search_string=value, language='pl', search_type='item')
         for item in items:
             wbi_item = self.wbi.item.get(entity_id=item)
             item_label = wbi_item.labels.get(language='pl')
             item_description = wbi_item.descriptions.get(language='pl')
-
-            if item_description:
-                years = years.replace('(','').replace(')', '').strip()
-                tmp = years.split('-')
-                y_start = y_end = ''
-                y_start = tmp[0].strip()
-                if len(tmp) == 2:
-                    y_end = tmp[1].strip()
-                if (years in item_description or
-                    ((not y_start or y_start in item_description) and
-                    (not y_end or y_end in item_description))):
-                    result = item
-                    break
-            else:
-                if value == item_label:
+            label = item_label.value if item_label else ''
+            description = item_description.value if item_description else ''
+            found.append((item, label, description))
+            if label:
+                candidates.add(label, description_years(description), item)
+
+        result, score = candidates.match(value, years)
+        if result:
+            self.logger.info(f'Autor dopasowany w wikibase ({score:.2f}): {value} {years} -> {result}')
+        else:
+            # lata życia w dowolnym miejscu opisu (opis nie zaczyna się od '(lata)')
+            for item, label, description in found:
+                if (description_has_years(description, years) if description else value == label):
                     result = item
                     break
+        # kolejne biogramy tego autora bez wyszukiwania
+        if result and self.autor_index is not None:
+            self.autor_index.add(value, years, result)
 
         return result
 
@@ -552,10 +564,22 @@ class Postac:
     def appears_in_wikibase(self) -> bool:
         """ proste wyszukiwanie elementu w wikibase, dokładna zgodność etykiety i opisu
         """
+        # lokalny indeks etykieta-opis (bez wyszukiwania w wikibase), indeks obejmuje tylko
+        # elementy klasy unique_instance_of - przy braku w indeksie zwykłe wyszukiwanie
+        if self.unique_index is not None:
+            self.qid = self.unique_index.find('pl', self.name, self.description_pl)
+            if self.qid:
+                return True
 
-        items = wbi_helpers.search_entities(search_string=self.name,
-                                             language='pl',
-                                             search_type='item')
+        # kandydaci z wyszukiwania grupowego (bez pobierania elementów)
+        if self.lookup is not None and self.name in self.lookup:
+            for item, item_label, item_description_pl in self.lookup.candidates(self.name):
+                if item_label == self.name and item_description_pl and item_description_pl == self.description_pl:
+                    self.qid = item
+                    return True
+            return False
+
+        items = self.search_cache.search(search_string=self.name, language='pl', search_type='item')
         for item in items:
             wbi_item = self.wbi.item.get(entity_id=item)
             item_label = wbi_item.labels.get(language='pl')
@@ -568,136 +592,61 @@ class Postac:
         return False
 
 
-    def write_or_exit(self):
-        """ zapis danych do wikibase lub zakończenie programu """
-        loop_num = 1
-        while True:
-            try:
-                new_id = self.wb_item.write()
-                break
-            except MWApiError as wb_error:
-                err_code = wb_error.code
-                err_message = wb_error.messages
-                self.logger.error(f'ERROR: {err_code}, {err_message}')
-
-                # jeżeli jest to problem z tokenem to próba odświeżenia tokena i powtórzenie
-                # zapisu, ale tylko raz, w razie powtórnego błędu bad token, skrypt kończy pracę
-                if err_code in ['assertuserfailed', 'badtoken']:
-                    if loop_num == 1:
-                        self.logger.error('błąd "badtoken", odświeżenie poświadczenia...')
-                        self.login_instance.generate_edit_credentials()
-                        loop_num += 1
-                        continue
-                # jeżeli błąd zapisu dto druga próba po 5 sekundach
-                elif err_code in ['failed-save']:
-                    if loop_num == 1:
-                        self.logger.error('błąd zapisu, czekam 5 sekund...')
-                        loop_num += 1
-                        continue
-
-                sys.exit(1)
-
-        self.qid = new_id.id
-
-
-def set_logger(path:str) -> Logger:
-    """ utworzenie loggera """
-    logger_object = logging.getLogger(__name__)
-    logger_object.setLevel(logging.INFO)
-    log_format = logging.Formatter('%(asctime)s - %(message)s')
-    # log w konsoli
-    c_handler = logging.StreamHandler()
-    c_handler.setFormatter(log_format)
-    c_handler.setLevel(logging.DEBUG)
-    logger_object.addHandler(c_handler)
-
-    # zapis logów do pliku
-    f_handler = logging.FileHandler(path)
-    f_handler.setFormatter(log_format)
-    f_handler.setLevel(logging.INFO)
-    logger_object.addHandler(f_handler)
-
-    return logger_object
-
-
-# ------------------------------------------------------------------------------
-if __name__ == '__main__':
-
-    # pomiar czasu wykonania
-    start_time = time.time()
-
-    # tworzenie obiektu loggera
-    file_log = Path('..') / 'log' / 'psb_postacie.log'
-    logger = set_logger(file_log)
+    def build(self, update_qid:str = None):
+        """ przygotowuje nowy element lub aktualizację istniejącego """
+        self.create_item(update_qid=update_qid)
 
-    logger.info('POCZĄTEK IMPORTU')
 
-    # zalogowanie do instancji wikibase
-    login_instance = wbi_login.OAuth1(consumer_token=WIKIDARIAH_CONSUMER_TOKEN,
-                                      consumer_secret=WIKIDARIAH_CONSUMER_SECRET,
-                                      access_token=WIKIDARIAH_ACCESS_TOKEN,
-                                      access_secret=WIKIDARIAH_ACCESS_SECRET)
-
-    wbi = WikibaseIntegrator(login=login_instance)
-
-    # realne dane
-    input_path = Path("..") / "data" / "postacie.json"
+    def search_labels(self) -> list:
+        """ etykieta i aliasy postaci """
+        return [self.name] + self.aliasy
 
-    # próbka do testów
-    #input_path = '/home/piotr/ihpan/psb_import/data/probka_postacie_2.json'
 
-    # ścieżka do pliku json z danymi postaci z przypisanymi identyfikatorami wikibase (QID)
-    # ten plik stanie się nową wersją pliku postacie.json i ułatwi późniejsze uzupełnianie danych
-    # w wikibase (uwaga: wersje dla wiki testowej i produkcyjnej będą miały inne identyfikatory)
-    output_path = Path("..") / "data" / "postacie_qid.json"
+    def prefetch_keys(self) -> list:
+        """ nazwa postaci i nazwy autorów wyszukiwanych w wikibase """
+        return [self.name] + [name for name, _ in self.autor_qids]
 
-    # ścieżka do pliku tymczasowego do zapisu identyfikatorów QID w razie przerwania skryptu
-    # (brak prądu, problemy sieciowe itp.), na podstawie tego pliku mozna uzupełnić dane w postacie.json
-    output_tmp_path = Path("..") / "data" / "tmp_qid_list.csv"
 
-    with open(input_path, "r", encoding='utf-8') as f:
-        json_data = json.load(f)
-        for i, postac_record in enumerate(json_data['persons']):
+    @classmethod
+    def unique_keys(cls, record:dict) -> list:
+        """ pary etykieta-opis postaci w językach polskim i angielskim """
+        result = []
+        for language in ('pl', 'en'):
+            description = record.get(f'description_{language}', '').strip()
+            if description:
+                result.append((language, record['name'], description))
 
-            # przetwarzanie partiami po 1000
-            if (i < 25001):
-                continue
+        return result
 
-            # utworzenie instancji obiektu postaci
-            postac = Postac(postac_record, logger_object=logger, login_object=login_instance,
-                          wbi_object=wbi)
 
-            # jeżeli nie ma postaci w wikibase
-            if not postac.qid and not postac.appears_in_wikibase():
-                postac.create_item()
-                if WIKIBASE_WRITE:
-                    postac.write_or_exit()
-                else:
-                    postac.qid = 'TEST'
+    @classmethod
+    def disambiguate(cls, record:dict, language:str):
+        """ uzupełnienie opisu o tom i strony PSB (lub identyfikator) """
+        volume = record.get('volume', '').strip()
+        page = record.get('page', '').replace('s.', '').strip()
+        if volume and page:
+            suffix = f'(PSB t. {volume}, s. {page})' if language == 'pl' else f'(PSB vol. {volume}, p. {page})'
+        else:
+            suffix = f"({record['ID']})"
+        field = f'description_{language}'
+        record[field] = f"{record.get(field, '').strip()} {suffix}"
 
-                message = f'({i}) Dodano element: # [https://prunus-208.man.poznan.pl/wiki/Item:{postac.qid} {postac.name}]'
-            # jeżeli jest to próba uzupełnienia danych
-            else:
-                message = f'({i}) Element istnieje: # [https://prunus-208.man.poznan.pl/wiki/Item:{postac.qid} {postac.name}]'
-                postac.create_item(update_qid=postac.qid)
-                if WIKIBASE_WRITE:
-                    postac.write_or_exit()
 
-            postac_record['QID'] = postac.qid
+    @classmethod
+    def add_arguments(cls, parser):
+        """ parametry wywołania specyficzne dla importu postaci """
+        parser.add_argument('--autorzy', type=Path, default=Path("..") / "data" / "autorzy_qid.json",
+                            help='plik json z autorami i ich QID (lokalny indeks autorów)')
 
-            # zapis do pliku tekstowego w razie przerwania skryptu - do uzupełnienia w postacie.json
-            # przed ponownym uruchomieniem skryptu!
-            with open(output_tmp_path, 'a', encoding='utf-8') as f_tmp:
-                f_tmp.write(f'{postac.identyfikator}@{postac.qid}\n')
 
-            # zapis w logu
-            logger.info(message)
+    @classmethod
+    def configure(cls, params, logger_object:Logger):
+        """ wczytanie indeksu autorów utworzonych lub znalezionych przez psb_autorzy.py """
+        if params.autorzy.exists():
+            cls.autor_index = AutorIndex.from_file(params.autorzy)
+            logger_object.info(f'Indeks autorów: {len(cls.autor_index)} ({params.autorzy})')
 
-    # zapis pliku json z identyfikatorami wikibase (QID)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, indent=4, ensure_ascii=False)
 
-    end_time = time.time()
-    elapsed_time = end_time - start_time
-    message = f'Czas wykonania programu: {time.strftime("%H:%M:%S", time.gmtime(elapsed_time))} s.'
-    logger.info(message)
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    main(Postac, 'Import postaci PSB do wikibase', __file__)
@@ -0,0 +1,84 @@
+""" moduł: profilowanie przebiegu importu (cProfile, opcjonalnie tracemalloc)
+    co every rekordów zapisywany jest plik pstats (czas od początku importu)
+    oraz różnica migawek pamięci względem poprzedniego zapisu;
+    cProfile obejmuje tylko wątek główny (budowa i zapis elementów), bez wątków
+    pobierających dane z wikibase z wyprzedzeniem (--lookahead, psb_pipeline)
+"""
+import io
+import pstats
+import cProfile
+import tracemalloc
+from pathlib import Path
+
+# liczba pozycji w różnicy migawek pamięci
+TOP_ALLOCATIONS = 30
+
+
+class Profiler:
+    """ profilowanie importu z okresowym zapisem wyników do katalogu output_dir """
+
+    def __init__(self, output_dir:Path, name:str = 'psb_import', every:int = 1000,
+                 memory:bool = False) -> None:
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.every = every
+        self.memory = memory
+        self.counter = 0
+        self.profile = cProfile.Profile()
+        self.snapshot = None
+
+    def start(self):
+        """ początek profilowania """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.snapshot = self.take_snapshot()
+        self.profile.enable()
+
+    def step(self):
+        """ wywoływane po każdym rekordzie """
+        self.counter += 1
+        if self.every and self.counter % self.every == 0:
+            self.dump()
+
+    @staticmethod
+    def take_snapshot() -> tracemalloc.Snapshot:
+        """ migawka pamięci bez alokacji samych narzędzi profilujących """
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                       tracemalloc.Filter(False, cProfile.__file__)])
+
+    def dump(self) -> Path:
+        """ zapis pliku pstats i różnicy migawek pamięci, zwraca ścieżkę pliku pstats """
+        self.profile.disable()
+        path = self.output_dir / f'{self.name}_{self.counter:07d}.pstats'
+        self.profile.dump_stats(path)
+
+        if self.memory:
+            snapshot = self.take_snapshot()
+            with open(path.with_suffix('.memory.txt'), 'w', encoding='utf-8') as f:
+                for stat in snapshot.compare_to(self.snapshot, 'lineno')[:TOP_ALLOCATIONS]:
+                    f.write(f'{stat}\n')
+            self.snapshot = snapshot
+
+        self.profile.enable()
+        return path
+
+    def stop(self) -> Path:
+        """ koniec profilowania, zapis wyników końcowych """
+        path = self.dump()
+        self.profile.disable()
+        if self.memory:
+            tracemalloc.stop()
+
+        return path
+
+
+def summarize(path:Path, top:int = 25, sort:str = 'cumulative') -> str:
+    """ najbardziej kosztowne funkcje z pliku pstats (domyślnie wg czasu łącznego) """
+    stream = io.StringIO()
+    stats = pstats.Stats(str(path), stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    return stream.getvalue()
@@ -0,0 +1,129 @@
+""" moduł: postęp importu - wiersz stanu w terminalu (aktualizowany w miejscu) i okresowy
+    plik json ze stanem: liczba rekordów, tempo (średnia krocząca), przewidywany czas
+    zakończenia, ponowienia zapisu, błędy, skuteczność pamięci podręcznej wyszukiwania
+"""
+import os
+import sys
+import json
+import time
+import logging
+from collections import Counter, deque
+from pathlib import Path
+
+# liczniki zdarzeń zgłaszanych poza pętlą importu (np. ponowienia zapisu w write_item)
+counters = Counter()
+
+# okno średniej kroczącej tempa (s)
+RATE_WINDOW = 60.0
+
+
+class ErrorCounter(logging.Handler):
+    """ handler logów zliczający komunikaty o poziomie ERROR i wyższym """
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class Progress:
+    """ stan importu, odświeżany nie częściej niż co interval sekund """
+
+    def __init__(self, total:int = None, search_cache=None, terminal:bool = True,
+                 status_path:Path = None, interval:float = 1.0, status_interval:float = 10.0) -> None:
+        self.total = total
+        self.search_cache = search_cache
+        self.stream = sys.stderr
+        # wiersz stanu tylko w terminalu (nie w przekierowanym wyjściu)
+        self.terminal = terminal and self.stream.isatty()
+        self.status_path = Path(status_path) if status_path else None
+        self.interval = interval
+        self.status_interval = status_interval
+        self.errors = ErrorCounter()
+
+        self.done = 0
+        self.in_flight = 0
+        self.actions = Counter()
+        self.start_time = time.monotonic()
+        self.next_render = self.start_time
+        self.next_status = self.start_time
+        self.samples = deque([(self.start_time, 0)])
+
+    def begin(self):
+        """ rekord w trakcie przetwarzania """
+        self.in_flight += 1
+
+    def update(self, action:str = ''):
+        """ rekord przetworzony, odświeżenie stanu tylko po upływie interval """
+        self.in_flight -= 1
+        self.done += 1
+        if action:
+            self.actions[action] += 1
+        now = time.monotonic()
+        if now >= self.next_render:
+            self.render(now)
+
+    def rate(self, now:float) -> float:
+        """ tempo (rekordy/s) w oknie RATE_WINDOW """
+        self.samples.append((now, self.done))
+        while len(self.samples) > 2 and now - self.samples[0][0] > RATE_WINDOW:
+            self.samples.popleft()
+        first_time, first_done = self.samples[0]
+        if now <= first_time:
+            return 0.0
+        return (self.done - first_done) / (now - first_time)
+
+    def status(self, now:float = None) -> dict:
+        """ stan importu jako słownik """
+        now = time.monotonic() if now is None else now
+        rate = self.rate(now)
+        eta = None
+        if self.total is not None and rate > 0:
+            eta = max(self.total - self.done, 0) / rate
+        hits = misses = 0
+        if self.search_cache is not None:
+            hits, misses = self.search_cache.hits, self.search_cache.misses
+
+        return {'processed': self.done,
+                'total': self.total,
+                'in_flight': self.in_flight,
+                'rate': round(rate, 2),
+                'eta_seconds': round(eta) if eta is not None else None,
+                'elapsed_seconds': round(now - self.start_time),
+                'actions': dict(self.actions),
+                'retries': counters['retries'],
+                'errors': self.errors.count,
+                'cache_hits': hits,
+                'cache_hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None}
+
+    def render(self, now:float = None, final:bool = False):
+        """ wiersz stanu w terminalu i (co status_interval) plik json """
+        now = time.monotonic() if now is None else now
+        self.next_render = now + self.interval
+        status = self.status(now)
+
+        if self.terminal:
+            total = status['total'] if status['total'] is not None else '?'
+            eta = status['eta_seconds']
+            eta = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta is not None else '--:--:--'
+            ratio = status['cache_hit_ratio']
+            ratio = f'{ratio * 100:.0f}%' if ratio is not None else '-'
+            line = (f"{status['processed']}/{total} | {status['rate']:.2f} rek./s | ETA {eta} | "
+                    f"ponowienia: {status['retries']} | błędy: {status['errors']} | "
+                    f"pamięć podręczna: {ratio}")
+            self.stream.write('\r' + line + ('\n' if final else ''))
+            self.stream.flush()
+
+        if self.status_path and (final or now >= self.next_status):
+            self.next_status = now + self.status_interval
+            status['finished'] = final
+            tmp_path = self.status_path.with_name(self.status_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(status, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.status_path)
+
+    def close(self):
+        """ stan końcowy """
+        self.render(final=True)
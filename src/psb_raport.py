@@ -0,0 +1,162 @@
+""" skrypt do eksportu wyników importu (plik *_qid.json, dziennik ID@QID lub magazyn roboczy
+    SQLite) do arkusza xlsx
+    uwaga: arkusz zapisywany strumieniowo (tryb write_only biblioteki openpyxl)
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from psbtools import years_to_dates
+from psb_io import iter_json_records, iter_journal
+from psb_autor_index import AutorIndex
+from psb_store import WorkingStore
+
+# flagi DateBDF raportowane w arkuszu
+DATE_FLAGS = ['certain', 'about', 'between', 'or_date', 'turn', 'before', 'after', 'roman',
+              'somevalue', 'first_half', 'second_half', 'first_quarter', 'beginning_of',
+              'middle_of', 'end_of']
+
+COLUMNS = ['ID', 'nazwa', 'QID', 'akcja', 'lata', 'flagi dat', 'nierozpoznani autorzy']
+
+
+def date_parse_flags(years:str) -> str:
+    """ flagi ustalone przez DateBDF dla lat życia, np. 'B: about; D: before' """
+    years = years.replace('(', '').replace(')', '').strip()
+    if not years:
+        return ''
+    try:
+        dates = [x for x in years_to_dates(years) if x]
+    except Exception as error:
+        return f'błąd: {error}'
+
+    result = []
+    for date in dates:
+        flags = [flag for flag in DATE_FLAGS if getattr(date, flag)]
+        if not date.date:
+            flags.append('brak daty')
+        result.append(f"{date.type}: {', '.join(flags)}")
+
+    return '; '.join(result)
+
+
+def unresolved_authors(record:dict, autor_index:AutorIndex) -> str:
+    """ autorzy biogramu nieobecni w indeksie autorów (z pominięciem autorów jako tekst),
+        dopasowanie przybliżone jak w imporcie (Postac.find_autor)
+    """
+    if not autor_index:
+        return ''
+    result = []
+    for item in record.get('autor', []) or []:
+        if item.get('as_string', '') == '1':
+            continue
+        autor_name = item.get('autor_name', '')
+        autor_years = item.get('autor_years', '')
+        if not autor_index.match(autor_name, autor_years)[0]:
+            result.append(f'{autor_name} {autor_years}'.strip())
+
+    return '; '.join(result)
+
+
+def report_rows(records, actions:dict, autor_index:AutorIndex = None):
+    """ generator wierszy arkusza dla kolejnych rekordów """
+    for record in records:
+        identyfikator = record.get('ID', '')
+        qid, action = actions.get(identyfikator, (record.get('QID', ''), ''))
+        yield [identyfikator,
+               record.get('name', ''),
+               qid or record.get('QID', ''),
+               action,
+               record.get('years', ''),
+               date_parse_flags(record.get('years', '')),
+               unresolved_authors(record, autor_index)]
+
+
+def export_xlsx(output_path:Path, rows, sheet_title:str = 'import') -> int:
+    """ zapis wierszy do arkusza xlsx w trybie strumieniowym, zwraca liczbę wierszy """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.freeze_panes = 'A2'
+
+    header = []
+    for name in COLUMNS:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+
+    counter = 0
+    for row in rows:
+        sheet.append(row)
+        counter += 1
+
+    workbook.save(output_path)
+
+    return counter
+
+
+def parse_args():
+    """ parametry wywołania skryptu """
+    parser = argparse.ArgumentParser(description='Eksport wyników importu PSB do arkusza xlsx')
+    parser.add_argument('--input', type=Path, default=Path("..") / "data" / "postacie_qid.json",
+                        help='plik json z danymi (postacie_qid.json, autorzy_qid.json)')
+    parser.add_argument('--key', default='persons', choices=['persons', 'authors'],
+                        help='lista rekordów w pliku json')
+    parser.add_argument('--journal', type=Path, nargs='*', default=[],
+                        help='dzienniki ID@QID@akcja (QID i rodzaj operacji)')
+    parser.add_argument('--autorzy', type=Path, default=None,
+                        help='plik autorzy_qid.json do wskazania nierozpoznanych autorów')
+    parser.add_argument('--output', type=Path, default=Path("..") / "data" / "raport.xlsx",
+                        help='plik xlsx z raportem')
+    parser.add_argument('--store', type=Path, default=None,
+                        help='magazyn roboczy SQLite (rekordy, QID i akcje zamiast --input i --journal)')
+
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    """ eksport raportu, zwraca liczbę wierszy """
+    store = WorkingStore(args.store) if getattr(args, 'store', None) else None
+    if store:
+        actions = store.actions(args.key)
+        records = (record for _, record in store.iter_records(args.key))
+    else:
+        actions = {}
+        for path in args.journal:
+            for identyfikator, qid, action in iter_journal(path):
+                actions[identyfikator] = (qid, action)
+        records = iter_json_records(args.input, args.key)
+
+    autor_index = None
+    if args.autorzy:
+        autor_index = AutorIndex.from_file(args.autorzy)
+    elif store and args.key == 'persons' and store.count('authors'):
+        autor_index = AutorIndex()
+        for _, record in store.iter_records('authors'):
+            autor_index.add_record(record)
+
+    rows_count = export_xlsx(args.output, report_rows(records, actions, autor_index), sheet_title=args.key)
+    if store:
+        store.close()
+
+    return rows_count
+
+
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    # pomiar czasu wykonania
+    start_time = time.time()
+
+    params = parse_args()
+    if not params.store and not params.input.exists():
+        print(f'ERROR: brak pliku {params.input}')
+        sys.exit(1)
+
+    rows_count = main(params)
+
+    elapsed_time = time.time() - start_time
+    print(f'Zapisano {rows_count} wierszy do {params.output} '
+          f'({time.strftime("%H:%M:%S", time.gmtime(elapsed_time))} s.)')
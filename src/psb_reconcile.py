@@ -0,0 +1,92 @@
+""" moduł: uzgadnianie rekordów z elementami wikibase na podstawie identyfikatorów
+    zewnętrznych (VIAF, PLWABN ID, Wikidata ID) - zbiorcze zapytania SPARQL
+"""
+from logging import Logger
+from wikibaseintegrator import wbi_helpers
+from wikibaseintegrator.wbi_config import config as wbi_config
+from psbtools import viaf_id
+
+# właściwości w testowej instancji wikibase
+P_VIAF = 'P517'
+P_PLWABN_ID = 'P484'
+P_WIKIDATA_ID = 'P398'
+
+# liczba identyfikatorów w jednym bloku VALUES zapytania
+CHUNK_SIZE = 200
+
+
+def record_identifiers(record:dict) -> dict:
+    """ identyfikatory zewnętrzne rekordu autora lub postaci: właściwość -> wartość """
+    result = {}
+    viaf = viaf_id(record.get('viaf', ''))
+    if viaf:
+        result[P_VIAF] = viaf
+    # autorzy: plwabn_id, postacie: id_bn
+    plwabn_id = str(record.get('plwabn_id', '') or record.get('id_bn', '')).strip()
+    if plwabn_id:
+        result[P_PLWABN_ID] = plwabn_id
+    wikidata = str(record.get('wikidata', '')).strip()
+    if wikidata:
+        result[P_WIKIDATA_ID] = wikidata
+
+    return result
+
+
+def sparql_prefix() -> str:
+    """ prefiks zapytań SPARQL dla skonfigurowanej instancji wikibase """
+    wikibase_url = wbi_config['WIKIBASE_URL']
+    return (f"PREFIX wd: <{wikibase_url}/entity/>\n"
+            f"PREFIX wdt: <{wikibase_url}/prop/direct/>")
+
+
+def find_by_identifier(prop:str, values:list, chunk_size:int = CHUNK_SIZE) -> dict:
+    """ wyszukuje elementy mające wartości values właściwości prop,
+        zwraca słownik wartość -> zbiór QID
+    """
+    result = {}
+    values = sorted(set(values))
+    for pos in range(0, len(values), chunk_size):
+        chunk = values[pos:pos + chunk_size]
+        values_str = ' '.join('"' + x.replace('\\', '\\\\').replace('"', '\\"') + '"' for x in chunk)
+        query = f"""
+            SELECT ?item ?value WHERE {{
+                VALUES ?value {{ {values_str} }}
+                ?item wdt:{prop} ?value .
+            }}"""
+        results = wbi_helpers.execute_sparql_query(query, prefix=sparql_prefix())
+        for row in results['results']['bindings']:
+            qid = row['item']['value'].split('/')[-1]
+            result.setdefault(row['value']['value'], set()).add(qid)
+
+    return result
+
+
+def reconcile(records:list, logger_object:Logger, chunk_size:int = CHUNK_SIZE) -> int:
+    """ przypisuje QID rekordom bez QID, jeżeli ich identyfikatory zewnętrzne są już
+        w wikibase i wskazują jednoznacznie jeden element, zwraca liczbę uzgodnionych rekordów
+    """
+    values = {P_VIAF: [], P_PLWABN_ID: [], P_WIKIDATA_ID: []}
+    identifiers = []
+    for record in records:
+        rec_identifiers = {} if record.get('QID') else record_identifiers(record)
+        identifiers.append(rec_identifiers)
+        for prop, value in rec_identifiers.items():
+            values[prop].append(value)
+
+    found = {prop: find_by_identifier(prop, prop_values, chunk_size)
+             for prop, prop_values in values.items() if prop_values}
+
+    counter = 0
+    for record, rec_identifiers in zip(records, identifiers):
+        candidates = set()
+        for prop, value in rec_identifiers.items():
+            candidates |= found.get(prop, {}).get(value, set())
+
+        if len(candidates) == 1:
+            record['QID'] = candidates.pop()
+            counter += 1
+        elif len(candidates) > 1:
+            logger_object.info(f"Niejednoznaczne identyfikatory: {record['ID']} {record.get('name', '')} "
+                               f"-> {', '.join(sorted(candidates))}")
+
+    return counter
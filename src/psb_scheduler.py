@@ -0,0 +1,221 @@
+""" skrypt do równoczesnego importu autorów i postaci PSB
+    postać trafia do importu, gdy wszyscy jej autorzy (poza autorami jako tekst,
+    as_string == '1') mają już QID, postacie bez takich autorów od razu, oba importy
+    przebiegają przez etapy ImportEngine (postęp, profil, monitor pamięci, --lookahead)
+
+    python psb_scheduler.py --authors "--reconcile" --persons "--unique-index --search-cache ../data/cache.json"
+
+    uwaga: tryb partii (--shards, --workers) nie jest obsługiwany
+"""
+import sys
+import time
+import queue
+import shlex
+import argparse
+import threading
+from logging import Logger
+from pathlib import Path
+from psb_autor_index import AutorIndex, normalize_name, normalize_years
+from psb_cache import SearchCache
+from psb_engine import ImportEngine, configure_wbi, login, parse_args as engine_parse_args
+from psb_engine import elapsed
+from psb_autorzy import Autor
+from psb_postacie import Postac
+from psb_logging import set_logger
+
+# znacznik końca kolejki postaci
+END = None
+
+
+def person_authors(record:dict) -> set:
+    """ autorzy biogramu, na których QID czeka postać: (znormalizowana nazwa, lata życia) """
+    result = set()
+    for autor in record.get('autor', []) or []:
+        name = autor.get('autor_name', '')
+        if autor.get('as_string', '') != '1' and name:
+            result.add((normalize_name(name), normalize_years(autor.get('autor_years', ''))))
+
+    return result
+
+
+def author_names(record:dict) -> set:
+    """ znormalizowane nazwy autora (nazwa i warianty nazwiska) """
+    result = {normalize_name(record.get('name', ''))}
+    for alias in record.get('aliasy', []) or []:
+        result.add(normalize_name(alias[0]))
+    result.discard('')
+
+    return result
+
+
+class DependencyScheduler:
+    """ graf zależności postać -> autorzy, zwalnianie postaci po imporcie ich autorów """
+
+    def __init__(self, authors:list, persons:list, autor_index:AutorIndex,
+                 logger_object:Logger) -> None:
+        self.autor_index = autor_index
+        self.logger = logger_object
+        self.lock = threading.Lock()
+        self.ready = queue.Queue()
+        self.released_at_start = 0
+        self.released_by_authors = 0
+        self.released_at_end = 0
+
+        # autorzy jeszcze bez QID wg (nazwa, lata życia) i wg samej nazwy -> ID autorów
+        self.pending_by_key = {}
+        self.pending_by_name = {}
+        for _, record in authors:
+            if record.get('QID'):
+                self.autor_index.add_record(record)
+                continue
+            years = normalize_years(record.get('years', ''))
+            for name in author_names(record):
+                self.pending_by_key.setdefault((name, years), set()).add(record['ID'])
+                self.pending_by_name.setdefault(name, set()).add(record['ID'])
+
+        # postacie czekające na autorów: numer postaci -> zbiór ID autorów, ID autora -> numery postaci
+        self.persons = persons
+        self.waiting = {}
+        self.waiting_by_author = {}
+        for pos, (_, record) in enumerate(persons):
+            ids = set()
+            for key in person_authors(record):
+                ids |= self.pending_authors(*key)
+            if ids:
+                self.waiting[pos] = ids
+                for identyfikator in ids:
+                    self.waiting_by_author.setdefault(identyfikator, []).append(pos)
+            else:
+                self.ready.put(persons[pos])
+                self.released_at_start += 1
+
+    def pending_authors(self, name:str, years:str) -> set:
+        """ ID autorów bez QID, na których czeka autor biogramu (nazwa, lata życia), przy
+            niezgodnych lub brakujących latach - wszyscy autorzy o tej nazwie
+        """
+        ids = self.pending_by_key.get((name, years))
+        if ids is None:
+            ids = self.pending_by_name.get(name, set())
+
+        return set(ids)
+
+    def author_done(self, record:dict):
+        """ autor zaimportowany: QID do indeksu, zwolnienie postaci bez oczekujących autorów """
+        identyfikator = record.get('ID', '')
+        with self.lock:
+            self.autor_index.add_record(record)
+            for pos in self.waiting_by_author.pop(identyfikator, []):
+                ids = self.waiting.get(pos)
+                if ids is None:
+                    continue
+                ids.discard(identyfikator)
+                if not ids:
+                    del self.waiting[pos]
+                    self.ready.put(self.persons[pos])
+                    self.released_by_authors += 1
+
+    def authors_finished(self):
+        """ koniec importu autorów: zwolnienie pozostałych postaci i znacznik końca kolejki """
+        with self.lock:
+            for pos in sorted(self.waiting):
+                self.ready.put(self.persons[pos])
+                self.released_at_end += 1
+            self.waiting.clear()
+            self.waiting_by_author.clear()
+            self.ready.put(END)
+
+    def stats(self) -> str:
+        """ statystyka zwalniania postaci """
+        return (f'postacie zwolnione od razu: {self.released_at_start}, '
+                f'po imporcie autorów: {self.released_by_authors}, '
+                f'po zakończeniu importu autorów: {self.released_at_end}')
+
+
+def prepare_engine(builder_class, argv:list, logger_object:Logger):
+    """ silnik importu z parametrami skryptu importu, zwraca (silnik, rekordy) """
+    params = engine_parse_args(builder_class, '', argv)
+    if params.shards > 1 or params.workers or params.merge:
+        raise ValueError('tryb partii (--shards, --workers, --merge) nie jest obsługiwany')
+    login_instance, wbi = login()
+    engine = ImportEngine(builder_class, params, logger_object, login_instance, wbi)
+    records = list(engine.load())
+
+    return engine, records
+
+
+def run_authors(engine:ImportEngine, records:list, scheduler:DependencyScheduler, errors:list):
+    """ wątek importu autorów """
+    try:
+        # autor z błędem (plik błędnych rekordów) także zwalnia oczekujące postacie
+        engine.run(records, done=scheduler.author_done)
+    except BaseException as error:
+        errors.append(('autorzy', error))
+        engine.logger.error(f'ERROR: import autorów przerwany: {error!r}')
+    finally:
+        scheduler.authors_finished()
+
+
+def run_persons(engine:ImportEngine, total:int, scheduler:DependencyScheduler, errors:list):
+    """ wątek importu postaci zwalnianych przez harmonogram """
+    try:
+        engine.run(iter(scheduler.ready.get, END), total=total)
+    except BaseException as error:
+        errors.append(('postacie', error))
+        engine.logger.error(f'ERROR: import postaci przerwany: {error!r}')
+
+
+def parse_args(argv:list = None):
+    """ parametry wywołania """
+    parser = argparse.ArgumentParser(description='Równoczesny import autorów i postaci PSB do wikibase')
+    parser.add_argument('--authors', default='', help='parametry importu autorów (psb_autorzy.py)')
+    parser.add_argument('--persons', default='', help='parametry importu postaci (psb_postacie.py)')
+    parser.add_argument('--dry-run', action='store_true', help='bez zapisu do wikibase (test)')
+
+    return parser.parse_args(argv)
+
+
+def main(argv:list = None):
+    """ import autorów i postaci w dwóch wątkach """
+    start_time = time.time()
+    params = parse_args(argv)
+    common = ['--dry-run'] if params.dry_run else []
+
+    logger = set_logger(Path('..') / 'log' / 'psb_scheduler.log', name='psb_scheduler')
+    logger.info('POCZĄTEK IMPORTU (autorzy i postacie)')
+
+    configure_wbi()
+
+    # osobne pamięci podręczne wyszukiwania dla wątków (domyślnie obie klasy korzystają
+    # z instancji zdefiniowanej w RecordBuilder)
+    Autor.search_cache = SearchCache()
+    Postac.search_cache = SearchCache()
+
+    authors_engine, authors = prepare_engine(Autor, shlex.split(params.authors) + common, logger)
+    persons_engine, persons = prepare_engine(Postac, shlex.split(params.persons) + common, logger)
+
+    # indeks autorów uzupełniany w trakcie importu autorów
+    if Postac.autor_index is None:
+        Postac.autor_index = AutorIndex()
+    scheduler = DependencyScheduler(authors, persons, Postac.autor_index, logger)
+    logger.info(f'Autorzy: {len(authors)}, postacie: {len(persons)}, '
+                f'postacie czekające na autorów: {len(scheduler.waiting)}')
+
+    errors = []
+    threads = [threading.Thread(target=run_authors, name='autorzy',
+                                args=(authors_engine, authors, scheduler, errors)),
+               threading.Thread(target=run_persons, name='postacie',
+                                args=(persons_engine, len(persons), scheduler, errors))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    logger.info(f'Harmonogram: {scheduler.stats()}')
+    logger.info(elapsed(start_time))
+
+    return 1 if errors else 0
+
+
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+""" moduł: roboczy magazyn danych importu w bazie SQLite (opcjonalny)
+    zamiast wielokrotnego wczytywania dużych plików json i dziennika ID@QID:
+    records - rekordy wejściowe (json), qids - QID i wykonana akcja, status - stan rekordu,
+    hashes - skróty pól rekordów (--incremental), errors - błędy kontroli i zapisu
+    pliki json można wczytać do magazynu i wyeksportować z niego w dotychczasowym formacie
+"""
+import json
+import time
+import sqlite3
+from pathlib import Path
+from psb_io import iter_json_records, write_json_records, DRY_RUN_QID
+
+# liczba rekordów zapisywanych w jednej transakcji przy wczytywaniu pliku json
+BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS records_kind_position ON records (kind, position);
+CREATE INDEX IF NOT EXISTS records_name ON records (name);
+
+CREATE TABLE IF NOT EXISTS qids (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    qid TEXT NOT NULL,
+    action TEXT,
+    updated REAL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS qids_qid ON qids (qid);
+
+CREATE TABLE IF NOT EXISTS status (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated REAL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS status_status ON status (status);
+
+CREATE TABLE IF NOT EXISTS hashes (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    qid TEXT,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+
+CREATE TABLE IF NOT EXISTS errors (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    code TEXT NOT NULL,
+    message TEXT,
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS errors_id ON errors (kind, id);
+CREATE INDEX IF NOT EXISTS errors_code ON errors (code);
+"""
+
+
+class WorkingStore:
+    """ magazyn roboczy importu (jeden plik bazy dla autorów i postaci) """
+
+    def __init__(self, path:Path) -> None:
+        self.path = Path(path)
+        # procesy partii (--workers) korzystają z tej samej bazy, stąd tryb WAL i oczekiwanie na blokadę
+        self.connection = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """ zamknięcie bazy """
+        self.connection.commit()
+        self.connection.close()
+
+    def count(self, kind:str) -> int:
+        """ liczba rekordów danego rodzaju (persons, authors) """
+        return self.connection.execute('SELECT COUNT(*) FROM records WHERE kind = ?', (kind,)).fetchone()[0]
+
+    def import_json(self, path:Path, kind:str = 'persons') -> int:
+        """ wczytanie rekordów z pliku json (QID z rekordów trafiają do tabeli qids),
+            zwraca liczbę rekordów
+        """
+        counter = 0
+        batch = []
+        qids = []
+
+        def flush():
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO records (kind, id, position, name, data) VALUES (?, ?, ?, ?, ?)',
+                    batch)
+                self.connection.executemany(
+                    'INSERT OR IGNORE INTO qids (kind, id, qid, action, updated) VALUES (?, ?, ?, ?, ?)',
+                    qids)
+            batch.clear()
+            qids.clear()
+
+        now = time.time()
+        for position, record in enumerate(iter_json_records(path, kind)):
+            batch.append((kind, record['ID'], position, record.get('name', ''),
+                          json.dumps(record, ensure_ascii=False)))
+            if record.get('QID') and record['QID'] != DRY_RUN_QID:
+                qids.append((kind, record['ID'], record['QID'], '', now))
+            counter += 1
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        flush()
+
+        return counter
+
+    def ids(self, kind:str = 'persons') -> list:
+        """ identyfikatory rekordów w kolejności pozycji (podział na partie) """
+        return [row[0] for row in self.connection.execute(
+            'SELECT id FROM records WHERE kind = ? ORDER BY position', (kind,))]
+
+    def iter_records(self, kind:str = 'persons', start:int = 0):
+        """ generator zwracający (pozycja, rekord), rekord z QID z tabeli qids (bez QID
+            z trybu testowego)
+        """
+        cursor = self.connection.execute(
+            'SELECT r.position, r.data, q.qid FROM records r '
+            'LEFT JOIN qids q ON q.kind = r.kind AND q.id = r.id '
+            'WHERE r.kind = ? AND r.position >= ? ORDER BY r.position', (kind, start))
+        for position, data, qid in cursor:
+            record = json.loads(data)
+            if qid and qid != DRY_RUN_QID:
+                record['QID'] = qid
+            elif record.get('QID') == DRY_RUN_QID:
+                del record['QID']
+            yield position, record
+
+    def export_json(self, path:Path, kind:str = 'persons') -> int:
+        """ zapis rekordów z QID w formacie pliku wejściowego (np. postacie_qid.json),
+            zwraca liczbę rekordów
+        """
+        return write_json_records(path, kind, (record for _, record in self.iter_records(kind)))
+
+    def set_qid(self, kind:str, identyfikator:str, qid:str, action:str = ''):
+        """ zapis QID i wykonanej akcji (dodano, aktualizacja), rekord otrzymuje stan 'done' """
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO qids (kind, id, qid, action, updated) VALUES (?, ?, ?, ?, ?)',
+                (kind, identyfikator, qid, action, now))
+            self.connection.execute(
+                'INSERT OR REPLACE INTO status (kind, id, status, updated) VALUES (?, ?, ?, ?)',
+                (kind, identyfikator, 'done', now))
+
+    def set_qids(self, kind:str, qids:dict, action:str = ''):
+        """ zbiorczy zapis QID (np. z dzienników poprzednich importów) """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO qids (kind, id, qid, action, updated) VALUES (?, ?, ?, ?, ?)',
+                [(kind, identyfikator, qid, action, now) for identyfikator, qid in qids.items()])
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO status (kind, id, status, updated) VALUES (?, ?, ?, ?)',
+                [(kind, identyfikator, 'done', now) for identyfikator in qids])
+
+    def set_status(self, kind:str, identyfikator:str, status:str):
+        """ zapis stanu rekordu (np. done, quarantine) """
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO status (kind, id, status, updated) VALUES (?, ?, ?, ?)',
+                (kind, identyfikator, status, time.time()))
+
+    def statuses(self, kind:str = 'persons') -> dict:
+        """ liczba rekordów wg stanu """
+        return dict(self.connection.execute(
+            'SELECT status, COUNT(*) FROM status WHERE kind = ? GROUP BY status', (kind,)))
+
+    def qids(self, kind:str = 'persons') -> dict:
+        """ słownik ID -> QID """
+        return dict(self.connection.execute('SELECT id, qid FROM qids WHERE kind = ?', (kind,)))
+
+    def actions(self, kind:str = 'persons') -> dict:
+        """ słownik ID -> (QID, akcja), jak dla dzienników ID@QID@akcja """
+        return {identyfikator: (qid, action or '') for identyfikator, qid, action
+                in self.connection.execute('SELECT id, qid, action FROM qids WHERE kind = ?', (kind,))}
+
+    def find_by_name(self, name:str, kind:str = 'persons') -> list:
+        """ identyfikatory rekordów o podanej nazwie """
+        return [row[0] for row in self.connection.execute(
+            'SELECT id FROM records WHERE kind = ? AND name = ?', (kind, name))]
+
+    def find_by_qid(self, qid:str, kind:str = 'persons') -> list:
+        """ identyfikatory rekordów z podanym QID """
+        return [row[0] for row in self.connection.execute(
+            'SELECT id FROM qids WHERE kind = ? AND qid = ?', (kind, qid))]
+
+    def set_hash(self, kind:str, identyfikator:str, qid:str, hash_value:str):
+        """ zapis skrótu pól rekordu (import przyrostowy) """
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO hashes (kind, id, qid, hash) VALUES (?, ?, ?, ?)',
+                                    (kind, identyfikator, qid, hash_value))
+
+    def hashes(self, kind:str = 'persons') -> dict:
+        """ słownik ID -> (QID, skrót), jak read_hashes dla plików skrótów """
+        return {identyfikator: (qid, hash_value) for identyfikator, qid, hash_value
+                in self.connection.execute('SELECT id, qid, hash FROM hashes WHERE kind = ?', (kind,))}
+
+    def add_errors(self, kind:str, errors:dict):
+        """ zapis błędów rekordów: słownik ID -> lista (kod, opis) """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO errors (kind, id, code, message, created) VALUES (?, ?, ?, ?, ?)',
+                [(kind, identyfikator, code, message, now)
+                 for identyfikator, rec_errors in errors.items() for code, message in rec_errors])
+
+    def errors(self, kind:str = 'persons') -> dict:
+        """ błędy rekordów: słownik ID -> lista (kod, opis) """
+        result = {}
+        for identyfikator, code, message in self.connection.execute(
+                'SELECT id, code, message FROM errors WHERE kind = ? ORDER BY rowid', (kind,)):
+            result.setdefault(identyfikator, []).append((code, message))
+
+        return result
+
+    def clear_errors(self, kind:str = 'persons'):
+        """ usunięcie błędów poprzedniej kontroli rekordów """
+        with self.connection:
+            self.connection.execute('DELETE FROM errors WHERE kind = ?', (kind,))
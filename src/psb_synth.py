@@ -0,0 +1,322 @@
+""" moduł: generator syntetycznych danych PSB (postacie i autorzy) do testów skali i obciążenia
+    rozkłady pól wzorowane na danych rzeczywistych: zapisy lat życia obsługiwane przez DateBDF,
+    warianty lat życia z deskryptorów BN, liczba wariantów nazwiska (bn_400), autorzy
+    wspólni dla wielu biogramów (rozkład potęgowy) i powtórzenia nazw postaci
+
+    pliki zapisywane strumieniowo (write_json_records), wynik zależy tylko od ziarna (seed)
+"""
+import random
+from pathlib import Path
+from psb_io import write_json_records
+
+FIRST_NAMES = ['Jan', 'Stanisław', 'Andrzej', 'Józef', 'Piotr', 'Krzysztof', 'Mikołaj', 'Wojciech',
+               'Tomasz', 'Franciszek', 'Adam', 'Marcin', 'Jakub', 'Michał', 'Aleksander', 'Paweł',
+               'Kazimierz', 'Maciej', 'Zygmunt', 'Ignacy', 'Antoni', 'Władysław', 'Bruno', 'Ludwik',
+               'Jerzy', 'Henryk', 'Karol', 'Feliks', 'Tadeusz', 'Stefan', 'Bolesław', 'Mieczysław',
+               'Bogusław', 'Zbigniew', 'Jacek', 'Walenty', 'Wincenty', 'Wawrzyniec', 'Bartłomiej', 'Szymon',
+               'Hieronim', 'Florian', 'Gabriel', 'Ambroży', 'Kasper', 'Melchior', 'Baltazar', 'Benedykt',
+               'Damian', 'Dominik', 'Eustachy', 'Fabian', 'Grzegorz', 'Hipolit', 'Julian', 'Konstanty',
+               'Leon', 'Łukasz', 'Marian', 'Onufry', 'Przecław', 'Rafał', 'Sebastian', 'Teodor',
+               'Anna', 'Maria', 'Katarzyna', 'Zofia', 'Barbara', 'Helena', 'Jadwiga', 'Elżbieta',
+               'Agnieszka', 'Aleksandra', 'Apolonia', 'Dorota', 'Eufrozyna', 'Franciszka', 'Gertruda',
+               'Izabela', 'Joanna', 'Julia', 'Konstancja', 'Ludwika', 'Magdalena', 'Marianna', 'Regina',
+               'Salomea', 'Teresa', 'Urszula', 'Weronika', 'Wanda']
+
+# nazwiska składane z części (rdzeń, wstawka, przyrostek), np. Bor-an-owski, Kras-ow-iec
+SURNAME_STEMS = ['Bor', 'Kras', 'Lip', 'Wol', 'Sob', 'Dob', 'Mar', 'Tarn', 'Gol', 'Zab', 'Kor', 'Rud',
+                 'Czern', 'Stan', 'Mił', 'Wys', 'Biel', 'Strzel', 'Szczyt', 'Grab', 'Dąbr', 'Jabł',
+                 'Ostr', 'Lesz', 'Chod', 'Gos', 'Ożar', 'Zamoj', 'Pot', 'Radz', 'Sap', 'Tęcz',
+                 'Kmit', 'Łas', 'Firl', 'Mniszk', 'Wiel', 'Kon', 'Jasł', 'Piask']
+
+SURNAME_INFIXES = ['', 'an', 'ow', 'el', 'ien', 'ul', 'at', 'ur', 'im', 'os', 'ar', 'ob', 'il', 'ysz',
+                   'ach', 'ęb']
+
+SURNAME_SUFFIXES = ['ski', 'owski', 'ewski', 'iński', 'owicz', 'ewicz', 'ak', 'ek', 'czyk', 'iec',
+                    'ko', 'uk', 'ała', 'ik']
+
+# opisy (pl, en) postaci i autorów
+DESCRIPTIONS = [('Polski inżynier, wynalazca.', 'Polish engineer, inventor.'),
+                ('Publicysta, działacz narodowy i polityczny.', 'Publicist, national and political activist.'),
+                ('Kasztelan, poseł na sejm.', 'Castellan, member of the Sejm.'),
+                ('Duchowny katolicki, biskup.', 'Catholic clergyman, bishop.'),
+                ('Malarz, rysownik.', 'Painter, draughtsman.'),
+                ('Lekarz, profesor Akademii Krakowskiej.', 'Physician, professor of the Kraków Academy.'),
+                ('Pisarz, poeta.', 'Writer, poet.'),
+                ('Wojskowy, pułkownik.', 'Soldier, colonel.'),
+                ('Kupiec, rajca krakowski.', 'Merchant, Kraków councillor.'),
+                ('Historyk, archiwista.', 'Historian, archivist.')]
+
+AUTHOR_DESCRIPTIONS = [('Historyk.', 'Historian.'),
+                       ('Historyk literatury.', 'Literary historian.'),
+                       ('Historyk sztuki.', 'Art historian.'),
+                       ('Archiwista, bibliotekarz.', 'Archivist, librarian.'),
+                       ('Historyk Kościoła.', 'Church historian.')]
+
+PLACES = ['Kraków', 'Warszawa', 'Lwów', 'Wilno', 'Poznań', 'Lublin', 'Gdańsk', 'Bolechów', 'Wiłkomierz']
+
+ROMAN_CENTURIES = {13: 'XIII', 14: 'XIV', 15: 'XV', 16: 'XVI', 17: 'XVII', 18: 'XVIII', 19: 'XIX',
+                   20: 'XX', 21: 'XXI'}
+
+MONTHS_ROMAN = ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X', 'XI', 'XII']
+
+# zapisy lat życia (pole years) i ich udział, wzorce obsługiwane przez DateBDF
+YEARS_FORMATS = [('range', 70), ('about', 6), ('death', 5), ('birth', 2), ('turn', 4),
+                 ('before_after', 3), ('century', 2), ('half_century', 1), ('day', 3),
+                 ('between', 1), ('question', 3)]
+
+# zapisy lat życia z deskryptorów BN (pole bn_years), brak pola - 'none'
+BN_YEARS_FORMATS = [('none', 45), ('same', 35), ('full', 6), ('circa', 5), ('question', 3),
+                    ('ante_post', 2), ('slash', 2), ('century_dots', 1), ('fl', 1)]
+
+# liczba wariantów nazwiska z BN (pole bn_400)
+ALIAS_COUNTS = [(0, 55), (1, 20), (2, 12), (3, 7), (4, 4), (6, 2)]
+
+# liczba autorów biogramu
+AUTHOR_COUNTS = [(1, 85), (2, 12), (3, 3)]
+
+
+def weighted(rnd:random.Random, choices:list):
+    """ losowanie wartości z listy par (wartość, waga) """
+    values = [x[0] for x in choices]
+    weights = [x[1] for x in choices]
+    return rnd.choices(values, weights=weights, k=1)[0]
+
+
+def life_years(rnd:random.Random) -> tuple:
+    """ rok urodzenia i śmierci """
+    birth = rnd.randint(1250, 1920)
+    death = birth + rnd.randint(18, 95)
+    return birth, min(death, 2010)
+
+
+def turn_text(year:int) -> str:
+    """ przełom lat, np. 1523/4, 1529/30 """
+    following = str(year + 1)
+    return f'{year}/{following[-1] if following[-1] != "0" else following[-2:]}'
+
+
+def years_text(rnd:random.Random, birth:int, death:int) -> str:
+    """ lata życia w jednym z zapisów PSB, np. '1852-1900', 'ok. 1520-1580', 'zm. 1523' """
+    kind = weighted(rnd, YEARS_FORMATS)
+    if kind == 'about':
+        return f'ok. {birth}-{death}'
+    if kind == 'death':
+        return f'zm. {death}'
+    if kind == 'birth':
+        return f'ur. {birth}'
+    if kind == 'turn':
+        return f'{turn_text(birth)}-{death}'
+    if kind == 'before_after':
+        return f'przed {birth}-po {death}'
+    if kind == 'century':
+        return f'{ROMAN_CENTURIES[death // 100 + 1]} w.'
+    if kind == 'half_century':
+        return f'{rnd.choice(["1", "2"])} poł. {ROMAN_CENTURIES[death // 100 + 1]} w.'
+    if kind == 'day':
+        return f'{rnd.randint(1, 28)} {rnd.choice(MONTHS_ROMAN)} {birth}-{death}'
+    if kind == 'between':
+        return f'między {birth} a {birth + 5}-{death}'
+    if kind == 'question':
+        return f'{birth}?-{death}'
+    return f'{birth}-{death}'
+
+
+def bn_years_text(rnd:random.Random, birth:int, death:int, years:str) -> str:
+    """ lata życia z deskryptora BN (pusty tekst - brak pola) """
+    kind = weighted(rnd, BN_YEARS_FORMATS)
+    if kind == 'same' and '-' in years and years.replace('-', '').isnumeric():
+        return f'({years})'
+    if kind == 'full':
+        return (f'({birth}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} - '
+                f'{death}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d})')
+    if kind == 'circa':
+        return f'(ca {birth}-{death})'
+    if kind == 'question':
+        return f'({birth}?-{death})'
+    if kind == 'ante_post':
+        return f'(ante {birth}-post {death})'
+    if kind == 'slash':
+        return f'({turn_text(birth)}-{death})'
+    if kind == 'century_dots':
+        return f'({str(birth)[:2]}..-{death})'
+    if kind == 'fl':
+        return f'(fl. ca {death - 20})'
+    return ''
+
+
+def exact_date(rnd:random.Random, year:int) -> str:
+    """ data w formacie pola date_of_birth postaci (DD-MM-RRRR, także z DD-MM) """
+    if rnd.random() < 0.6:
+        return f'DD-MM-{year}'
+    return f'{rnd.randint(1, 28):02d}-{rnd.randint(1, 12):02d}-{year}'
+
+
+def surname(rnd:random.Random) -> str:
+    """ nazwisko złożone z rdzenia, wstawki i przyrostka """
+    return rnd.choice(SURNAME_STEMS) + rnd.choice(SURNAME_INFIXES) + rnd.choice(SURNAME_SUFFIXES)
+
+
+def person_name(rnd:random.Random) -> tuple:
+    """ (imiona, nazwiska, nazwa) """
+    fnames = [rnd.choice(FIRST_NAMES)]
+    if rnd.random() < 0.25:
+        fnames.append(rnd.choice(FIRST_NAMES))
+    lnames = [surname(rnd)]
+    if rnd.random() < 0.05:
+        lnames.append(surname(rnd))
+    return fnames, lnames, ' '.join(fnames + lnames)
+
+
+def aliases(rnd:random.Random, fnames:list, lnames:list, count:int) -> list:
+    """ warianty nazwiska w zapisie BN, np. 'Abakanowicz, Bruno' """
+    result = []
+    lname = ' '.join(lnames)
+    forms = [f'{lname}, {" ".join(fnames)}',
+             f'{lname}, {fnames[0]}',
+             f'{lname}-{surname(rnd)}, {fnames[0]}',
+             f'{surname(rnd)} {lname}, {fnames[0]}',
+             f'{lname}, {fnames[0]} ({rnd.choice(PLACES)})']
+    for pos in range(count):
+        result.append(forms[pos % len(forms)] + ('' if pos < len(forms) else f' {pos}'))
+
+    return result
+
+
+def identifiers(rnd:random.Random) -> dict:
+    """ identyfikatory zewnętrzne (VIAF, BN), część rekordów bez identyfikatorów """
+    result = {}
+    if rnd.random() < 0.7:
+        prefix = rnd.choice(['https://viaf.org/viaf/', 'http://viaf.org/viaf/'])
+        result['viaf'] = f'{prefix}{rnd.randint(10000000, 999999999)}'
+    if rnd.random() < 0.7:
+        result['id_bn'] = f'98{rnd.randint(10 ** 13, 10 ** 14 - 1)}'
+    return result
+
+
+def generate_authors(rnd:random.Random, count:int) -> list:
+    """ rekordy autorów biogramów (format autorzy.json) """
+    authors = []
+    names = set()
+    while len(authors) < count:
+        fnames, lnames, name = person_name(rnd)
+        birth = rnd.randint(1850, 1960)
+        death = birth + rnd.randint(30, 90)
+        years = f'({birth}-{death})' if death < 2020 else f'(ur. {birth})'
+        # autorzy o tej samej nazwie różnią się latami życia
+        if (name, years) in names:
+            continue
+        names.add((name, years))
+        description_pl, description_en = rnd.choice(AUTHOR_DESCRIPTIONS)
+        volume = str(rnd.randint(1, 52))
+        record = {'name': name,
+                  'years': years,
+                  'bn_opis': description_pl,
+                  'description_en': description_en,
+                  'aliasy': [[alias, volume, f'{rnd.randint(1, 500)}'] for alias
+                             in aliases(rnd, fnames, lnames, weighted(rnd, ALIAS_COUNTS))],
+                  'date_of_birth': f'{birth}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}'
+                                   if rnd.random() < 0.4 else '',
+                  'date_of_death': f'{death}-00-00' if death < 2020 and rnd.random() < 0.4 else '',
+                  'volume': volume,
+                  'pages': f'{rnd.randint(1, 500)}',
+                  'ID': f'PSB-A-{len(authors) + 1:06d}'}
+        ids = identifiers(rnd)
+        if 'viaf' in ids:
+            record['viaf'] = ids['viaf']
+        if 'id_bn' in ids:
+            record['plwabn_id'] = ids['id_bn']
+            record['id_bn_a'] = f'a{ids["id_bn"][2:]}'
+        authors.append(record)
+
+    return authors
+
+
+def generate_persons(rnd:random.Random, count:int, authors:list, collisions:float = 0.03,
+                     volumes:int = 52):
+    """ generator rekordów postaci (format postacie.json), collisions - udział rekordów
+        z nazwą innej postaci (połowa z nich także z tym samym opisem, łącznie z latami życia -
+        kolizja pary etykieta-opis)
+    """
+    # autorzy wspólni dla wielu biogramów: waga autora maleje z jego pozycją (rozkład potęgowy)
+    author_weights = [1.0 / (pos + 1) ** 0.8 for pos in range(len(authors))]
+    cumulative = []
+    total = 0.0
+    for weight in author_weights:
+        total += weight
+        cumulative.append(total)
+
+    per_volume = max(count // volumes, 1)
+    width = max(4, len(str(per_volume + 1)))
+    recent = []  # próbka wcześniejszych postaci do powtórzeń nazw
+    for pos in range(count):
+        volume = min(pos // per_volume + 1, volumes)
+        number = pos - (volume - 1) * per_volume + 1
+        if recent and rnd.random() < collisions:
+            fnames, lnames, name, birth, death, years, description = rnd.choice(recent)
+            if rnd.random() < 0.5:
+                birth, death = life_years(rnd)
+                years = years_text(rnd, birth, death)
+                description = rnd.choice(DESCRIPTIONS)
+        else:
+            fnames, lnames, name = person_name(rnd)
+            birth, death = life_years(rnd)
+            years = years_text(rnd, birth, death)
+            description = rnd.choice(DESCRIPTIONS)
+
+        record = {'name': name,
+                  'years': f'({years})',
+                  'fnames': fnames,
+                  'lnames': lnames,
+                  'volume': str(volume),
+                  'autor': [],
+                  'publ_year': str(1935 + volume),
+                  'page': f's. {number}-{number + rnd.randint(1, 4)}',
+                  'date_of_birth': exact_date(rnd, birth),
+                  'date_of_death': exact_date(rnd, death),
+                  'place_of_birth': rnd.choice(PLACES),
+                  'description_pl': f'({years}) {description[0]}',
+                  'description_en': f'({years}) {description[1]}',
+                  'incipit': f'{" ".join(lnames)} {" ".join(fnames)} ({years}).',
+                  'ID': f'PSB-{volume:02d}-{number:0{width}d}'}
+
+        for _ in range(weighted(rnd, AUTHOR_COUNTS)):
+            autor = authors[rnd.choices(range(len(authors)), cum_weights=cumulative, k=1)[0]]
+            record['autor'].append({'autor_name': autor['name'], 'autor_years': autor['years']})
+            # część autorów zapisywana w PSB tylko tekstem
+            if rnd.random() < 0.02:
+                record['autor'][-1]['as_string'] = '1'
+
+        bn_years = bn_years_text(rnd, birth, death, years)
+        if bn_years:
+            record['bn_years'] = bn_years
+        record['bn_400'] = aliases(rnd, fnames, lnames, weighted(rnd, ALIAS_COUNTS))
+        record.update(identifiers(rnd))
+        if rnd.random() < 0.3:
+            record['wikidata'] = f'Q{rnd.randint(1000, 99999999)}'
+
+        entry = (fnames, lnames, name, birth, death, years, description)
+        if len(recent) < 10000:
+            recent.append(entry)
+        elif rnd.random() < 0.01:
+            recent[rnd.randrange(len(recent))] = entry
+
+        yield record
+
+
+def generate(output_dir:Path, persons:int = 10000, authors:int = None, collisions:float = 0.03,
+             seed:int = 1) -> tuple:
+    """ zapis plików postacie.json i autorzy.json w katalogu output_dir,
+        zwraca (liczba postaci, liczba autorów)
+    """
+    rnd = random.Random(seed)
+    if authors is None:
+        authors = max(persons // 8, 1)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    author_records = generate_authors(rnd, authors)
+    authors_count = write_json_records(output_dir / 'autorzy.json', 'authors', author_records)
+    persons_count = write_json_records(output_dir / 'postacie.json', 'persons',
+                                       generate_persons(rnd, persons, author_records, collisions))
+
+    return persons_count, authors_count
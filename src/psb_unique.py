@@ -0,0 +1,108 @@
+""" moduł: lokalny indeks unikalności par (etykieta, opis) w wikibase
+    wikibase odrzuca nowy element, którego etykieta i opis w danym języku są takie same
+    jak w istniejącym elemencie, kolizje wykrywane są więc przed zapisem
+"""
+from logging import Logger
+
+# liczba wyników jednego zapytania SPARQL przy wczytywaniu indeksu
+PAGE_SIZE = 50000
+
+
+def unique_key(language:str, label:str, description:str) -> tuple:
+    """ klucz indeksu: język, etykieta, opis (bez skrajnych spacji) """
+    return (language, label.strip(), description.strip())
+
+
+class UniquenessIndex:
+    """ indeks (język, etykieta, opis) -> QID """
+
+    def __init__(self) -> None:
+        self.index = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, language:str, label:str, description:str, qid:str):
+        """ dodaje parę etykieta-opis elementu """
+        if label and description and qid:
+            self.index[unique_key(language, label, description)] = qid
+
+    def find(self, language:str, label:str, description:str) -> str:
+        """ QID elementu o podanej etykiecie i opisie lub pusty tekst """
+        return self.index.get(unique_key(language, label, description), '')
+
+    def load_from_wikibase(self, languages:tuple = ('pl', 'en'), instance_of:tuple = None,
+                           page_size:int = PAGE_SIZE) -> int:
+        """ wczytuje etykiety i opisy elementów z wikibase (SPARQL), opcjonalnie tylko
+            elementów będących instancją (właściwość, QID), zwraca liczbę wczytanych par,
+            strony wyników (LIMIT/OFFSET) wymagają stałej kolejności (ORDER BY ?item)
+        """
+        # import w metodzie: indeks można budować i używać bez WikibaseIntegrator
+        from wikibaseintegrator import wbi_helpers
+        from psb_reconcile import sparql_prefix
+
+        counter = 0
+        instance_filter = ''
+        if instance_of:
+            instance_filter = f'?item wdt:{instance_of[0]} wd:{instance_of[1]} .'
+        for language in languages:
+            offset = 0
+            while True:
+                query = f"""
+                    SELECT ?item ?label ?description WHERE {{
+                        {instance_filter}
+                        ?item rdfs:label ?label ; schema:description ?description .
+                        FILTER(LANG(?label) = "{language}" && LANG(?description) = "{language}")
+                    }} ORDER BY ?item LIMIT {page_size} OFFSET {offset}"""
+                results = wbi_helpers.execute_sparql_query(query, prefix=sparql_prefix())
+                bindings = results['results']['bindings']
+                for row in bindings:
+                    qid = row['item']['value'].split('/')[-1]
+                    self.add(language, row['label']['value'], row['description']['value'], qid)
+                counter += len(bindings)
+                if len(bindings) < page_size:
+                    break
+                offset += page_size
+
+        return counter
+
+
+def resolve_collisions(records:list, builder_class, unique_index:UniquenessIndex,
+                       logger_object:Logger) -> int:
+    """ wykrywa kolizje etykieta-opis nowych rekordów (bez QID) z elementami w wikibase
+        i z innymi rekordami tej samej partii, zgodność pierwszej pary (język podstawowy)
+        z elementem wikibase lub wcześniejszym rekordem partii oznacza tę samą postać
+        (rekord zostanie dopasowany do tego elementu, wcześniejszy rekord po zapisie trafia
+        do indeksu - ImportEngine.record), opis uzupełniany przez builder_class.disambiguate
+        otrzymują tylko rekordy, których para w innym języku należy do innej postaci,
+        zwraca liczbę zmienionych rekordów
+    """
+    batch = {}  # klucz -> (pierwsza para rekordu, który zajął klucz, ID rekordu)
+    counter = 0
+    for record in records:
+        if record.get('QID'):
+            continue
+        keys = builder_class.unique_keys(record)
+        if not keys:
+            continue
+        primary = unique_key(*keys[0])
+        matched_qid = unique_index.find(*keys[0])
+        changed = False
+        for language, label, description in keys:
+            key = unique_key(language, label, description)
+            existing_qid = unique_index.find(language, label, description)
+            owner, owner_id = batch.get(key, (primary, ''))
+            if (existing_qid and existing_qid != matched_qid) or owner != primary:
+                builder_class.disambiguate(record, language)
+                changed = True
+                logger_object.info(f"Kolizja etykiety i opisu ({language}): {record['ID']} "
+                                   f"z {existing_qid or owner_id}, zmieniony opis")
+            else:
+                batch.setdefault(key, (primary, record['ID']))
+        if changed:
+            counter += 1
+            # zmieniony opis może kolidować z kolejnymi rekordami
+            for language, label, description in builder_class.unique_keys(record):
+                batch.setdefault(unique_key(language, label, description), (primary, record['ID']))
+
+    return counter
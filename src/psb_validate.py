@@ -0,0 +1,206 @@
+""" moduł: kontrola rekordów przed importem (bez połączenia z wikibase)
+    wykrywa dane, które zostałyby odrzucone przez wikibase lub przerwałyby import
+    (puste teksty - not-recognized-string, za długie etykiety i opisy, błędne daty)
+"""
+import re
+import json
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from psbtools import years_to_dates, check_time, join_description, viaf_id
+
+# limity domyślnej konfiguracji wikibase
+MAX_LABEL_LENGTH = 250
+MAX_STRING_LENGTH = 400
+
+# liczba rekordów przekazywanych jednorazowo do procesu kontroli
+CHUNK_SIZE = 500
+
+
+def _check_text(errors:list, code:str, name:str, value:str, max_length:int, required:bool = True):
+    """ kontrola pojedynczego tekstu: pusty lub za długi """
+    value = str(value).strip()
+    if not value:
+        if required:
+            errors.append((f'empty-{code}', f'pusta wartość: {name}'))
+    elif len(value) > max_length:
+        errors.append((f'{code}-too-long', f'{name}: {len(value)} znaków (limit {max_length})'))
+
+
+def _check_identifiers(errors:list, record:dict):
+    """ kontrola formatu identyfikatorów zewnętrznych """
+    viaf = viaf_id(record.get('viaf', ''))
+    if viaf and not viaf.isnumeric():
+        errors.append(('bad-identifier', f'VIAF: "{viaf}"'))
+    plwabn_id = str(record.get('plwabn_id', '') or record.get('id_bn', '')).strip()
+    if plwabn_id and not plwabn_id.isnumeric():
+        errors.append(('bad-identifier', f'PLWABN ID: "{plwabn_id}"'))
+    wikidata = str(record.get('wikidata', '')).strip()
+    if wikidata and not re.match(r'^Q\d+$', wikidata):
+        errors.append(('bad-identifier', f'Wikidata ID: "{wikidata}"'))
+
+
+def _check_years(errors:list, years:str):
+    """ kontrola lat życia z listy BB (DateBDF) """
+    years = years.replace('(', '').replace(')', '').strip()
+    try:
+        dates = [x for x in years_to_dates(years) if x]
+    except Exception as error:
+        errors.append(('bad-date', f'lata "{years}": {error}'))
+        return
+
+    for date in dates:
+        if date.type not in ('B', 'D', 'F'):
+            errors.append(('bad-date', f'lata "{years}": nieokreślony typ daty'))
+        for value in date.time_values():
+            message = check_time(value)
+            if message:
+                errors.append(('bad-date', f'lata "{years}": {message}'))
+
+
+def _check_bn_years(errors:list, bn_years:str):
+    """ kontrola lat życia z deskryptora BN (wzorce przerywające Postac.date_from_bn) """
+    bn_years = bn_years.replace('(', '').replace(')', '')
+    if not bn_years:
+        return
+    if 'fl. ca' in bn_years or 'czynny ok.' in bn_years:
+        value = bn_years.replace('fl. ca', '').replace('czynny ok.', '').strip()
+        if len(value) == 5 and value.endswith('%'):
+            errors.append(('bad-bn-date', f'lata BN "{bn_years}": nieobsługiwany zapis'))
+        return
+    separator = ' - ' if bn_years.count('-') > 1 else '-'
+    if len(bn_years.split(separator)) < 2:
+        errors.append(('bad-bn-date', f'lata BN "{bn_years}": brak zakresu dat'))
+
+
+def validate_person(record:dict) -> list:
+    """ kontrola rekordu postaci, zwraca listę błędów (kod, opis) """
+    errors = []
+    name = record.get('name', '')
+    description_pl = str(record.get('description_pl', '')).strip()
+    _check_text(errors, 'label', 'etykieta', name, MAX_LABEL_LENGTH)
+    _check_text(errors, 'description', 'opis pl', description_pl, MAX_LABEL_LENGTH, required=False)
+    _check_text(errors, 'description', 'opis en', record.get('description_en', ''), MAX_LABEL_LENGTH,
+                required=False)
+    if name and name.strip() == description_pl:
+        errors.append(('label-equals-description', 'etykieta taka sama jak opis'))
+
+    # kwalifikatory deklaracji 'described by source' (String, MonolingualText)
+    _check_text(errors, 'string', 'tom', record.get('volume', ''), MAX_STRING_LENGTH)
+    _check_text(errors, 'string', 'strony', record.get('page', ''), MAX_STRING_LENGTH)
+    _check_text(errors, 'string', 'incipit', record.get('incipit', ''), MAX_STRING_LENGTH)
+    for autor in record.get('autor', []) or []:
+        if autor.get('as_string', '') == '1':
+            _check_text(errors, 'string', 'autor', autor.get('autor_name', ''), MAX_STRING_LENGTH)
+
+    # aliasy i deklaracje 'stated as'
+    for alias in record.get('bn_400', []) or []:
+        _check_text(errors, 'alias', 'alias', alias, MAX_LABEL_LENGTH)
+
+    _check_identifiers(errors, record)
+    _check_years(errors, record.get('years', ''))
+    _check_bn_years(errors, record.get('bn_years', ''))
+
+    return errors
+
+
+def validate_author(record:dict) -> list:
+    """ kontrola rekordu autora, zwraca listę błędów (kod, opis) """
+    errors = []
+    years = record.get('years', '')
+    _check_text(errors, 'label', 'etykieta', record.get('name', ''), MAX_LABEL_LENGTH)
+    _check_text(errors, 'description', 'opis pl', join_description(years, record.get('bn_opis', '')),
+                MAX_LABEL_LENGTH, required=False)
+    _check_text(errors, 'description', 'opis en', join_description(years, record.get('description_en', '')),
+                MAX_LABEL_LENGTH, required=False)
+
+    # referencja do tomu PSB (String)
+    if record.get('volume', ''):
+        _check_text(errors, 'string', 'strony', record.get('pages', ''), MAX_STRING_LENGTH)
+    for alias in record.get('aliasy', []) or []:
+        alias_name, alias_volume, alias_pages = alias
+        _check_text(errors, 'alias', 'alias', alias_name, MAX_LABEL_LENGTH)
+        if alias_volume:
+            _check_text(errors, 'string', 'strony aliasu', alias_pages, MAX_STRING_LENGTH)
+
+    for field in ('date_of_birth', 'date_of_death'):
+        value = record.get(field, '')
+        if value and not re.match(r'^\d{4}-\d{2}-\d{2}$', value):
+            errors.append(('bad-date', f'{field}: "{value}"'))
+
+    _check_identifiers(errors, record)
+
+    return errors
+
+
+def validate_chunk(records:list, key:str = 'persons') -> list:
+    """ kontrola listy rekordów, zwraca listę (ID, błędy) dla rekordów z błędami """
+    validate = validate_person if key == 'persons' else validate_author
+    result = []
+    for record in records:
+        errors = validate(record)
+        if errors:
+            result.append((record.get('ID', ''), errors))
+
+    return result
+
+
+def validate_records(records, key:str = 'persons', workers:int = None) -> dict:
+    """ równoległa kontrola rekordów, zwraca słownik ID -> lista błędów (kod, opis) """
+    chunks = []
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= CHUNK_SIZE:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+
+    result = {}
+    if len(chunks) <= 1 or workers == 1:
+        for chunk in chunks:
+            result.update(validate_chunk(chunk, key))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_result in executor.map(validate_chunk, chunks, [key] * len(chunks)):
+                result.update(chunk_result)
+
+    return result
+
+
+def write_report(errors:dict, records:list, report_path:Path, quarantine_path:Path, key:str = 'persons'):
+    """ zapis raportu (liczba błędów wg kodu, błędy rekordów) i pliku kwarantanny
+        (rekordy z błędami w formacie pliku wejściowego, do poprawienia i ponownego importu)
+    """
+    counts = {}
+    for rec_errors in errors.values():
+        for code, _ in rec_errors:
+            counts[code] = counts.get(code, 0) + 1
+
+    if report_path:
+        report = {'records': len(records),
+                  'rejected': len(errors),
+                  'codes': dict(sorted(counts.items())),
+                  'errors': {identyfikator: [{'code': code, 'message': message}
+                                             for code, message in rec_errors]
+                             for identyfikator, rec_errors in errors.items()}}
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+    if quarantine_path:
+        quarantine = [record for record in records if record.get('ID', '') in errors]
+        with open(quarantine_path, 'w', encoding='utf-8') as f:
+            json.dump({key: quarantine}, f, indent=4, ensure_ascii=False)
+
+    return counts
+
+
+def read_quarantine(path:Path, key:str = 'persons') -> set:
+    """ identyfikatory rekordów z pliku kwarantanny """
+    path = Path(path)
+    if not path.exists():
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        json_data = json.load(f)
+
+    return {record.get('ID', '') for record in json_data.get(key, [])}
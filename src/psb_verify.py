@@ -0,0 +1,136 @@
+""" moduł: weryfikacja przypisania QID po imporcie (postacie_qid.json, autorzy_qid.json,
+    dzienniki ID@QID) - zbiorcze pobranie elementów (wbgetentities, 50 w zapytaniu)
+    w kilku wątkach i raport rozbieżności
+"""
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from psb_lookup import fetch_entities, entity_text, CHUNK_SIZE
+from psb_reconcile import record_identifiers, P_WIKIDATA_ID
+
+# właściwości i elementy w testowej instancji wikibase
+P_INSTANCE_OF = 'P459'
+P_DESCRIBED_BY_SOURCE = 'P425'
+Q_HUMAN = 'Q229050'
+Q_PSB_ITEM = 'Q315332'
+
+# oczekiwane deklaracje (właściwość, QID) dla rodzaju rekordów
+EXPECTED_CLAIMS = {'persons': [(P_INSTANCE_OF, Q_HUMAN), (P_DESCRIBED_BY_SOURCE, Q_PSB_ITEM)],
+                   'authors': [(P_INSTANCE_OF, Q_HUMAN)]}
+
+# identyfikatory zewnętrzne niezapisywane przez import danego rodzaju rekordów
+SKIPPED_IDENTIFIERS = {'persons': set(), 'authors': {P_WIKIDATA_ID}}
+
+# kody ostrzeżeń - odnotowywane w raporcie, ale nie oznaczają błędnego importu
+# (np. kilka biogramów tej samej postaci z jednym elementem)
+WARNING_CODES = {'shared-qid'}
+
+
+def claim_values(entity:dict, prop:str) -> set:
+    """ wartości deklaracji właściwości prop (QID elementów lub teksty) """
+    result = set()
+    for claim in entity.get('claims', {}).get(prop, []):
+        datavalue = claim.get('mainsnak', {}).get('datavalue')
+        if not datavalue:
+            continue
+        value = datavalue.get('value')
+        result.add(value.get('id', '') if isinstance(value, dict) else str(value))
+
+    return result
+
+
+def same_person(record:dict, other:dict) -> bool:
+    """ rekordy o tej samej nazwie i latach życia (np. kilka biogramów jednej postaci) """
+    return (' '.join(record.get('name', '').split()) == ' '.join(other.get('name', '').split())
+            and record.get('years', '').strip() == other.get('years', '').strip())
+
+
+def verify_record(record:dict, entity:dict, key:str = 'persons') -> list:
+    """ porównanie rekordu z elementem wikibase, zwraca listę rozbieżności (kod, opis) """
+    if entity is None:
+        return [('missing-item', f"brak elementu {record['QID']}")]
+
+    errors = []
+    label = entity_text(entity, 'labels')
+    if label != record.get('name', '').strip():
+        errors.append(('label', f"etykieta: \"{label}\", oczekiwana: \"{record.get('name', '')}\""))
+
+    for prop, value in EXPECTED_CLAIMS[key]:
+        if value not in claim_values(entity, prop):
+            errors.append(('claim', f'brak deklaracji {prop}: {value}'))
+
+    for prop, value in record_identifiers(record).items():
+        if prop in SKIPPED_IDENTIFIERS[key]:
+            continue
+        if value not in claim_values(entity, prop):
+            errors.append(('identifier', f'brak identyfikatora {prop}: {value}'))
+
+    return errors
+
+
+def verify_records(records:list, key:str = 'persons', journal:dict = None, workers:int = 4,
+                   chunk_size:int = CHUNK_SIZE) -> tuple:
+    """ weryfikacja rekordów z QID (z pliku lub dziennika ID -> QID),
+        zwraca (liczba sprawdzonych rekordów, słownik ID -> lista rozbieżności)
+    """
+    journal = journal or {}
+    errors = {}
+    checked = []
+    qid_owner = {}
+    for record in records:
+        identyfikator = record.get('ID', '')
+        qid = record.get('QID', '')
+        journal_qid = journal.get(identyfikator, '')
+        if qid and journal_qid and qid != journal_qid:
+            errors.setdefault(identyfikator, []).append(
+                ('journal-mismatch', f'QID w pliku: {qid}, w dzienniku: {journal_qid}'))
+        qid = qid or journal_qid
+        if not qid or not qid.startswith('Q'):
+            continue
+        owner = qid_owner.setdefault(qid, record)
+        if owner is not record:
+            code = 'shared-qid' if same_person(record, owner) else 'duplicate-qid'
+            errors.setdefault(identyfikator, []).append(
+                (code, f"QID {qid} przypisany także do {owner.get('ID', '')}"))
+        checked.append(dict(record, QID=qid))
+
+    qids = sorted({record['QID'] for record in checked})
+    chunks = [qids[pos:pos + chunk_size] for pos in range(0, len(qids), chunk_size)]
+    entities = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(lambda x: fetch_entities(x, props='labels|claims', languages='pl',
+                                                            chunk_size=chunk_size), chunks):
+            entities.update(result)
+
+    for record in checked:
+        rec_errors = verify_record(record, entities.get(record['QID']), key)
+        if rec_errors:
+            errors.setdefault(record['ID'], []).extend(rec_errors)
+
+    return len(checked), errors
+
+
+def discrepancies(errors:dict) -> dict:
+    """ rekordy z rozbieżnościami innymi niż ostrzeżenia (WARNING_CODES) """
+    return {identyfikator: rec_errors for identyfikator, rec_errors in errors.items()
+            if any(code not in WARNING_CODES for code, _ in rec_errors)}
+
+
+def write_verify_report(path:Path, records_count:int, checked:int, errors:dict) -> dict:
+    """ zapis raportu rozbieżności (układ jak raport kontroli danych), zwraca liczby wg kodu """
+    counts = {}
+    for rec_errors in errors.values():
+        for code, _ in rec_errors:
+            counts[code] = counts.get(code, 0) + 1
+
+    report = {'records': records_count,
+              'checked': checked,
+              'discrepancies': len(discrepancies(errors)),
+              'codes': dict(sorted(counts.items())),
+              'errors': {identyfikator: [{'code': code, 'message': message}
+                                         for code, message in rec_errors]
+                         for identyfikator, rec_errors in errors.items()}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    return counts
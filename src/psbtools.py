@@ -1,14 +1,20 @@
 """ moduł """
-import sys
 import re
+import time
 import roman as romenum
-from wikibaseintegrator.datatypes import Time, Item
-from wikibaseintegrator.wbi_enums import WikibaseDatePrecision
+import psb_branches
 
 
 class DateBDF:
     """ obługa daty urodzenia, śmierci lub flourit """
 
+    # flagi rozróżniające warianty gałęzi find_date w licznikach (--branch-stats),
+    # np. year:before, range:between, roman:first-half
+    BRANCH_FLAGS = (('between', 'between'), ('or_date', 'or'), ('before', 'before'),
+                    ('after', 'after'), ('about', 'about'), ('first_half', 'first-half'),
+                    ('second_half', 'second-half'), ('first_quarter', 'first-quarter'),
+                    ('beginning_of', 'beginning'), ('middle_of', 'middle'), ('end_of', 'end'))
+
     # uaktualnić dla instancji testowej/docelowej!
     P_SOURCING_CIRCUMSTANCES = 'P502'
     P_REFINE_DATE = 'P490'
@@ -49,6 +55,8 @@ class DateBDF:
         self.end_of = False
         self.first_quarter = False
         self.somevalue = False
+        self.branch = ''                   # gałąź find_date (liczniki --branch-stats)
+        start = time.perf_counter() if psb_branches.enabled else 0.0
         self.roman = self.roman_numeric()
         if not self.type:
             self.find_type()
@@ -56,6 +64,14 @@ class DateBDF:
         self.find_date()
         if not self.certain and (self.before or self.after or self.between):
             self.somevalue = True
+        if psb_branches.enabled:
+            psb_branches.record('DateBDF', self.branch_label(), time.perf_counter() - start, self.text_org,
+                                [name for name, value in vars(self).items() if value is True])
+
+
+    def branch_label(self) -> str:
+        """ gałąź find_date z flagami zmieniającymi interpretację daty """
+        return ':'.join([self.branch] + [name for attr, name in self.BRANCH_FLAGS if getattr(self, attr)])
 
 
     def find_type(self):
@@ -171,9 +187,11 @@ class DateBDF:
         # XVI w.
         if self.roman:
             matches = [x.group() for x in re.finditer(r'[IVX]{1,5}', self.text_org)]
+            self.branch = 'roman'
             if len(matches) == 1:
                 self.date = str(romenum.fromRoman(matches[0]))
             elif len(matches) == 2:
+                self.branch = 'roman-range'
                 matches = [str(romenum.fromRoman(x)) for x in matches]
                 self.date = matches[0]
                 self.date_2 = matches[1]
@@ -182,6 +200,7 @@ class DateBDF:
                     self.somevalue = True
         # 1523/4
         elif self.turn:
+            self.branch = 'turn'
             match = re.search(r'\d{3,4}/\d{1,2}', self.text)
             if match:
                 v_list = match.group().split('/')
@@ -192,6 +211,7 @@ class DateBDF:
         # zwykłe daty (jeszcze obsługa dat dziennych i miesięcznych do zrobienia)
         else:
             if 'w okresie II wojny światowej' in self.text_org:
+                self.branch = 'ii-wojna'
                 self.date = '1939'
                 self.date_2 = '1945'
             else:
@@ -199,6 +219,7 @@ class DateBDF:
                 pattern_test = r'\d{1,2}\s+[IVX]{1,4}\s+\d{4}'
                 match = re.search(pattern_test, self.text_org)
                 if match:
+                    self.branch = 'day-month-year'
                     t_match = match.group().split(' ')
                     y = t_match[2]
                     m = str(romenum.fromRoman(t_match[1]))
@@ -218,11 +239,13 @@ class DateBDF:
 
                     pattern = r'\d{3,4}'
                     matches = [x.group() for x in re.finditer(pattern, self.text)]
+                    self.branch = ('month-year' if m else 'year') if matches else 'none'
                     if len(matches) == 1:
                         self.date = matches[0]
                         if len(m) == 1:
                             self.date += '-'+ m[0]
                     elif len(matches) > 1:
+                        self.branch = 'month-range' if m else 'range'
                         self.date = matches[0]
                         if len(m) > 1:
                             self.date += '-'+ m[0]
@@ -257,8 +280,11 @@ class DateBDF:
 
         return result
 
-    def time_from_string(self, value:str, prop: str, ref:list=None, qlf_list:list=None) -> Time:
+    def time_from_string(self, value:str, prop: str, ref:list=None, qlf_list:list=None):
         """ przekształca datę na time oczekiwany przez wikibase """
+        # import w metodzie: analiza dat (parse-dates, validate) działa bez WikibaseIntegrator
+        from wikibaseintegrator.datatypes import Time
+        from wikibaseintegrator.wbi_enums import WikibaseDatePrecision
 
         if value == 'somevalue':
             return Time(prop_nr=prop, time=None, snaktype='somevalue',
@@ -286,8 +312,7 @@ class DateBDF:
                     elif precision_str == '11':
                         precision = WikibaseDatePrecision.DAY
                 else:
-                    print('ERROR: time_from_string - ', value)
-                    sys.exit(1)
+                    raise ValueError(f'time_from_string: nieprawidłowa data: {value}')
 
             tmp = value.split('-')
             year = tmp[0].zfill(4)
@@ -317,8 +342,10 @@ class DateBDF:
                     references=ref, qualifiers=qlf_list)
 
 
-    def prepare_st(self, ref=None):
-        """ tworzy deklaracje (statements) na podstawie daty"""
+    def _print_dates(self) -> tuple:
+        """ daty w formacie dla time_from_string: (data, data 2, data kwalifikatora,
+            data 2 kwalifikatora), puste jeżeli nie występują
+        """
         print_date = print_date_2 = print_kw_date = print_kw_date_2 = ''
 
         if self.somevalue:
@@ -330,6 +357,31 @@ class DateBDF:
             if self.or_date or self.turn:
                 print_date_2 = self._format_date(self.date_2)
 
+        return print_date, print_date_2, print_kw_date, print_kw_date_2
+
+
+    def time_values(self) -> list:
+        """ daty, które zostaną przekazane do time_from_string przez prepare_st
+            (do kontroli przed zapisem w wikibase)
+        """
+        print_date, print_date_2, print_kw_date, print_kw_date_2 = self._print_dates()
+        result = [print_date]
+        if self.or_date or self.turn:
+            result.append(print_date_2)
+        if self.after or self.before or self.between:
+            result.append(print_kw_date)
+        if (self.before and self.after) or self.between:
+            result.append(print_kw_date_2)
+
+        return result
+
+
+    def prepare_st(self, ref=None):
+        """ tworzy deklaracje (statements) na podstawie daty"""
+        from wikibaseintegrator.datatypes import Item
+
+        print_date, print_date_2, print_kw_date, print_kw_date_2 = self._print_dates()
+
         if self.type == 'B':
             print_type = self.P_DATE_OF_BIRTH
         elif self.type == 'D':
@@ -337,8 +389,7 @@ class DateBDF:
         elif self.type == 'F':
             print_type = self.P_FLORUIT
         else:
-            print('ERROR: nieokreślony typ daty:', self.date, self.date_2)
-            sys.exit(1)
+            raise ValueError(f'nieokreślony typ daty: {self.date} {self.date_2}')
 
         qualifier_list = []
         statement = statement_2 = None
@@ -403,3 +454,63 @@ class DateBDF:
                                           ref=ref,
                                           qlf_list=qualifier_list)
         return statement, statement_2
+
+
+def years_to_dates(years:str) -> tuple:
+    """ lata życia postaci (bez nawiasów) jako obiekty DateBDF: (data 1, data 2),
+        np. '1852-1900' -> (B, D), 'zm. 1523' -> (D, None), None gdy brak daty
+    """
+    separator = ',' if ',' in years else '-'
+    date_of_1 = date_of_2 = None
+    # jeżeli zakres dat
+    if separator in years:
+        tmp = years.split(separator)
+        date_of_1 = DateBDF(tmp[0].strip(), 'B')
+        date_of_2 = DateBDF(tmp[1].strip(), 'D')
+    # jeżeli tylko jedna z dat lub ogólny opis np. XVII wiek
+    else:
+        if years:
+            date_of_1 = DateBDF(years, '')
+
+    return date_of_1, date_of_2
+
+
+def check_time(value:str) -> str:
+    """ kontrola daty w formacie time_from_string (+1839-00-00T00:00:00Z/11 lub somevalue),
+        zwraca opis błędu lub pusty tekst
+    """
+    if value == 'somevalue':
+        return ''
+    match = re.match(r'^\+(\d{4})-(\d{2})-(\d{2})T00:00:00Z/(\d{1,2})$', value)
+    if not match:
+        return f'nieprawidłowy format daty: "{value}"'
+    month = int(match.group(2))
+    day = int(match.group(3))
+    precision = int(match.group(4))
+    if month > 12 or day > 31:
+        return f'nieprawidłowa data: "{value}"'
+    if precision < 7 or precision > 11:
+        return f'nieprawidłowa precyzja daty: "{value}"'
+
+    return ''
+
+
+def join_description(years:str, text:str) -> str:
+    """ opis złożony z lat życia i tekstu (np. z BN), tekst od małej litery i bez kropki na końcu """
+    result = years
+    if text:
+        text = text[0].lower() + text[1:]
+        if text.endswith('.'):
+            text = text[:-1]
+        result += ' ' + text
+        result = result.strip()
+
+    return result
+
+
+def viaf_id(value:str) -> str:
+    """ identyfikator VIAF z adresu np. https://viaf.org/viaf/162012354 """
+    value = str(value).strip()
+    if 'https' in value:
+        return value.replace('https://viaf.org/viaf/','').replace(r'/','')
+    return value.replace('http://viaf.org/viaf/','').replace(r'/','')
@@ -0,0 +1,71 @@
+""" testy: indeks autorów i dopasowanie przybliżone (psb_autor_index) """
+from psb_autor_index import AutorIndex, match_score, trigrams, fold_name, parse_years
+from psb_autor_index import description_has_years
+
+
+def grams(name):
+    return trigrams(fold_name(name))
+
+
+def test_parse_years():
+    assert parse_years('(1882-1951)') == (1882, 1951)
+    assert parse_years('(1950- )') == (1950, None)
+    assert parse_years('zm. 1944') == (None, 1944)
+
+
+def test_match_score():
+    exact = match_score(grams('Jan Nowak'), (1882, 1951), grams('Jan Nowak'), (1882, 1951))
+    close = match_score(grams('Jan Nowak'), (1882, 1951), grams('Jan Nowak'), (1883, 1951))
+    unknown = match_score(grams('Jan Nowak'), (None, None), grams('Jan Nowak'), (1882, 1951))
+
+    assert exact == 1.0
+    assert unknown < close < exact
+    # sprzeczne lata życia wykluczają dopasowanie
+    assert match_score(grams('Jan Nowak'), (1700, 1750), grams('Jan Nowak'), (1882, 1951)) == 0.0
+
+
+def test_autor_index_match():
+    index = AutorIndex()
+    index.add('Władysław Konopczyński', '(1880-1952)', 'Q1')
+    index.add('Jan Nowak', '(1850-1900)', 'Q2')
+    index.add('Jan Nowak', '(1900-1960)', 'Q3')
+
+    assert index.match('Władysław Konopczyński', '(1880-1952)') == ('Q1', 1.0)
+    # bez znaków diakrytycznych i z rokiem różniącym się o 1
+    qid, score = index.match('Wladyslaw Konopczynski', '(1881-1952)')
+    assert qid == 'Q1' and score < 1.0
+    # imiennicy bez lat życia - dopasowanie niejednoznaczne
+    assert index.match('Jan Nowak', '')[0] == ''
+    assert index.match('Jan Nowak', '(1900-1960)')[0] == 'Q3'
+
+
+def test_autor_index_skips_test_qids():
+    index = AutorIndex()
+    index.add('Jan Nowak', '(1850-1900)', 'TEST')
+
+    assert len(index) == 0
+
+
+def test_description_has_years():
+    assert description_has_years('(1882-1951) historyk', '(1882-1951)')
+    assert description_has_years('historyk, ur. 1882, zm. 1951', '1882-1951')
+    assert not description_has_years('historyk (1890-1951)', '(1882-1951)')
+
+
+def test_autor_index_threads():
+    """ równoczesne dodawanie i dopasowanie z wielu wątków """
+    from concurrent.futures import ThreadPoolExecutor
+
+    index = AutorIndex()
+
+    def worker(number):
+        name = f'Jan Nowak{number}'
+        index.add(name, '(1850-1900)', f'Q{number + 1}')
+        return index.match(name, '(1850-1900)')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        result = list(executor.map(worker, range(200)))
+
+    assert len(index) == 200
+    assert len(index.entries) == 200
+    assert all(qid == f'Q{number + 1}' for number, (qid, _) in enumerate(result))
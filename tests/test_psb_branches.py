@@ -0,0 +1,40 @@
+""" testy: liczniki gałęzi analizy dat (psb_branches, DateBDF, Postac.date_from_bn) """
+import logging
+import pytest
+import psb_branches
+from psbtools import DateBDF
+from psb_postacie import Postac
+
+
+@pytest.fixture
+def branches():
+    psb_branches.enable()
+    yield psb_branches
+    psb_branches.enabled = False
+
+
+def test_date_bdf_branches(branches):
+    """ warianty roku (ok., przed, po, między) liczone osobno """
+    texts = ['1850', 'ok. 1850', 'przed 1850', 'po 1850', 'między 1850 a 1852', 'XVI/XVII w.',
+             '1 poł. XVI w.', '3 V 1850', '1523/4', '1860']
+    labels = [DateBDF(text).branch_label() for text in texts]
+
+    assert labels == ['year', 'year:about', 'year:before', 'year:after', 'range:between',
+                      'roman-range:between', 'roman:first-half', 'day-month-year', 'turn', 'year']
+    summary = branches.summary()['DateBDF']
+    assert summary['calls'] == len(texts)
+    assert summary['branches']['year']['calls'] == 2
+    assert summary['branches']['year']['examples'] == ['1850', '1860']
+    assert summary['flags']['before'] == 1
+
+
+def test_date_from_bn_branches(branches):
+    """ rok i pełna data, data przybliżona, działalność - osobne gałęzie """
+    logger = logging.getLogger('test_psb_branches')
+    for bn_years in ('1850-1900', '1850-05-03 - 1900-01-02', 'ok. 1850-po 1900', 'fl. ca 1860',
+                     'czynny ok. 1772-1780', '?-1900'):
+        Postac({'ID': '1', 'name': 'Jan Nowak', 'bn_years': bn_years}, logger, None, None).date_from_bn()
+
+    assert sorted(branch for function, branch in branches.hits if function == 'date_from_bn') == [
+        'b:brak + d:rok', 'b:data + d:data', 'b:ok. rok + d:po', 'b:rok + d:rok',
+        'czynny ok.:zakres', 'fl. ca:rok']
@@ -0,0 +1,59 @@
+""" testy: pamięć podręczna wyników wyszukiwania (psb_cache) """
+import psb_cache
+from psb_cache import SearchCache
+
+
+def fake_search(calls):
+    def search_entities(search_string, language, search_type):
+        calls.append(search_string)
+        return [f'Q{len(calls)}']
+    return search_entities
+
+
+def test_search_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(psb_cache.wbi_helpers, 'search_entities', fake_search(calls))
+    cache = SearchCache()
+
+    assert cache.search('Jan Nowak') == ['Q1']
+    assert cache.search(' jan  NOWAK ') == ['Q1']
+    assert calls == ['Jan Nowak']
+
+
+def test_invalidate_prefix(monkeypatch):
+    calls = []
+    monkeypatch.setattr(psb_cache.wbi_helpers, 'search_entities', fake_search(calls))
+    cache = SearchCache()
+    cache.search('Jan Nowak')
+    cache.search('Jan')
+    cache.search('Piotr Skarga')
+
+    # nowa etykieta 'Jan Nowakowski' zmienia wyniki wyszukiwania 'Jan' i 'Jan Nowak'
+    cache.invalidate(['Jan Nowakowski'])
+    assert len(cache) == 1
+    cache.search('Jan Nowak')
+    cache.search('Piotr Skarga')
+    assert calls == ['Jan Nowak', 'Jan', 'Piotr Skarga', 'Jan Nowak']
+
+
+def test_invalidate_during_search_not_cached(monkeypatch):
+    cache = SearchCache()
+
+    def search_entities(search_string, language, search_type):
+        # zapis elementu w trakcie wyszukiwania
+        cache.invalidate([search_string])
+        return ['Q1']
+
+    monkeypatch.setattr(psb_cache.wbi_helpers, 'search_entities', search_entities)
+
+    assert cache.search('Jan Nowak') == ['Q1']
+    assert len(cache) == 0
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / 'cache.json'
+    cache = SearchCache(path=path)
+    cache.put(SearchCache.key('Jan Nowak', 'pl', 'item'), ['Q1'])
+    cache.save()
+
+    assert SearchCache(path=path).search('Jan Nowak') == ['Q1']
@@ -0,0 +1,42 @@
+""" testy: klucz zapytania i odtwarzanie kasety HTTP (psb_cassette) """
+import gzip
+import json
+import pytest
+import requests
+from psb_cassette import Cassette, request_key
+
+API = 'https://example.org/w/api.php'
+
+
+def test_request_key_ignores_tokens_and_order():
+    key = request_key('get', API + '?action=wbgetentities&ids=Q1',
+                      data={'token': 'abc+\\', 'oauth_nonce': '1', 'maxlag': '5', 'format': 'json'})
+
+    assert key == request_key('GET', API, params=[('ids', 'Q1'), ('action', 'wbgetentities')],
+                              data='format=json&token=xyz')
+    assert key != request_key('GET', API, params={'action': 'wbgetentities', 'ids': 'Q2'},
+                              data={'format': 'json'})
+    assert key != request_key('POST', API, params={'action': 'wbgetentities', 'ids': 'Q1'},
+                              data={'format': 'json'})
+
+
+def test_cassette_replay(tmp_path):
+    """ kolejne powtórzenia zapytania otrzymują kolejne odpowiedzi, ostatnia jest powtarzana """
+    path = tmp_path / 'cassette.jsonl.gz'
+    key = request_key('GET', API, params={'action': 'query'})
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for body in ('{"n": 1}', '{"n": 2}'):
+            response = {'status': 200, 'headers': {'Content-Type': 'application/json'},
+                        'body': body, 'elapsed': 0.0}
+            f.write(json.dumps({'key': key, 'response': response}) + '\n')
+
+    original = requests.Session.request
+    with Cassette(path, 'replay') as cassette:
+        session = requests.Session()
+        result = [session.get(API, params={'action': 'query'}).json()['n'] for _ in range(3)]
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.get(API, params={'action': 'parse'})
+
+    assert result == [1, 2, 2]
+    assert cassette.replayed == 3
+    assert requests.Session.request is original
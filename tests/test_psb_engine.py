@@ -0,0 +1,92 @@
+""" testy: idempotentne dodawanie deklaracji (psb_engine.merge_claim) i etapy silnika importu """
+import json
+import logging
+from wikibaseintegrator import WikibaseIntegrator
+from wikibaseintegrator.datatypes import MonolingualText, Item, String
+from psb_engine import merge_claim, RecordBuilder, ImportEngine, parse_args
+from psb_io import append_hash, iter_journal, journal_path, record_hash, iter_failed
+
+
+class FakeBuilder(RecordBuilder):
+    """ rekord bez połączenia z wikibase """
+    records_key = 'persons'
+    log_name = 'fake'
+    hash_fields = ('name',)
+
+
+def make_engine(tmp_path, records, *args):
+    """ silnik importu dla rekordów zapisanych w katalogu tymczasowym """
+    with open(tmp_path / 'input.json', 'w', encoding='utf-8') as f:
+        json.dump({'persons': records}, f)
+    argv = ['--input', str(tmp_path / 'input.json'), '--output', str(tmp_path / 'output.json'),
+            '--journal', str(tmp_path / 'fake.log')] + list(args)
+    params = parse_args(FakeBuilder, 'test', argv)
+
+    return ImportEngine(FakeBuilder, params, logging.getLogger('test_psb_engine'))
+
+
+def stated_as(text, references=None, qualifiers=None):
+    return MonolingualText(text=text, language='pl', prop_nr='P5', references=references,
+                           qualifiers=qualifiers)
+
+
+def test_merge_claim():
+    item = WikibaseIntegrator().item.new()
+    reference_1 = [[Item(value='Q1', prop_nr='P1')]]
+    reference_2 = [[String(value='12', prop_nr='P2')]]
+
+    assert merge_claim(item, stated_as('Jan Nowak', reference_1))
+    # ta sama deklaracja z tą samą referencją - bez zmian
+    assert not merge_claim(item, stated_as('Jan Nowak', reference_1))
+    # nowa referencja dopisywana do istniejącej deklaracji
+    assert merge_claim(item, stated_as('Jan Nowak', reference_2))
+    claims = item.claims.get('P5')
+    assert len(claims) == 1
+    assert len(claims[0].references) == 2
+
+
+def test_merge_claim_different_qualifiers():
+    item = WikibaseIntegrator().item.new()
+    merge_claim(item, stated_as('Jan Nowak', qualifiers=[String(value='1', prop_nr='P3')]))
+    merge_claim(item, stated_as('Jan Nowak', qualifiers=[String(value='2', prop_nr='P3')]))
+    merge_claim(item, stated_as('Jan Nowakowski'))
+
+    assert len(item.claims.get('P5')) == 3
+
+
+def test_changed_writes_journal(tmp_path):
+    """ rekordy bez zmian zachowują QID w dzienniku partii (scalanie --shards, --workers) """
+    records = [{'ID': str(i), 'name': f'Jan Nowak {i}'} for i in range(4)]
+    hashes = tmp_path / 'fake_hashes_1.csv'
+    append_hash(hashes, '0', 'Q10', record_hash(records[0], FakeBuilder.hash_fields))
+    append_hash(hashes, '2', 'Q12', record_hash({'ID': '2', 'name': 'inna nazwa'}, FakeBuilder.hash_fields))
+    engine = make_engine(tmp_path, records, '--incremental', '--shards', '2', '--shard', '1')
+
+    selected = engine.changed(list(enumerate(records)))
+
+    assert [record['ID'] for _, record in selected] == ['1', '2', '3']
+    assert list(iter_journal(journal_path(tmp_path / 'fake.log', 1))) == [('0', 'Q10', 'bez zmian')]
+
+
+def test_retry_failed(tmp_path):
+    """ błędne rekordy w pliku json lines, ponowienie tylko tych rekordów, także po przerwaniu """
+    records = [{'ID': str(i), 'name': f'Jan Nowak {i}'} for i in range(4)]
+    engine = make_engine(tmp_path, records)
+    engine.fail(1, records[1], KeyError('volume'))
+    engine.fail(3, records[3], ValueError('bad date'))
+
+    entries = list(iter_failed(engine.failed_path))
+    assert [(entry['ID'], entry['code']) for entry in entries] == [('1', 'KeyError'), ('3', 'ValueError')]
+    assert entries[0]['record'] == records[1]
+    assert engine.failure_streak == 1
+
+    engine = make_engine(tmp_path, records, '--retry-failed')
+    selected = engine.failed_only(list(enumerate(records)))
+    assert [record['ID'] for _, record in selected] == ['1', '3']
+    assert not engine.failed_path.exists()
+    # ponowienie przerwane po kolejnym błędzie rekordu
+    engine.fail(1, records[1], KeyError('volume'))
+
+    engine = make_engine(tmp_path, records, '--retry-failed')
+    selected = engine.failed_only(list(enumerate(records)))
+    assert [record['ID'] for _, record in selected] == ['1', '3']
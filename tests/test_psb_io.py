@@ -0,0 +1,88 @@
+""" testy: pliki pośrednie importu (psb_io) """
+import json
+import pytest
+from psb_io import iter_json_records, assign_shards, record_hash, read_journal, append_journal
+from psb_io import merge_journals
+
+
+def write_records(path, key, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': {'source': 'PSB'}, key: records}, f, indent=4, ensure_ascii=False)
+
+
+def test_iter_json_records_small_chunks(tmp_path):
+    """ rekordy odczytywane strumieniowo także przy fragmentach mniejszych niż rekord """
+    records = [{'ID': f'PSB-01-{i:04d}', 'name': f'Łukasz {i}', 'aliasy': [['a, b', '1', '2']]}
+               for i in range(50)]
+    path = tmp_path / 'postacie.json'
+    write_records(path, 'persons', records)
+
+    assert list(iter_json_records(path, 'persons', chunk_size=7)) == records
+
+
+def test_iter_json_records_empty_and_missing_key(tmp_path):
+    path = tmp_path / 'postacie.json'
+    write_records(path, 'persons', [])
+    assert list(iter_json_records(path, 'persons')) == []
+
+    with pytest.raises(ValueError):
+        list(iter_json_records(path, 'authors'))
+
+
+def test_assign_shards_range_keeps_prefixes_together():
+    records = [{'ID': f'PSB-{volume:02d}-{i:04d}'} for volume in (1, 2, 3, 4) for i in range(10)]
+    assignment = assign_shards(records, 2)
+
+    assert assignment == [0] * 20 + [1] * 20
+
+
+def test_assign_shards_hash_is_stable():
+    records = [{'ID': f'PSB-01-{i:04d}'} for i in range(100)]
+    assignment = assign_shards(records, 4, mode='hash')
+
+    assert assignment == assign_shards(list(records), 4, mode='hash')
+    assert set(assignment) == {0, 1, 2, 3}
+
+
+def test_assign_shards_invalid():
+    with pytest.raises(ValueError):
+        assign_shards([{'ID': 'PSB-01-0001'}], 0)
+    with pytest.raises(ValueError):
+        assign_shards([{'ID': 'PSB-01-0001'}], 2, mode='random')
+
+
+def test_record_hash():
+    fields = ('name', 'years')
+    record = {'name': 'Jan Nowak', 'years': '(1850-1900)', 'ID': 'PSB-01-0001'}
+
+    assert record_hash(record, fields) == record_hash(dict(reversed(list(record.items()))), fields)
+    assert record_hash(record, fields) == record_hash(dict(record, ID='PSB-02-0001'), fields)
+    assert record_hash(record, fields) != record_hash(dict(record, years='(1850-1901)'), fields)
+
+
+def test_read_journal_skips_dry_run_qids(tmp_path):
+    path = tmp_path / 'journal.csv'
+    append_journal(path, 'PSB-01-0001', 'Q1', 'dodano')
+    append_journal(path, 'PSB-01-0002', 'TEST', 'dodano')
+    append_journal(path, 'PSB-01-0001', 'Q5', 'aktualizacja')
+
+    assert read_journal(path) == {'PSB-01-0001': 'Q5'}
+
+
+def test_merge_journals(tmp_path):
+    """ plik wynikowy partii: QID z dzienników wszystkich partii, bez QID z trybu testowego """
+    write_records(tmp_path / 'input.json', 'persons',
+                  [{'ID': str(i), 'name': f'Jan Nowak {i}'} for i in range(4)])
+    append_journal(tmp_path / 'journal_0.log', '0', 'Q10', 'dodano')
+    append_journal(tmp_path / 'journal_1.log', '1', 'Q11', 'bez zmian')
+    append_journal(tmp_path / 'journal_1.log', '2', 'TEST')
+
+    counter = merge_journals(tmp_path / 'input.json', tmp_path / 'output.json',
+                             [tmp_path / 'journal_0.log', tmp_path / 'journal_1.log',
+                              tmp_path / 'journal_2.log'])
+
+    assert counter == 2
+    with open(tmp_path / 'output.json', 'r', encoding='utf-8') as f:
+        records = json.load(f)['persons']
+    assert [record.get('QID', '') for record in records] == ['Q10', 'Q11', '', '']
+    assert records[0]['name'] == 'Jan Nowak 0'
@@ -0,0 +1,52 @@
+""" testy: logowanie w tle do pliku json z rotacją (psb_logging) """
+import gzip
+import json
+import logging
+import logging.handlers
+from psb_logging import set_logger, stop_logging
+
+
+def read_lines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_json_log(tmp_path):
+    """ wiersze json z polami rekordu, komunikaty zapisane po zakończeniu wątku zapisu """
+    path = tmp_path / 'import.log'
+    logger = set_logger(path, name='test_json_log', console_level=logging.CRITICAL)
+    logger.info('Dodano element', extra={'index': 1, 'record_id': '12', 'qid': 'Q5', 'action': 'dodano'})
+    logger.error('ERROR: rekord pominięty', extra={'record_id': '13', 'error_code': 'KeyError'})
+    stop_logging('test_json_log')
+
+    entries = read_lines(path)
+    assert [entry['message'] for entry in entries] == ['Dodano element', 'ERROR: rekord pominięty']
+    assert entries[0]['qid'] == 'Q5'
+    assert entries[0]['index'] == 1
+    assert 'error_code' not in entries[0]
+    assert entries[1]['level'] == 'ERROR'
+    assert entries[1]['error_code'] == 'KeyError'
+
+
+def test_log_rotation(tmp_path):
+    """ rotacja z kompresją gzip, ponowna konfiguracja bez powielania handlerów """
+    path = tmp_path / 'import.log'
+    set_logger(path, name='test_log_rotation', console_level=logging.CRITICAL)
+    logger = set_logger(path, name='test_log_rotation', console_level=logging.CRITICAL,
+                        max_bytes=2000, backup_count=2)
+    assert len([x for x in logger.handlers if isinstance(x, logging.handlers.QueueHandler)]) == 1
+
+    for number in range(100):
+        logger.info(f'komunikat {number:03d}')
+    stop_logging('test_log_rotation')
+
+    assert (tmp_path / 'import.log.1.gz').exists()
+    assert (tmp_path / 'import.log.2.gz').exists()
+    assert not (tmp_path / 'import.log.3.gz').exists()
+    with gzip.open(tmp_path / 'import.log.1.gz', 'rt', encoding='utf-8') as f:
+        rotated = [json.loads(line)['message'] for line in f]
+    current = [entry['message'] for entry in read_lines(path)]
+    # każdy komunikat zapisany dokładnie raz, ostatnie w bieżącym pliku
+    assert current[-1] == 'komunikat 099'
+    assert rotated[-1] < current[0]
+    assert len(current) == len(set(current))
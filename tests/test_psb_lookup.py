@@ -0,0 +1,58 @@
+""" testy: wyszukiwanie grupowe i zbiorcze pobranie kandydatów (psb_lookup) """
+import psb_lookup
+from psb_lookup import NameLookup, fetch_entities
+
+
+class FakeCache:
+    def __init__(self, results) -> None:
+        self.results = results
+        self.calls = []
+
+    def search(self, search_string, language, search_type):
+        self.calls.append(search_string)
+        return self.results.get(search_string, [])
+
+
+def fake_api(requests):
+    def mediawiki_api_call_helper(data, allow_anonymous):
+        requests.append(data['ids'].split('|'))
+        entities = {}
+        for qid in data['ids'].split('|'):
+            if qid == 'Q404':
+                entities[qid] = {'id': qid, 'missing': ''}
+            else:
+                entities[qid] = {'labels': {'pl': {'value': f'etykieta {qid}'}},
+                                 'descriptions': {'pl': {'value': f'opis {qid}'}}}
+        return {'entities': entities}
+    return mediawiki_api_call_helper
+
+
+def test_fetch_entities_chunks(monkeypatch):
+    requests = []
+    monkeypatch.setattr(psb_lookup.wbi_helpers, 'mediawiki_api_call_helper', fake_api(requests))
+
+    result = fetch_entities(['Q3', 'Q1', 'Q2', 'Q1', 'Q404'], chunk_size=2)
+
+    assert requests == [['Q1', 'Q2'], ['Q3', 'Q404']]
+    assert sorted(result) == ['Q1', 'Q2', 'Q3']
+
+
+def test_name_lookup(monkeypatch):
+    """ jedno wyszukiwanie na znormalizowaną nazwę, kandydaci w kolejności wyszukiwania """
+    requests = []
+    monkeypatch.setattr(psb_lookup.wbi_helpers, 'mediawiki_api_call_helper', fake_api(requests))
+    cache = FakeCache({'Jan Nowak': ['Q2', 'Q1', 'Q404'], 'Piotr Skarga': []})
+    lookup = NameLookup()
+
+    assert lookup.prefetch(['Jan Nowak', 'jan  NOWAK', 'Piotr Skarga', ''], cache) == 2
+    assert cache.calls == ['Jan Nowak', 'Piotr Skarga']
+    assert len(requests) == 1
+    assert 'JAN NOWAK' in lookup
+    assert lookup.candidates('Jan Nowak') == [('Q2', 'etykieta Q2', 'opis Q2'),
+                                              ('Q1', 'etykieta Q1', 'opis Q1')]
+    assert lookup.candidates('Piotr Skarga') == []
+
+    # zapis elementu 'Jan Nowak (1850-1900)' zmienia wyniki wyszukiwania 'Jan Nowak'
+    lookup.invalidate(['Jan Nowak (1850-1900)'])
+    assert 'Jan Nowak' not in lookup
+    assert 'Piotr Skarga' in lookup
@@ -0,0 +1,50 @@
+""" testy: odczyty z wyprzedzeniem i odrzucanie nieaktualnych wyników (psb_pipeline) """
+from psb_pipeline import Lookahead
+
+
+class FakeBuilder:
+    def __init__(self, record) -> None:
+        self.name = record['name']
+        self.qid = record.get('QID', '')
+
+    def prefetch_keys(self):
+        return [self.name]
+
+
+def test_lookahead_stale_results():
+    """ wynik odczytu odrzucany po późniejszym zapisie pasującej etykiety lub tego samego QID """
+    records = [{'name': 'Jan Nowak'},
+               {'name': 'JAN NOWAK'},
+               {'name': 'Jan Nowak'},
+               {'name': 'Adam Mickiewicz', 'QID': 'Q5'}]
+    writes = {0: (['Jan Nowak (1850-1900)'], 'Q1'), 2: (['Jan Nowak (1900-1950)'], 'Q5')}
+    lookahead = Lookahead(FakeBuilder, depth=1, workers=2)
+
+    result = []
+    for i, record, task in lookahead.run(enumerate(records)):
+        builder = lookahead.builder(task)
+        result.append(builder.name if builder else None)
+        if i in writes:
+            lookahead.written(*writes[i])
+
+    # rekord 2 odczytany już po zapisie rekordu 0, rekord 3 przed zapisem rekordu 2
+    assert result == ['Jan Nowak', None, 'Jan Nowak', None]
+    assert lookahead.stale == 2
+    # zapisy starsze niż odczyty ostatniego rekordu są usuwane
+    assert [write[0] for write in lookahead.writes] == [2]
+
+
+def test_lookahead_prefetch_error():
+    """ błąd odczytu zgłaszany przy pobraniu wyniku dla rekordu """
+    def prefetch(record):
+        raise KeyError(record['name'])
+
+    lookahead = Lookahead(prefetch, depth=2)
+    errors = []
+    for _, _, task in lookahead.run(enumerate([{'name': 'Jan Nowak'}, {'name': 'Piotr Skarga'}])):
+        try:
+            lookahead.builder(task)
+        except KeyError as error:
+            errors.append(error.args[0])
+
+    assert errors == ['Jan Nowak', 'Piotr Skarga']
@@ -0,0 +1,49 @@
+""" testy: postęp importu i plik stanu (psb_progress) """
+import json
+import logging
+from psb_progress import Progress
+
+
+class FakeCache:
+    hits = 3
+    misses = 1
+
+
+def test_progress_status(tmp_path):
+    status_path = tmp_path / 'status.json'
+    progress = Progress(total=10, search_cache=FakeCache(), terminal=False, status_path=status_path,
+                        interval=3600, status_interval=3600)
+    for action in ('dodano', 'dodano', 'zaktualizowano'):
+        progress.begin()
+        progress.update(action)
+    progress.begin()
+
+    status = progress.status(progress.start_time + 3)
+    assert status['processed'] == 3
+    assert status['in_flight'] == 1
+    assert status['rate'] == 1.0
+    assert status['eta_seconds'] == 7
+    assert status['actions'] == {'dodano': 2, 'zaktualizowano': 1}
+    assert status['cache_hit_ratio'] == 0.75
+
+
+def test_progress_status_file(tmp_path):
+    """ plik stanu zapisywany przy zakończeniu, z liczbą błędów z logu """
+    status_path = tmp_path / 'status.json'
+    progress = Progress(terminal=False, status_path=status_path, interval=3600, status_interval=3600)
+    logger = logging.getLogger('test_psb_progress')
+    logger.addHandler(progress.errors)
+    try:
+        logger.error('błąd zapisu')
+        logger.warning('ostrzeżenie')
+    finally:
+        logger.removeHandler(progress.errors)
+    progress.close()
+
+    with open(status_path, 'r', encoding='utf-8') as f:
+        status = json.load(f)
+    assert status['finished']
+    assert status['errors'] == 1
+    assert status['total'] is None
+    assert status['eta_seconds'] is None
+    assert not status_path.with_name('status.json.tmp').exists()
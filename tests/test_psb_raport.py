@@ -0,0 +1,14 @@
+""" testy: raport importu (psb_raport) """
+from psb_autor_index import AutorIndex
+from psb_raport import unresolved_authors
+
+
+def test_unresolved_authors_uses_fuzzy_match():
+    index = AutorIndex()
+    index.add('Władysław Konopczyński', '(1880-1952)', 'Q1')
+    record = {'autor': [{'autor_name': 'Wladyslaw Konopczynski', 'autor_years': '(1881-1952)'},
+                        {'autor_name': 'Jan Nowak', 'autor_years': '(1850-1900)'},
+                        {'autor_name': 'Redakcja', 'as_string': '1'}]}
+
+    assert unresolved_authors(record, index) == 'Jan Nowak (1850-1900)'
+    assert unresolved_authors(record, None) == ''
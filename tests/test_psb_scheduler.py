@@ -0,0 +1,37 @@
+""" testy: harmonogram importu autorów i postaci (psb_scheduler) """
+import logging
+from psb_autor_index import AutorIndex
+from psb_scheduler import DependencyScheduler, END
+
+
+def person(identyfikator, *authors):
+    return {'ID': identyfikator,
+            'autor': [{'autor_name': name, 'autor_years': years} for name, years in authors]}
+
+
+def released(scheduler):
+    result = []
+    while not scheduler.ready.empty():
+        item = scheduler.ready.get()
+        if item is not END:
+            result.append(item[1]['ID'])
+    return result
+
+
+def test_namesakes_are_separate_dependencies():
+    authors = [(0, {'ID': 'A1', 'name': 'Jan Nowak', 'years': '(1850-1900)'}),
+               (1, {'ID': 'A2', 'name': 'Jan Nowak', 'years': '(1900-1960)'}),
+               (2, {'ID': 'A3', 'name': 'Piotr Skarga', 'years': '(1536-1612)', 'QID': 'Q3'})]
+    persons = [(0, person('P1', ('Jan Nowak', '(1900-1960)'))),
+               (1, person('P2', ('Jan Nowak', ''))),
+               (2, person('P3', ('Piotr Skarga', '(1536-1612)')))]
+    scheduler = DependencyScheduler(authors, persons, AutorIndex(), logging.getLogger(__name__))
+
+    assert released(scheduler) == ['P3']
+    scheduler.author_done(dict(authors[1][1], QID='Q2'))
+    assert released(scheduler) == ['P1']
+    # autor bez lat życia czeka na wszystkich autorów o tej nazwie
+    scheduler.author_done(dict(authors[0][1], QID='Q1'))
+    assert released(scheduler) == ['P2']
+    scheduler.authors_finished()
+    assert scheduler.ready.get() is END
@@ -0,0 +1,48 @@
+""" testy: magazyn roboczy SQLite (psb_store) """
+import json
+from psb_store import WorkingStore
+
+
+def test_store_round_trip(tmp_path):
+    """ rekordy z pliku json, QID, stan, skróty i błędy, zapis w formacie pliku wejściowego """
+    records = [{'ID': '1', 'name': 'Jan Nowak', 'QID': 'Q1'},
+               {'ID': '2', 'name': 'Piotr Skarga', 'QID': 'TEST'},
+               {'ID': '3', 'name': 'Jan Nowak', 'volume': '1'}]
+    with open(tmp_path / 'input.json', 'w', encoding='utf-8') as f:
+        json.dump({'persons': records}, f)
+
+    store = WorkingStore(tmp_path / 'store.db')
+    assert store.import_json(tmp_path / 'input.json') == 3
+    assert store.count('persons') == 3
+    assert store.count('authors') == 0
+    assert store.ids() == ['1', '2', '3']
+    # QID z trybu testowego nie trafia do magazynu
+    assert store.qids() == {'1': 'Q1'}
+
+    store.set_qid('persons', '3', 'Q3', 'dodano')
+    store.set_status('persons', '2', 'failed')
+    store.set_hash('persons', '3', 'Q3', 'abc')
+    store.add_errors('persons', {'2': [('bad-date', 'lata "x"')]})
+    assert store.actions() == {'1': ('Q1', ''), '3': ('Q3', 'dodano')}
+    assert store.statuses() == {'done': 1, 'failed': 1}
+    assert store.hashes() == {'3': ('Q3', 'abc')}
+    assert store.errors() == {'2': [('bad-date', 'lata "x"')]}
+    assert sorted(store.find_by_name('Jan Nowak')) == ['1', '3']
+    assert store.find_by_qid('Q3') == ['3']
+    assert [position for position, _ in store.iter_records(start=1)] == [1, 2]
+
+    assert store.export_json(tmp_path / 'output.json') == 3
+    store.close()
+
+    with open(tmp_path / 'output.json', 'r', encoding='utf-8') as f:
+        exported = json.load(f)['persons']
+    assert exported == [{'ID': '1', 'name': 'Jan Nowak', 'QID': 'Q1'},
+                        {'ID': '2', 'name': 'Piotr Skarga'},
+                        {'ID': '3', 'name': 'Jan Nowak', 'volume': '1', 'QID': 'Q3'}]
+
+    # ponowne otwarcie bazy
+    store = WorkingStore(tmp_path / 'store.db')
+    assert store.qids() == {'1': 'Q1', '3': 'Q3'}
+    store.clear_errors()
+    assert store.errors() == {}
+    store.close()
@@ -0,0 +1,64 @@
+""" testy: indeks unikalności etykieta-opis (psb_unique) """
+import logging
+from psb_unique import UniquenessIndex, resolve_collisions
+from psb_postacie import Postac
+
+LOGGER = logging.getLogger(__name__)
+
+
+def person(identyfikator, name, description_pl, description_en, volume='1', page='s. 5'):
+    return {'ID': identyfikator, 'name': name, 'description_pl': description_pl,
+            'description_en': description_en, 'volume': volume, 'page': page}
+
+
+def test_index_find():
+    index = UniquenessIndex()
+    index.add('pl', ' Jan Nowak ', '(1852-1900) inżynier', 'Q1')
+
+    assert index.find('pl', 'Jan Nowak', '(1852-1900) inżynier ') == 'Q1'
+    assert index.find('en', 'Jan Nowak', '(1852-1900) inżynier') == ''
+
+
+def test_same_person_in_batch_is_not_disambiguated():
+    """ postać opisana w kilku tomach - ta sama para etykieta-opis, jeden element """
+    records = [person('PSB-01-0001', 'Jan Nowak', '(1852-1900) inżynier', '(1852-1900) engineer'),
+               person('PSB-07-0100', 'Jan Nowak', '(1852-1900) inżynier', '(1852-1900) engineer', volume='7')]
+
+    assert resolve_collisions(records, Postac, UniquenessIndex(), LOGGER) == 0
+    assert records[1]['description_pl'] == '(1852-1900) inżynier'
+
+
+def test_same_person_in_wikibase_is_not_disambiguated():
+    index = UniquenessIndex()
+    index.add('pl', 'Jan Nowak', '(1852-1900) inżynier', 'Q1')
+    index.add('en', 'Jan Nowak', '(1852-1900) engineer', 'Q1')
+    records = [person('PSB-01-0001', 'Jan Nowak', '(1852-1900) inżynier', '(1852-1900) engineer')]
+
+    assert resolve_collisions(records, Postac, index, LOGGER) == 0
+
+
+def test_conflict_in_other_language():
+    """ różne opisy polskie (różne postacie), ten sam opis angielski """
+    records = [person('PSB-01-0001', 'Jan Nowak', '(1852-1900) inżynier', 'engineer'),
+               person('PSB-02-0002', 'Jan Nowak', '(1860-1920) inżynier', 'engineer', volume='2', page='s. 10-12')]
+
+    assert resolve_collisions(records, Postac, UniquenessIndex(), LOGGER) == 1
+    assert records[0]['description_en'] == 'engineer'
+    assert records[1]['description_pl'] == '(1860-1920) inżynier'
+    assert records[1]['description_en'] == 'engineer (PSB vol. 2, p. 10-12)'
+
+
+def test_conflict_with_other_wikibase_item():
+    index = UniquenessIndex()
+    index.add('en', 'Jan Nowak', 'engineer', 'Q7')
+    records = [person('PSB-01-0001', 'Jan Nowak', '(1852-1900) inżynier', 'engineer', page='')]
+
+    assert resolve_collisions(records, Postac, index, LOGGER) == 1
+    assert records[0]['description_en'] == 'engineer (PSB-01-0001)'
+
+
+def test_records_with_qid_skipped():
+    records = [dict(person('PSB-01-0001', 'Jan Nowak', 'a', 'b'), QID='Q1'),
+               person('PSB-01-0002', 'Jan Nowak', 'c', 'b')]
+
+    assert resolve_collisions(records, Postac, UniquenessIndex(), LOGGER) == 0
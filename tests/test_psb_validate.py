@@ -0,0 +1,53 @@
+""" testy: kontrola rekordów przed importem (psb_validate) """
+from psb_validate import validate_person, validate_author, validate_records, write_report, read_quarantine
+
+
+def person(**fields):
+    record = {'ID': 'PSB-01-0001', 'name': 'Jan Nowak', 'years': '(1852-1900)',
+              'description_pl': '(1852-1900) Polski inżynier.', 'description_en': '(1852-1900) Polish engineer.',
+              'volume': '1', 'page': 's. 1-2', 'incipit': 'Nowak Jan (1852-1900).',
+              'viaf': 'https://viaf.org/viaf/162012354', 'bn_years': '(1852-1900)'}
+    record.update(fields)
+    return record
+
+
+def author(**fields):
+    record = {'ID': 'PSB-A-000001', 'name': 'Jan Nowak', 'years': '(1882-1951)', 'bn_opis': 'Historyk.',
+              'description_en': 'Historian.', 'aliasy': [['Nowak, Jan', '1', '12']],
+              'volume': '1', 'pages': '12', 'date_of_birth': '1882-03-01'}
+    record.update(fields)
+    return record
+
+
+def codes(errors):
+    return sorted(code for code, _ in errors)
+
+
+def test_validate_person():
+    assert validate_person(person()) == []
+    assert codes(validate_person(person(name=' '))) == ['empty-label']
+    assert codes(validate_person(person(name='x' * 251))) == ['label-too-long']
+    assert codes(validate_person(person(page=''))) == ['empty-string']
+    assert codes(validate_person(person(viaf='viaf 1', wikidata='12'))) == ['bad-identifier', 'bad-identifier']
+    assert codes(validate_person(person(bn_years='(1852)'))) == ['bad-bn-date']
+
+
+def test_validate_person_label_equals_description():
+    assert codes(validate_person(person(description_pl='Jan Nowak'))) == ['label-equals-description']
+
+
+def test_validate_author():
+    assert validate_author(author()) == []
+    assert codes(validate_author(author(date_of_birth='1882'))) == ['bad-date']
+    assert codes(validate_author(author(aliasy=[['', '', '']]))) == ['empty-alias']
+    assert codes(validate_author(author(aliasy=[['Nowak, J.', '2', '']]))) == ['empty-string']
+
+
+def test_validate_records_report_and_quarantine(tmp_path):
+    records = [person(ID=f'PSB-01-{i:04d}') for i in range(3)] + [person(ID='PSB-01-9999', name='')]
+    errors = validate_records(records, workers=1)
+    assert list(errors) == ['PSB-01-9999']
+
+    counts = write_report(errors, records, tmp_path / 'report.json', tmp_path / 'quarantine.json')
+    assert counts == {'empty-label': 1}
+    assert read_quarantine(tmp_path / 'quarantine.json') == {'PSB-01-9999'}
@@ -0,0 +1,31 @@
+""" testy: weryfikacja przypisania QID po imporcie (psb_verify) """
+import psb_verify
+from psb_verify import verify_records, discrepancies, P_INSTANCE_OF, P_DESCRIBED_BY_SOURCE
+from psb_verify import Q_HUMAN, Q_PSB_ITEM
+
+
+def entity(label):
+    claims = {prop: [{'mainsnak': {'datavalue': {'value': {'id': value}}}}]
+              for prop, value in ((P_INSTANCE_OF, Q_HUMAN), (P_DESCRIBED_BY_SOURCE, Q_PSB_ITEM))}
+    return {'labels': {'pl': {'value': label}}, 'claims': claims}
+
+
+def test_verify_duplicate_qid(monkeypatch):
+    """ wspólny QID biogramów tej samej postaci to ostrzeżenie, różnych postaci - rozbieżność """
+    entities = {'Q1': entity('Jan Nowak'), 'Q2': entity('Piotr Skarga')}
+    monkeypatch.setattr(psb_verify, 'fetch_entities',
+                        lambda qids, **kwargs: {qid: entities[qid] for qid in qids if qid in entities})
+    records = [{'ID': '1', 'name': 'Jan Nowak', 'years': '(1850-1900)', 'QID': 'Q1'},
+               {'ID': '2', 'name': 'Jan Nowak', 'years': '(1850-1900)', 'QID': 'Q1'},
+               {'ID': '3', 'name': 'Jan Nowak', 'years': '(1790-1831)', 'QID': 'Q1'},
+               {'ID': '4', 'name': 'Piotr Skarga', 'years': '', 'QID': ''},
+               {'ID': '5', 'name': 'Adam Nowak', 'QID': 'Q3'}]
+
+    checked, errors = verify_records(records, journal={'4': 'Q2'}, workers=2)
+
+    assert checked == 5
+    assert [code for code, _ in errors['2']] == ['shared-qid']
+    assert [code for code, _ in errors['3']] == ['duplicate-qid']
+    assert [code for code, _ in errors['5']] == ['missing-item']
+    assert '4' not in errors
+    assert sorted(discrepancies(errors)) == ['3', '5']
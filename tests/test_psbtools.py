@@ -0,0 +1,29 @@
+""" testy: lata życia i identyfikatory (psbtools) """
+from psbtools import years_to_dates, viaf_id
+
+
+def dates(years):
+    return [(x.type, x.date, x.date_2, x.about, x.before, x.after) if x else None
+            for x in years_to_dates(years)]
+
+
+def test_years_to_dates():
+    assert dates('1852-1900') == [('B', '1852', '', False, False, False),
+                                  ('D', '1900', '', False, False, False)]
+    assert dates('ok. 1520-1580')[0] == ('B', '1520', '', True, False, False)
+    assert dates('1529/30-1580')[0] == ('B', '1529', '1530', False, False, False)
+    assert dates('przed 1500-po 1560') == [('B', '1500', '', False, True, False),
+                                           ('D', '1560', '', False, False, True)]
+
+
+def test_years_to_dates_single():
+    assert dates('zm. 1523') == [('D', '1523', '', False, False, False), None]
+    assert dates('XVII w.')[0][:2] == ('F', '17')
+    assert dates('') == [None, None]
+
+
+def test_viaf_id():
+    assert viaf_id('https://viaf.org/viaf/162012354/') == '162012354'
+    assert viaf_id(' http://viaf.org/viaf/162012354 ') == '162012354'
+    assert viaf_id('162012354') == '162012354'
+    assert viaf_id('') == ''